@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of the value conversion of scraped tables.
+
+Compares convert_row_data applied row by row with convert_table on synthetic season
+leaderboards and daily records of various sizes, and checks that both return the same
+result.
+
+Usage:
+    python benchmarks/bench_convert.py [-n ROUNDS]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.convert import convert_row_data, convert_table
+
+HEADERS = ["순위", "선수명", "팀명", "AVG", "G", "PA", "AB", "R", "H", "2B", "3B"]
+HEADERS += ["HR", "TB", "RBI", "SAC", "SF", "이닝", "관중수", "ERA", "WHIP", "비고"]
+
+
+def synthetic_rows(count: int) -> list[list[str]]:
+    random.seed(count)
+    return [
+        [str(n), f"선수{n}", "삼성", f"0.{random.randint(100, 400)}"]
+        + [str(random.randint(0, 150)) for _ in range(12)]
+        + [
+            f"{random.randint(0, 200)} {random.randint(1, 2)}/3",
+            f"{random.randint(1, 25)},{random.randint(100, 999)}",
+            random.choice(["-", f"{random.uniform(0, 9):.2f}"]),
+            f"{random.uniform(0.5, 2):.2f}",
+            random.choice(["", "&nbsp;", "부상"]),
+        ]
+        for n in range(count)
+    ]
+
+
+def measure(func, rows: list[list[str]], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(rows)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark table value conversion.")
+    parser.add_argument("-n", "--rounds", type=int, default=20, help="Rounds per size")
+    args = parser.parse_args()
+
+    for count in [30, 300, 3000, 30000]:
+        rows = synthetic_rows(count)
+        row_wise = measure(
+            lambda rows: [convert_row_data(HEADERS, row) for row in rows],
+            rows,
+            args.rounds,
+        )
+        table_wise = measure(
+            lambda rows: convert_table(HEADERS, rows), rows, args.rounds
+        )
+        same = [convert_row_data(HEADERS, row) for row in rows] == convert_table(
+            HEADERS, rows
+        )
+
+        print(
+            f"{count:>6} rows: convert_row_data {row_wise * 1000:8.2f} ms, "
+            f"convert_table {table_wise * 1000:8.2f} ms "
+            f"({row_wise / table_wise:.1f}x), identical: {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
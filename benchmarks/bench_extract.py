@@ -0,0 +1,104 @@
+"""
+Benchmark of the record table extraction on backed up player pages.
+
+Compares the previous BeautifulSoup path (full document tree, select/find_all/get_text)
+with utils.extract.extract_table, and checks that both return the same result.
+
+Usage:
+    python benchmarks/bench_extract.py [PAGE ...] [-n ROUNDS]
+
+Without pages, every HTML backup under output/raw/player is used. If there is none,
+a synthetic leaderboard page is generated.
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.extract import extract_table
+
+
+def extract_table_bs4(html_text: str, player_id: bool) -> tuple[list, list]:
+    soup = BeautifulSoup(html_text, "lxml")
+    thead_tr = soup.select_one("thead tr")
+    if not thead_tr:
+        return None, None
+
+    headers = [th.get_text(strip=True) for th in thead_tr.find_all("th")]
+    rows = []
+    for tr in soup.select("tbody tr"):
+        row = [td.get_text(strip=True) for td in tr.find_all("td")]
+        if player_id:
+            row.insert(0, re.search(r"playerId=(\d+)", tr.find("a")["href"]).group(1))
+        rows.append(row)
+    return headers, rows
+
+
+def synthetic_page(rows: int = 30) -> str:
+    nav = "".join(f'<li><a href="/Menu{i}.aspx">메뉴 {i}</a></li>' for i in range(400))
+    body = "".join(
+        f'<tr><td>{n}</td><td><a href="/Record/Player/HitterDetail/Basic.aspx?playerId={60000 + n}">'
+        f"선수{n}</a></td><td>삼성</td>" + "<td> 0.300 </td>" * 16 + "</tr>"
+        for n in range(rows)
+    )
+    return (
+        f'<html><head><title>KBO</title></head><body><ul class="gnb">{nav}</ul>'
+        '<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="'
+        + "x" * 20000
+        + '" /><table class="tData01"><thead><tr><th>순위</th><th>선수명</th><th>팀명</th>'
+        + "<th>AVG</th>" * 16
+        + f'</tr></thead><tbody>{body}</tbody></table><div class="paging"><a>1</a></div>'
+        f"{nav}</body></html>"
+    )
+
+
+def measure(func, pages: list[tuple[str, bool]], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for html_text, player_id in pages:
+            func(html_text, player_id)
+    return (time.perf_counter() - start) / (rounds * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark record table extraction.")
+    parser.add_argument("pages", nargs="*", help="HTML pages to parse")
+    parser.add_argument("-n", "--rounds", type=int, default=5, help="Rounds per page")
+    args = parser.parse_args()
+
+    paths = args.pages or glob.glob(
+        os.path.join("output", "raw", "player", "**", "*.html"), recursive=True
+    )
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            # Leaderboard pages carry the player ID in each row's link
+            pages.append((f.read(), "season_summary" in os.path.basename(path)))
+    if not pages:
+        print("No recorded pages found, using a synthetic leaderboard page.")
+        pages = [(synthetic_page(), True)]
+
+    mismatches = sum(
+        extract_table_bs4(html_text, player_id) != extract_table(html_text, player_id)
+        for html_text, player_id in pages
+    )
+
+    bs4_time = measure(extract_table_bs4, pages, args.rounds)
+    lxml_time = measure(extract_table, pages, args.rounds)
+
+    print(f"Pages: {len(pages)}, mismatches: {mismatches}")
+    print(f"BeautifulSoup: {bs4_time * 1000:.2f} ms/page")
+    print(
+        f"lxml extract:  {lxml_time * 1000:.2f} ms/page ({bs4_time / lxml_time:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,47 @@ import logging
 import time
 
 
+def _file_handler(suffix: str = "") -> logging.FileHandler:
+    # KBO_LOG_DIR moves the log files, e.g. out of the working tree in tests
+    log_path = os.environ.get("KBO_LOG_DIR") or os.path.join(os.getcwd(), "logs")
+    if not os.path.exists(log_path):
+        os.makedirs(log_path)
+
+    file_handler = logging.FileHandler(
+        os.path.join(log_path, f"{time.strftime('%Y-%m-%d_%H')}{suffix}.log")
+    )
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    )
+    return file_handler
+
+
 def get_logger() -> logging.Logger:
     logger = logging.getLogger(__name__)
     logger.setLevel(logging.DEBUG)
 
     if not logger.handlers:
-        log_path = os.path.join(os.getcwd(), "logs")
-        if not os.path.exists(log_path):
-            os.makedirs(log_path)
-
         stream_handler = logging.StreamHandler()
         stream_handler.setLevel(logging.DEBUG)
 
-        file_handler = logging.FileHandler(
-            os.path.join(log_path, f"{time.strftime('%Y-%m-%d_%H')}.log")
-        )
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(
-            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        )
-
         logger.addHandler(stream_handler)
-        logger.addHandler(file_handler)
+        logger.addHandler(_file_handler())
+
+    return logger
+
+
+def use_worker_log() -> logging.Logger:
+    """Log a worker process to its own file, and prefix its console output with its PID."""
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            logger.removeHandler(handler)
+            handler.close()
+        else:
+            handler.setFormatter(
+                logging.Formatter(f"[worker {os.getpid()}] %(message)s")
+            )
 
+    logger.addHandler(_file_handler(f"_worker-{os.getpid()}"))
     return logger
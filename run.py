@@ -1,28 +1,408 @@
+import os
 import argparse
+import time
+import socket
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from datetime import datetime
 
 from scrapers.base import KBOBaseScraper
 from scrapers.game import GameScheduleScraper, GameResultScraper
 from scrapers.player import PlayerSeasonStatsScraper, PlayerDetailStatsScraper
+from logger import get_logger, use_worker_log
+from utils.compact import compact_unit, find_units
+from utils.database import configure_journal, get_journal_mode
+from utils.dataset import DICTIONARY_COLUMNS, configure_dataset, get_dataset_options
+from utils.metrics import get_metrics
+from utils.workqueue import WorkQueue
+from utils.request import (
+    RequestScheduler,
+    ResponseCache,
+    configure_cache,
+    configure_pool,
+    configure_scheduler,
+)
 
 
-def get_scrapers(command, format, series) -> list[KBOBaseScraper]:
-    """Return a list of scraper instances based on the selected command."""
+def get_scraper_specs(command) -> list[tuple[type[KBOBaseScraper], tuple]]:
+    """
+    Return the scraper classes of a command with their own arguments, in run order.
+
+    Scrapers open their manifest and backup archive when built, so callers counting or
+    picking scrapers use the specs and only build the scrapers they run.
+    """
     if command == "schedule":
-        return [GameScheduleScraper(format, series)]
+        return [(GameScheduleScraper, ())]
     elif command == "game":
-        return [GameResultScraper(format, series)]
+        return [(GameResultScraper, ())]
     elif command == "player":
-        scrapers = []
+        specs = []
         for pt in ["hitter", "pitcher", "fielder", "runner"]:
-            scrapers.append(PlayerSeasonStatsScraper(format, series, pt))
+            specs.append((PlayerSeasonStatsScraper, (pt, False)))
         for pt in ["hitter", "pitcher"]:
-            scrapers.append(PlayerDetailStatsScraper(format, series, pt, "daily"))
-            scrapers.append(PlayerDetailStatsScraper(format, series, pt, "situation"))
-        return scrapers
+            for rt in ["daily", "situation"]:
+                specs.append((PlayerDetailStatsScraper, (pt, rt)))
+        return specs
     else:
         return []
 
 
+def build_scraper(
+    command, index, format, series, concurrency=1, mode=None
+) -> KBOBaseScraper:
+    """Build the scraper of a command at the given index of its specs."""
+    scraper_class, args = get_scraper_specs(command)[index]
+    return scraper_class(format, series, *args, concurrency, mode)
+
+
+def configure_requests(concurrency, retries, cache, cache_size, budget=None):
+    """Set up the connection pool, request scheduler and response cache of the process."""
+    # Schedule and scoreboard requests may run at the same time when pipelined
+    configure_pool(2 * concurrency)
+    configure_scheduler(
+        RequestScheduler(
+            max_concurrency=2 * concurrency, max_retries=retries, budget=budget
+        )
+    )
+
+    if cache:
+        configure_cache(
+            ResponseCache(
+                os.path.join(os.getcwd(), "output", "cache"),
+                max_bytes=cache_size * 1024 * 1024,
+                ttls={"GetKboGameList": 60, "GetScoreBoardScroll": 60},
+            )
+        )
+
+
+def init_worker(dataset_options, request_options=None, journal_mode=None):
+    """Set up a worker process of the pool like main sets up a single run."""
+    use_worker_log()
+    if journal_mode:
+        configure_journal(journal_mode)
+    configure_dataset(**dataset_options)
+    if request_options is not None:
+        configure_requests(**request_options)
+
+
+def collect(func, *args):
+    """Run a function in a worker process, returning its result and the metrics it recorded."""
+    metrics = get_metrics()
+    # Forked workers start with a copy of the parent's metrics
+    metrics.reset()
+    return func(*args), metrics.snapshot()
+
+
+def write_report(command):
+    """Write the run report and Prometheus textfile of the process under output/metrics."""
+    logger = get_logger()
+    metrics = get_metrics()
+    try:
+        report_path, prom_path = metrics.write(
+            os.path.join(os.getcwd(), "output", "metrics"), command
+        )
+    except OSError as e:
+        logger.error(f"Failed to write run report: {e}")
+        return
+
+    logger.info(f"Run summary: {metrics.summary()}")
+    logger.info(f"Run report written to {report_path} and {prom_path}")
+
+
+def run_unit(command, index, format, series, season, concurrency=1, mode=None):
+    """Run one scraper of a command for one season."""
+    scraper = build_scraper(command, index, format, series, concurrency, mode)
+    scraper.run(season)
+    return command, index, season
+
+
+def run_parallel(
+    targets,
+    seasons,
+    format,
+    series,
+    workers=None,
+    concurrency=1,
+    mode=None,
+    request_options=None,
+):
+    """
+    Run every (scraper, season) pair of the commands in a process pool.
+
+    Player detail pairs of a season are only submitted once the season stats pairs of
+    that season are done, since detail scrapers read the rosters those store on disk
+    and the roster cache only shares a fetch within a process. Other pairs run in any
+    order, and each only writes the output of its own scraper and season, so the output
+    does not depend on the order in which pairs complete.
+
+    Args:
+        targets (list[str]): Commands to run ('schedule', 'game', 'player').
+        seasons (Iterable[int]): Target seasons.
+        format (str): Output format ('parquet', 'json', 'csv', 'dataset').
+        series (list[int]): Series IDs.
+        workers (int, Optional): Number of processes (default: number of cores).
+        concurrency (int, Optional): Concurrent requests per scraper.
+        mode (str, Optional): Run mode of the scrapers ('resume', 'incremental', 'replay').
+        request_options (dict, Optional): Arguments of configure_requests for the workers,
+                                          None for runs without network access.
+    """
+    logger = get_logger()
+    units = [
+        (command, index, format, series, season, concurrency, mode)
+        for command in targets
+        for index in range(len(get_scraper_specs(command)))
+        for season in seasons
+    ]
+
+    def scraper_class(unit):
+        return get_scraper_specs(unit[0])[unit[1]][0]
+
+    # Detail pairs waiting for the season stats pairs of their season
+    waiting, rosters = {}, {}
+    for unit in units:
+        if scraper_class(unit) is PlayerDetailStatsScraper:
+            waiting.setdefault(unit[4], []).append(unit)
+        elif scraper_class(unit) is PlayerSeasonStatsScraper:
+            rosters[unit[4]] = rosters.get(unit[4], 0) + 1
+
+    # Worker processes write the dataset output with the same options
+    failed = []
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=init_worker,
+        initargs=(get_dataset_options(), request_options),
+    ) as executor:
+        futures = {}
+
+        def submit(units):
+            submitted = {
+                executor.submit(collect, run_unit, *unit): unit for unit in units
+            }
+            futures.update(submitted)
+            return set(submitted)
+
+        pending = submit(
+            unit
+            for unit in units
+            if scraper_class(unit) is not PlayerDetailStatsScraper
+            or not rosters.get(unit[4])
+        )
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                command, index, _, _, season, _, _ = unit = futures[future]
+                try:
+                    get_metrics().merge(future.result()[1])
+                except Exception as e:
+                    logger.error(
+                        f"Failed to run {command} scraper {index} for season {season}: {e}"
+                    )
+                    failed.append(unit)
+
+                # Detail scrapers fetch the roster themselves if the season stats failed
+                if scraper_class(unit) is PlayerSeasonStatsScraper:
+                    rosters[season] -= 1
+                    if not rosters[season]:
+                        pending |= submit(waiting.pop(season, []))
+
+    if failed:
+        raise SystemExit(f"{len(failed)} of {len(units)} scraper runs failed.")
+
+
+def replay(targets, year, format, series, workers=None):
+    """
+    Rebuild processed output from the raw backups without any network access.
+
+    Every (scraper, season) pair is replayed in its own process.
+
+    Args:
+        targets (list[str]): Commands to replay ('schedule', 'game', 'player').
+        year (int, Optional): Target season, or every season since 1982 if None.
+        format (str): Output format ('parquet', 'json', 'csv', 'dataset').
+        series (list[int]): Series IDs.
+        workers (int, Optional): Number of processes (default: number of cores).
+    """
+    seasons = [year] if year else range(1982, datetime.now().year + 1)
+    run_parallel(targets, seasons, format, series, workers, mode="replay")
+
+
+def compact(year=None, workers=None):
+    """
+    Merge the processed output files into the partitioned Parquet dataset.
+
+    Every (dataset, season) is compacted in its own process, so memory is bounded by
+    the largest season of a dataset times the number of workers.
+
+    Args:
+        year (int, Optional): Target season, or every season found if None.
+        workers (int, Optional): Number of processes (default: number of cores).
+    """
+    logger = get_logger()
+    source = os.path.join(os.getcwd(), "output", "processed")
+    target = os.path.join(os.getcwd(), "output", "dataset")
+
+    units = {
+        unit: files
+        for unit, files in find_units(source).items()
+        if year is None or unit[1] == str(year)
+    }
+    if not units:
+        logger.warning(f"No output files found under {source}.")
+        return
+
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {
+            executor.submit(
+                compact_unit, source, target, files, get_dataset_options()
+            ): unit
+            for unit, files in units.items()
+        }
+        for future in as_completed(futures):
+            dataset, season = futures[future]
+            try:
+                read, written = future.result()
+                logger.info(
+                    f"Compacted {len(units[(dataset, season)])} files of {dataset} "
+                    f"for season {season} ({written}/{read} rows)."
+                )
+            except Exception as e:
+                logger.error(f"Failed to compact {dataset} for season {season}: {e}")
+                failed.append((dataset, season))
+
+    if failed:
+        raise SystemExit(f"{len(failed)} of {len(units)} units failed to compact.")
+
+
+def enqueue(queue, job, command, year, format, series, mode=None) -> int:
+    """
+    Queue every (scraper, season) unit of a command as a job of the work queue.
+
+    Args:
+        queue (WorkQueue): Shared work queue.
+        job (str): Job name.
+        command (str): Scraping command ('schedule', 'game', 'player').
+        year (int, Optional): Target season, or every season since 1982 if None.
+        format (str): Output format ('parquet', 'json', 'csv', 'dataset').
+        series (list[int]): Series IDs.
+        mode (str, Optional): Run mode of the scrapers ('resume', 'incremental').
+
+    Returns:
+        int: Number of units added.
+    """
+    seasons = [year] if year else range(1982, datetime.now().year + 1)
+    queue.add_job(job, command, format, series, mode)
+    return queue.put(
+        job,
+        [
+            (index, season, "")
+            for index in range(len(get_scraper_specs(command)))
+            for season in seasons
+        ],
+    )
+
+
+def process_unit(queue, unit, concurrency=1):
+    """
+    Run a unit leased from the work queue.
+
+    A season unit of a scraper that can be split (e.g. player detail pages) is replaced
+    by one unit per target instead, so the targets are shared by every worker.
+    """
+    logger = get_logger()
+    mode = unit["mode"]
+    if mode is None and unit["attempts"] > 1:
+        # Units fetched by a previous attempt are not fetched again
+        mode = "resume"
+
+    scraper = build_scraper(
+        unit["command"],
+        unit["scraper"],
+        unit["format"],
+        unit["series"],
+        concurrency,
+        mode,
+    )
+    if unit["target"]:
+        scraper.targets = {unit["target"]}
+    else:
+        targets = scraper.split(unit["season"])
+        if targets:
+            added = queue.put(
+                unit["job"],
+                [(unit["scraper"], unit["season"], target) for target in targets],
+            )
+            logger.info(
+                f"Split {unit['command']} scraper {unit['scraper']} for season "
+                f"{unit['season']} into {added} units."
+            )
+            return
+
+    scraper.run(unit["season"])
+
+
+def work(queue_path, job=None, concurrency=1, lease_time=300, poll=5.0) -> int:
+    """
+    Run units of the work queue until every unit of the job is done or failed.
+
+    The lease of the running unit is renewed by a heartbeat thread. While other workers
+    still hold leases, the worker waits for new or expired units.
+
+    Args:
+        queue_path (str): Path of the work queue database.
+        job (str, Optional): Only run units of this job.
+        concurrency (int, Optional): Concurrent requests per scraper.
+        lease_time (float, Optional): Seconds a lease lasts without a heartbeat.
+        poll (float, Optional): Seconds between polls while no unit is available.
+
+    Returns:
+        int: Number of units run.
+    """
+    logger = get_logger()
+    queue = WorkQueue(queue_path, lease_time)
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+
+    processed = 0
+    while True:
+        unit = queue.lease(worker, job)
+        if unit is None:
+            stats = queue.stats(job)
+            if not stats[WorkQueue.QUEUED] and not stats[WorkQueue.LEASED]:
+                break
+            time.sleep(poll)
+            continue
+
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(lease_time / 3):
+                if not queue.heartbeat(unit["id"], worker):
+                    logger.warning(f"Lost the lease of unit {unit['id']}.")
+                    return
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            process_unit(queue, unit, concurrency)
+            queue.complete(unit["id"], worker)
+            processed += 1
+        except Exception as e:
+            logger.error(f"Failed to run unit {unit['id']}: {e}")
+            queue.fail(unit["id"], worker, str(e))
+        finally:
+            stop.set()
+            thread.join()
+
+    stats = queue.stats(job)
+    logger.info(
+        f"Worker {worker} ran {processed} units, "
+        f"{stats[WorkQueue.DONE]} done and {stats[WorkQueue.FAILED]} failed in total."
+    )
+    queue.close()
+    return processed
+
+
 def create_parser() -> argparse.ArgumentParser:
     """Create the argument parser for the KBO data scraping CLI."""
     parser = argparse.ArgumentParser(
@@ -33,6 +413,28 @@ def create_parser() -> argparse.ArgumentParser:
         dest="command", help="Choose a scraping target", required=True
     )
 
+    # Options of the partitioned Parquet dataset output
+    def add_dataset_arguments(parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--row-group-size",
+            type=int,
+            default=128 * 1024,
+            help="Rows per Parquet row group of the dataset output (default: 131072).",
+        )
+        parser.add_argument(
+            "--compression",
+            type=str,
+            choices=["zstd", "snappy", "gzip", "none"],
+            default="zstd",
+            help="Compression of the dataset output (default: zstd).",
+        )
+        parser.add_argument(
+            "--dictionary",
+            type=str,
+            default=",".join(DICTIONARY_COLUMNS),
+            help="Comma-separated columns with dictionary encoding in the dataset output.",
+        )
+
     # Common format argument function
     def add_format_argument(parser: argparse.ArgumentParser) -> None:
         parser.add_argument("-y", "--year", type=int, help="Season year (e.g., 2014)")
@@ -41,9 +443,9 @@ def create_parser() -> argparse.ArgumentParser:
             "-f",
             "--format",
             type=str,
-            choices=["parquet", "json", "csv"],
+            choices=["parquet", "json", "csv", "dataset"],
             default="csv",
-            help="Output format: 'parquet', 'json', or 'csv' (default: csv).",
+            help="Output format: 'parquet', 'json', 'csv', or 'dataset' (default: csv).",
         )
         parser.add_argument(
             "-s",
@@ -53,6 +455,59 @@ def create_parser() -> argparse.ArgumentParser:
             default=0,
             help="Series ID (default: 0) - 0: Regular Season, 1: Preseason, 3: Semi-PO, 4: Wildcard, 5: Playoff, 7: Korean Series, 8: International, 9: All-Star)",
         )
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of concurrent requests (default: 1).",
+        )
+        parser.add_argument(
+            "-r",
+            "--retries",
+            type=int,
+            default=3,
+            help="Retries per failed request, with exponential backoff (default: 3).",
+        )
+        parser.add_argument(
+            "--cache",
+            action="store_true",
+            help="Cache responses on disk under output/cache.",
+        )
+        parser.add_argument(
+            "--cache-size",
+            type=int,
+            default=1024,
+            help="Maximum size of the response cache in MB (default: 1024).",
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes, each running one scraper for one season (default: 1).",
+        )
+        parser.add_argument(
+            "--request-budget",
+            type=int,
+            help="Maximum requests in flight across all workers (default: 2 x concurrency x workers).",
+        )
+        add_dataset_arguments(parser)
+        mode_group = parser.add_mutually_exclusive_group()
+        mode_group.add_argument(
+            "--resume",
+            action="store_const",
+            const="resume",
+            dest="mode",
+            help="Skip every unit already recorded in the fetch manifest.",
+        )
+        mode_group.add_argument(
+            "--incremental",
+            action="store_const",
+            const="incremental",
+            dest="mode",
+            help="Refetch only units that may still change (unfinished games, current season).",
+        )
 
     # Schedule data
     schedule_parser = subparsers.add_parser("schedule", help="Scrape schedule data")
@@ -66,6 +521,207 @@ def create_parser() -> argparse.ArgumentParser:
     player_parser = subparsers.add_parser("player", help="Scrape player data")
     add_format_argument(player_parser)
 
+    # Replay raw backups
+    replay_parser = subparsers.add_parser(
+        "replay", help="Rebuild processed output from raw backups"
+    )
+    replay_parser.add_argument(
+        "targets",
+        nargs="*",
+        metavar="{schedule,game,player}",
+        help="Data to rebuild (default: game player).",
+    )
+    replay_parser.add_argument(
+        "-y", "--year", type=int, help="Season year (e.g., 2014)"
+    )
+    replay_parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=["parquet", "json", "csv", "dataset"],
+        default="csv",
+        help="Output format: 'parquet', 'json', 'csv', or 'dataset' (default: csv).",
+    )
+    replay_parser.add_argument(
+        "-s",
+        "--series",
+        type=int,
+        choices=[0, 1, 3, 4, 5, 7, 8, 9],
+        default=0,
+        help="Series ID (default: 0).",
+    )
+    add_dataset_arguments(replay_parser)
+    replay_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes (default: number of CPU cores).",
+    )
+
+    # Compact processed output
+    compact_parser = subparsers.add_parser(
+        "compact", help="Merge processed output files into a partitioned dataset"
+    )
+    compact_parser.add_argument(
+        "-y", "--year", type=int, help="Season year (e.g., 2014)"
+    )
+    add_dataset_arguments(compact_parser)
+    compact_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes (default: number of CPU cores).",
+    )
+
+    # Live game-day polling
+    watch_parser = subparsers.add_parser(
+        "watch", help="Poll today's games and save their results as they change"
+    )
+    watch_parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=["parquet", "json", "csv"],
+        default="csv",
+        help="Output format: 'parquet', 'json', or 'csv' (default: csv).",
+    )
+    watch_parser.add_argument(
+        "-s",
+        "--series",
+        type=int,
+        choices=[0, 1, 3, 4, 5, 7, 8, 9],
+        default=0,
+        help="Series ID (default: 0).",
+    )
+    watch_parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of concurrent requests (default: 1).",
+    )
+    watch_parser.add_argument(
+        "-r",
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries per failed request, with exponential backoff (default: 3).",
+    )
+    watch_parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=30,
+        help="Seconds between polls while games are live (default: 30).",
+    )
+    watch_parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=600,
+        help="Seconds between polls without live games (default: 600).",
+    )
+
+    # Shared work queue
+    queue_parser = subparsers.add_parser(
+        "queue", help="Queue a scraping job in the shared work queue"
+    )
+    queue_parser.add_argument(
+        "target", choices=["schedule", "game", "player"], help="Data to scrape."
+    )
+    queue_parser.add_argument("-y", "--year", type=int, help="Season year (e.g., 2014)")
+    queue_parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=["parquet", "json", "csv", "dataset"],
+        default="csv",
+        help="Output format: 'parquet', 'json', 'csv', or 'dataset' (default: csv).",
+    )
+    queue_parser.add_argument(
+        "-s",
+        "--series",
+        type=int,
+        choices=[0, 1, 3, 4, 5, 7, 8, 9],
+        default=0,
+        help="Series ID (default: 0).",
+    )
+    queue_parser.add_argument(
+        "--job", type=str, help="Job name (default: <target>-<year>-<series>)."
+    )
+    queue_parser.add_argument(
+        "--queue",
+        type=str,
+        default=os.path.join("output", "queue.db"),
+        help="Path of the work queue database (default: output/queue.db).",
+    )
+    queue_mode_group = queue_parser.add_mutually_exclusive_group()
+    queue_mode_group.add_argument(
+        "--resume",
+        action="store_const",
+        const="resume",
+        dest="mode",
+        help="Skip every unit already recorded in the fetch manifest.",
+    )
+    queue_mode_group.add_argument(
+        "--incremental",
+        action="store_const",
+        const="incremental",
+        dest="mode",
+        help="Refetch only units that may still change (unfinished games, current season).",
+    )
+
+    # Work queue worker
+    worker_parser = subparsers.add_parser(
+        "worker", help="Run units of the shared work queue"
+    )
+    worker_parser.add_argument("--job", type=str, help="Only run units of this job.")
+    worker_parser.add_argument(
+        "--queue",
+        type=str,
+        default=os.path.join("output", "queue.db"),
+        help="Path of the work queue database (default: output/queue.db).",
+    )
+    worker_parser.add_argument(
+        "--lease",
+        type=float,
+        default=300,
+        help="Seconds a lease lasts without a heartbeat (default: 300).",
+    )
+    worker_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes on this host (default: 1).",
+    )
+    worker_parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of concurrent requests per worker (default: 1).",
+    )
+    worker_parser.add_argument(
+        "-r",
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries per failed request, with exponential backoff (default: 3).",
+    )
+    worker_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Cache responses on disk under output/cache.",
+    )
+    worker_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Maximum size of the response cache in MB (default: 1024).",
+    )
+    add_dataset_arguments(worker_parser)
+
     return parser
 
 
@@ -73,12 +729,125 @@ def main():
     parser = create_parser()
     args = parser.parse_args()
 
-    scrapers = get_scrapers(args.command, args.format, [args.series])
-    if not scrapers:
+    if args.command in ["queue", "compact"]:
+        dispatch(parser, args)
+        return
+
+    try:
+        dispatch(parser, args)
+    finally:
+        write_report(args.command)
+
+
+def dispatch(parser, args):
+    """Run the selected command."""
+    if args.command in ["queue", "worker"]:
+        # Workers of several hosts share the output directory, maybe on a network disk
+        configure_journal("DELETE")
+
+    if args.command == "queue":
+        series = [args.series]
+        job = args.job or f"{args.target}-{args.year or 'all'}-{args.series}"
+        queue = WorkQueue(args.queue)
+        added = enqueue(
+            queue, job, args.target, args.year, args.format, series, args.mode
+        )
+        get_logger().info(f"Queued {added} units for job {job}: {queue.stats(job)}")
+        return
+
+    if args.command == "watch":
+        # Final games are loaded from their backups instead of being requested again
+        configure_requests(args.concurrency, args.retries, False, 0)
+        scraper = GameResultScraper(
+            args.format, [args.series], args.concurrency, "incremental"
+        )
+        try:
+            scraper.watch(args.min_interval, args.max_interval)
+        except KeyboardInterrupt:
+            get_logger().info("Stopped watching.")
+        return
+
+    configure_dataset(
+        args.row_group_size,
+        args.compression,
+        [column for column in args.dictionary.split(",") if column],
+    )
+
+    if args.command == "compact":
+        compact(args.year, args.workers)
+        return
+
+    if args.command == "replay":
+        targets = args.targets or ["game", "player"]
+        for target in targets:
+            if target not in ["schedule", "game", "player"]:
+                parser.error(f"invalid replay target: {target}")
+        replay(targets, args.year, args.format, [args.series], args.workers)
+        return
+
+    request_options = {
+        "concurrency": args.concurrency,
+        "retries": args.retries,
+        "cache": args.cache,
+        "cache_size": args.cache_size,
+    }
+
+    if args.command == "worker":
+        if args.workers <= 1:
+            configure_requests(**request_options)
+            work(args.queue, args.job, args.concurrency, args.lease)
+            return
+
+        budget = 2 * args.concurrency * args.workers
+        request_options["budget"] = multiprocessing.BoundedSemaphore(budget)
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=init_worker,
+            initargs=(get_dataset_options(), request_options, get_journal_mode()),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    collect, work, args.queue, args.job, args.concurrency, args.lease
+                )
+                for _ in range(args.workers)
+            ]
+            for future in as_completed(futures):
+                get_metrics().merge(future.result()[1])
+        return
+
+    if args.workers > 1 and not args.date:
+        seasons = [args.year] if args.year else range(1982, datetime.now().year + 1)
+        budget = args.request_budget or 2 * args.concurrency * args.workers
+        request_options["budget"] = multiprocessing.BoundedSemaphore(budget)
+        run_parallel(
+            [args.command],
+            seasons,
+            args.format,
+            [args.series],
+            args.workers,
+            args.concurrency,
+            args.mode,
+            request_options,
+        )
+        return
+
+    configure_requests(**request_options)
+
+    specs = get_scraper_specs(args.command)
+    if not specs:
         parser.print_help()
         return
 
-    for scraper in scrapers:
+    # Each scraper is built right before its run
+    for index in range(len(specs)):
+        scraper = build_scraper(
+            args.command,
+            index,
+            args.format,
+            [args.series],
+            args.concurrency,
+            args.mode,
+        )
         scraper.run(args.year, args.date)
 
 
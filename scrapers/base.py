@@ -2,17 +2,42 @@ import os
 import json
 import time
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Callable, Iterable, Iterator
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from logger import get_logger
+from utils.archive import get_archive
+from utils.dataset import DatasetWriter, get_dataset_options
+from utils.manifest import FetchManifest, content_hash
+from utils.metrics import get_metrics
+from utils.request import get_cache, get_pool, get_scheduler, get_tokens
+from utils.schema import get_schema
+
+# Nullable pandas dtypes, so JSON and CSV keep integers with missing values as integers
+_PANDAS_TYPES = {
+    pa.int64(): pd.Int64Dtype(),
+    pa.float64(): pd.Float64Dtype(),
+    pa.string(): pd.StringDtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
 
 
 class KBOBaseScraper(ABC):
     """Base class for scraping KBO data (player, game, schedule, team)."""
 
-    def __init__(self, format: str, series: list[int]):
+    def __init__(
+        self,
+        format: str,
+        series: list[int],
+        concurrency: int = 1,
+        mode: str = None,
+    ):
         self.logger = get_logger()
         self.start_year = 1982
         self.current_year = datetime.now().year
@@ -20,9 +45,23 @@ class KBOBaseScraper(ABC):
         base_dir = os.getcwd()
         self.backup_path = os.path.join(base_dir, "output", "raw")
         self.save_path = os.path.join(base_dir, "output", "processed")
+        self.dataset_path = os.path.join(base_dir, "output", "dataset")
+        self.archive = get_archive(os.path.join(self.backup_path, "archive"))
 
         self.format = format if format else "parquet"
         self.series = series if series else [0, 1, 3, 4, 5, 7, 8, 9]
+        self.concurrency = max(1, concurrency or 1)
+
+        self.mode = mode
+        self.failed_units = []
+        # Units whose content did not change since they were last fetched
+        self.unchanged_units: set[str] = set()
+        # Yield the rows of unchanged outputs too, for scrapers feeding other scrapers
+        self.keep_rows = False
+        self.manifest = FetchManifest(os.path.join(base_dir, "output", "manifest.db"))
+        self.dataset: DatasetWriter | None = None
+        # Targets (e.g. player IDs) a run is restricted to, None for the whole season
+        self.targets: set[str] | None = None
 
     @abstractmethod
     def _parse(self, response) -> tuple[list, list]:
@@ -30,10 +69,49 @@ class KBOBaseScraper(ABC):
         pass
 
     @abstractmethod
-    def fetch(self, season: int, date: str) -> dict[str, list]:
-        """Fetch raw data (must be implemented by subclass)."""
+    def fetch(self, season: int, date: str) -> Iterator[tuple[str, list]]:
+        """
+        Yield (file_path, rows) for each unit as it completes (must be implemented by subclass).
+
+        Rows are None when the file is built only from unchanged units and its output
+        from a previous run exists, unless `keep_rows` is set.
+        """
         pass
 
+    def split(self, season: int) -> list[str] | None:
+        """
+        Return the targets a season can be split into (e.g. player IDs).
+
+        Each target can then be run on its own by setting `targets`, e.g. by the workers
+        of a work queue. Scrapers that run a season as a whole return None.
+        """
+        return None
+
+    def map_concurrent(self, func: Callable, items: Iterable) -> Iterator:
+        """
+        Apply a function to every item, using a bounded thread pool when concurrency > 1.
+
+        Results are yielded in the same order as the input items. At most twice as many
+        items as workers are in flight, so results are not held longer than needed when
+        the caller consumes them slowly.
+
+        Args:
+            func (Callable): Function to call for each item.
+            items (Iterable): Items to process.
+        """
+        if self.concurrency <= 1:
+            yield from map(func, items)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= 2 * self.concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def parse(self, response):
         """Wrapper for parse logic with error handling."""
         if not response:
@@ -41,62 +119,222 @@ class KBOBaseScraper(ABC):
             return None, None
 
         try:
-            return self._parse(response)
+            with get_metrics().time("parse"):
+                return self._parse(response)
         except (AttributeError, KeyError, TypeError, json.JSONDecodeError) as e:
             self.logger.error(f"Known parsing error: {e}")
         except Exception as e:
             self.logger.error(f"Unexpected error during parsing: {e}")
         return None, None
 
-    def backup(self, data: str | dict, file_path: str, format: str):
+    def backup(
+        self,
+        data: str | bytes,
+        file_path: str,
+        format: str,
+        status: str = FetchManifest.FINAL,
+        url: str | None = None,
+        payload: dict | None = None,
+    ):
         """
-        Backed up the scraped data to a file.
+        Back up a response to the season archive and record it in the fetch manifest.
+
+        The response is archived as received, without being parsed and serialized again.
 
         Args:
-            data (str | dict): Data to save.
+            data (str | bytes): Original response body (text is encoded as UTF-8).
             file_path (str): Path of the output file (without extension).
             format (str): Format of output file ('html', 'json').
+            status (str, Optional): Manifest status of the unit ('final', 'pending').
+            url (str, Optional): Requested URL, indexed with the payload.
+            payload (dict, Optional): Form data of the request.
         """
+        if format not in ("html", "json"):
+            self.logger.warning(f"Unsupported file format: {format}")
+            return
+        if self.mode == "replay":
+            # Replayed units were not fetched, their backups and manifest entries stay
+            return
+
         try:
+            body = data.encode("utf-8") if isinstance(data, str) else data
+            self.archive.append(file_path, body, format, url, payload)
+            self.manifest.record(file_path, status, content_hash(body))
+
+            self.logger.info(f"Backed up unit: {file_path}")
+        except Exception as e:
+            self.logger.error(f"Failed to backup unit: {e}")
+
+    def load_backup(self, file_path: str, format: str) -> bytes | None:
+        """
+        Load previously backed up data.
+
+        Units are read from the season archive, then from the backup files written
+        before the archive existed.
+
+        Args:
+            file_path (str): Path of the backup file (without extension).
+            format (str): Format of backup file ('html', 'json').
+
+        Returns:
+            bytes | None: Original response body, or None if unavailable.
+        """
+        body = self.archive.get(file_path)
+        if body is None:
             full_path = os.path.join(self.backup_path, f"{file_path}.{format}")
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if not os.path.exists(full_path):
+                return None
 
-            if format == "html":
-                with open(full_path, "w", encoding="utf-8") as f:
-                    f.write(data)
-            elif format == "json":
-                with open(full_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+            try:
+                with open(full_path, "rb") as f:
+                    body = f.read()
+            except OSError as e:
+                self.logger.error(f"Failed to load backup file: {e}")
+                return None
+
+        return body
+
+    def fetch_unit(
+        self, file_path: str, format: str, request: Callable
+    ) -> tuple[str | bytes | None, bool]:
+        """
+        Fetch a unit, or load it from its backup when the run mode allows skipping it.
+
+        Units loaded from their backups, and fetched units whose content hash matches
+        the hash recorded in the manifest, are added to `unchanged_units`. Fetched units
+        whose content changed are removed from it, as a scraper polling the same units
+        may have added them before.
+
+        Args:
+            file_path (str): Backup path of the unit (without extension).
+            format (str): Format of backup file ('html', 'json').
+            request (Callable): Function sending the request when the unit is fetched.
+                                Never called in 'replay' mode.
+
+        Returns:
+            tuple: (response, skipped). The response is None for skipped units without data.
+        """
+        if self.mode == "replay":
+            return self.load_backup(file_path, format), True
+
+        if self.manifest.should_skip(file_path, self.mode):
+            entry = self.manifest.get(file_path)
+            if entry[1] is None:
+                self.unchanged_units.add(file_path)
+                return None, True
+
+            response = self.load_backup(file_path, format)
+            if response is not None:
+                self.logger.info(f"Skipping fetched unit: {file_path}")
+                self.unchanged_units.add(file_path)
+                return response, True
+
+        response = request()
+        if response is not None:
+            entry = self.manifest.get(file_path)
+            body = response.encode("utf-8") if isinstance(response, str) else response
+            if (
+                entry
+                and entry[0] != FetchManifest.FAILED
+                and entry[1] == content_hash(body)
+            ):
+                self.logger.info(f"Unchanged unit: {file_path}")
+                self.unchanged_units.add(file_path)
             else:
-                self.logger.warning(f"Unsupported file format: {format}")
+                # Unchanged in an earlier poll, the new content must be backed up
+                self.unchanged_units.discard(file_path)
+        return response, False
 
-            self.logger.info(f"Backed up file: {full_path}")
-        except Exception as e:
-            self.logger.error(f"Failed to backup file: {e}")
+    def record_failure(self, file_path: str):
+        """Record a unit whose every fetch attempt failed, so later runs retry it."""
+        self.failed_units.append(file_path)
+        if self.mode != "replay":
+            self.manifest.record(file_path, FetchManifest.FAILED)
+
+    def record_empty(self, file_path: str, status: str = FetchManifest.FINAL):
+        """Record a unit that was fetched successfully but has no data."""
+        if self.mode == "replay":
+            return
+        entry = self.manifest.get(file_path)
+        if entry and entry[0] != FetchManifest.FAILED and entry[1] is None:
+            # The unit was already empty
+            self.unchanged_units.add(file_path)
+        self.manifest.record(file_path, status)
+
+    def record_unchanged(self, file_path: str, status: str):
+        """Update the status of an unchanged unit, whose backup is kept as it is."""
+        if self.mode == "replay":
+            return
+        entry = self.manifest.get(file_path)
+        if entry and entry[0] != status:
+            self.manifest.record(file_path, status, entry[1])
+
+    def output_exists(self, file_path: str) -> bool:
+        """
+        Check whether the output file of a previous run can be kept.
+
+        Dataset partitions are rewritten by season runs, so they are never kept.
+        """
+        if self.format == "dataset":
+            return False
+        return os.path.exists(
+            os.path.join(self.save_path, f"{file_path}.{self.format}")
+        )
 
     def save(self, data: list, file_path: str):
         """
         Save the processed data to a file.
 
+        Rows of known datasets are typed by the dataset's schema, so every file of a
+        dataset has the same column types.
+
         Args:
             data (list): Data to save.
             file_path (str): Path of the output file (without extension).
-            format (str): Format of output file ('parquet', 'json', 'csv').
+            format (str): Format of output file ('parquet', 'json', 'csv', 'dataset').
+                          'dataset' appends the rows to the partitioned Parquet dataset
+                          of the file under output/dataset instead.
         """
         if not isinstance(data, list):
             raise ValueError("Data must be a dictionary or a list of dictionaries.")
 
+        with get_metrics().time("save"):
+            self._save(data, file_path)
+
+    def _save(self, data: list, file_path: str):
+        metrics = get_metrics()
         try:
             full_path = os.path.join(self.save_path, f"{file_path}.{self.format}")
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.format != "dataset":
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
 
-            df = pd.DataFrame(data)
+            schema = get_schema(file_path)
+            if schema is not None:
+                table = schema.table(data)
+            else:
+                df = pd.DataFrame(data)
+                for column in df.select_dtypes(exclude=["number", "datetime"]).columns:
+                    df[column] = df[column].astype("string")
+                table = pa.Table.from_pandas(df, preserve_index=False)
 
-            for column in df.select_dtypes(exclude=["number", "datetime"]).columns:
-                df[column] = df[column].astype("string")
+            if self.format in ("json", "csv"):
+                df = table.to_pandas(types_mapper=_PANDAS_TYPES.get)
 
-            if self.format == "parquet":
-                df.to_parquet(full_path, engine="pyarrow", index=False)
+            if self.format == "dataset":
+                if self.dataset is None:
+                    self.dataset = DatasetWriter(
+                        self.dataset_path, overwrite=False, **get_dataset_options()
+                    )
+                self.dataset.write(
+                    file_path,
+                    table,
+                    self.series[0] if len(self.series) == 1 else None,
+                )
+                metrics.count("rows_written", table.num_rows)
+                self.logger.info(f"Queued {table.num_rows} rows of {file_path}")
+                return
+            elif self.format == "parquet":
+                pq.write_table(table, full_path)
             elif self.format == "json":
                 json_str = df.to_json(
                     orient="records", indent=4, force_ascii=False
@@ -107,7 +345,10 @@ class KBOBaseScraper(ABC):
                 df.to_csv(full_path, index=False, encoding="utf-8")
             else:
                 self.logger.warning(f"Unsupported file format: {self.format}")
+                return
 
+            metrics.count("rows_written", table.num_rows)
+            metrics.count("files_written")
             self.logger.info(f"Saved file: {full_path}")
         except Exception as e:
             self.logger.error(f"Failed to save file: {e}")
@@ -125,17 +366,100 @@ class KBOBaseScraper(ABC):
         start = year if year else int(date[:4]) if date else self.start_year
         end = year if year else int(date[:4]) if date else self.current_year
 
-        for season in range(start, end + 1):
-            fetch_data = self.fetch(season, date)
-            if fetch_data:
-                for filename, data in fetch_data.items():
+        if self.format == "dataset":
+            # A season run rewrites its partitions, a single date or target is appended
+            # and replaces what a previous run of the same date or target appended
+            parts = sorted(self.targets or []) + ([date] if date else [])
+            self.dataset = DatasetWriter(
+                self.dataset_path,
+                overwrite=not parts,
+                name="-".join(parts) or None,
+                **get_dataset_options(),
+            )
+
+        metrics = get_metrics()
+        kept = 0
+        try:
+            for season in range(start, end + 1):
+                # Units are saved as they complete, so memory does not grow with the season
+                saved = 0
+                for filename, data in self.fetch(season, date):
+                    saved += 1
+                    if data is None:
+                        # Built only from unchanged units, the existing file is kept
+                        self.logger.debug(f"Kept unchanged file: {filename}")
+                        kept += 1
+                        continue
                     self.save(data, filename)
-            else:
-                self.logger.warning(f"No data found for season {season}.")
-            if date:
-                break
+                if not saved:
+                    self.logger.warning(f"No data found for season {season}.")
+                if self.dataset is not None:
+                    # Rows of a season are complete, keep memory bounded over long runs
+                    with metrics.time("save"):
+                        self.dataset.flush()
+                if date:
+                    break
+        except BaseException:
+            if self.dataset is not None:
+                self.dataset.abort()
+                self.dataset = None
+            raise
+        finally:
+            # Backups of fetched units are kept even if the run fails
+            self.archive.flush()
+            get_tokens().close()
+
+        if self.dataset is not None:
+            with metrics.time("save"):
+                metrics.count("files_written", len(self.dataset.close()))
+            self.dataset = None
 
         end_time = time.time()
         self.logger.info(
             f"Scraping completed in {(end_time - start_time):.2f} seconds."
         )
+
+        metrics.count("units_failed", len(self.failed_units))
+        metrics.count("units_unchanged", len(self.unchanged_units))
+        metrics.count("files_kept", kept)
+        if self.failed_units:
+            self.logger.warning(
+                f"{len(self.failed_units)} units failed, rerun with --resume to retry them."
+            )
+            self.failed_units.clear()
+
+        if self.unchanged_units:
+            self.logger.info(
+                f"{len(self.unchanged_units)} units unchanged, "
+                f"{kept} files kept without being parsed and saved again."
+            )
+            self.unchanged_units.clear()
+
+        stats = get_pool().stats()
+        if stats["requests"]:
+            self.logger.info(
+                f"HTTP pool: {stats['requests']} requests over "
+                f"{stats['connections']} connections ({stats['reused']} reused)."
+            )
+
+        stats = get_tokens().stats()
+        if stats["initiated"] or stats["reused"]:
+            self.logger.info(
+                f"ASP.NET form tokens: {stats['initiated']} sessions initiated, "
+                f"{stats['reused']} postbacks with reused tokens."
+            )
+
+        stats = get_scheduler().stats()
+        if stats["retries"] or stats["trips"]:
+            self.logger.info(
+                f"Request scheduler: {stats['retries']} retries, "
+                f"{stats['trips']} circuit breaker trips, concurrency limit {stats['limit']}."
+            )
+
+        cache = get_cache()
+        if cache:
+            stats = cache.stats()
+            self.logger.info(
+                f"Response cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['evictions']} evictions."
+            )
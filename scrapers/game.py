@@ -1,18 +1,44 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import os
 import json
+import time
 
 from scrapers.base import KBOBaseScraper
-from utils.convert import convert_row_data
+from utils.convert import convert_table
+from utils.manifest import FetchManifest
 from utils.request import fetch_json
+from utils.season import SeasonCalendar
+
+
+def _valid_response(response):
+    return isinstance(response, dict) and int(response.get("code", 0)) == 100
+
+
+def _game_status(games):
+    for game in games:
+        finished = str(game.get("GAME_STATE_SC")) == "3"
+        canceled = str(game.get("CANCEL_SC_ID") or 0) != "0"
+        if not finished and not canceled:
+            return FetchManifest.PENDING
+    return FetchManifest.FINAL
 
 
 class GameScheduleScraper(KBOBaseScraper):
-    def __init__(self, format, series):
-        super().__init__(format, series)
+    def __init__(self, format, series, concurrency=1, mode=None):
+        super().__init__(format, series, concurrency, mode)
 
         self.url = "https://www.koreabaseball.com/ws/Main.asmx/GetKboGameList"
         self.payload = {"leId": "1", "srId": ",".join(map(str, self.series))}
 
+        self.calendar_margin = 7
+        self.calendar = SeasonCalendar(
+            os.path.join(self.backup_path, "game", "calendar.json"),
+            self.backup_path,
+            self.archive,
+        )
+
     def _parse(self, response):
         games = response.get("game", [])
         if not games:
@@ -24,54 +50,160 @@ class GameScheduleScraper(KBOBaseScraper):
 
         return headers, rows
 
-    def fetch(self, season, date):
-        start_date = (
-            datetime.strptime(date, "%Y%m%d") if date else datetime(season, 1, 1)
-        )
-        end_date = (
-            datetime.strptime(date, "%Y%m%d") if date else datetime(season, 12, 31)
-        )
-
-        result = {}
+    def fetch_date(self, season, date_str):
+        """
+        Fetch the schedule of a single day.
+
+        Args:
+            season (int): Target season year.
+            date_str (str): Target date in 'YYYYMMDD' format.
+
+        Returns:
+            tuple[str | None, list | None]: Output path and rows of the schedule, rows
+                                            being None if they were not parsed, or
+                                            (None, None) if the day has no games.
+        """
+        self.logger.info(f"Fetching schedule for date {date_str}...")
+        payload = {**self.payload, "date": date_str}
+        file_path = f"game/schedule/{season}/{date_str}"
+
+        try:
+            content, skipped = self.fetch_unit(
+                file_path,
+                "json",
+                lambda: fetch_json(
+                    self.url, payload, season, as_bytes=True, validate=_valid_response
+                ),
+            )
+            if skipped and content is None:
+                return None, None
+
+            if (
+                not self.keep_rows
+                and file_path in self.unchanged_units
+                and self.output_exists(file_path)
+            ):
+                return file_path, None
+
+            response = json.loads(content) if content else None
+
+            if not _valid_response(response):
+                self.logger.warning(f"No valid response for date {date_str}.")
+                return None, None
+
+            headers, rows = self.parse(response)
+            if not rows:
+                self.logger.info(f"No rows returned for date {date_str}.")
+                if not skipped:
+                    past = date_str < datetime.now().strftime("%Y%m%d")
+                    self.record_empty(
+                        file_path,
+                        FetchManifest.FINAL if past else FetchManifest.PENDING,
+                    )
+                return None, None
+
+            if not skipped:
+                status = _game_status(response.get("game", []))
+                if file_path in self.unchanged_units:
+                    # Rows kept for the scoreboards, the backup is kept as it is
+                    self.record_unchanged(file_path, status)
+                else:
+                    self.backup(content, file_path, "json", status, self.url, payload)
+
+            return file_path, convert_table(headers, rows)
+        except Exception as e:
+            self.logger.error(f"Error fetching schedule for date {date_str}: {e}")
+            self.record_failure(file_path)
+        return None, None
+
+    def _fetch_range(self, season, start_date, end_date):
+        dates = []
         while start_date <= end_date:
-            date_str = start_date.strftime("%Y%m%d")
+            dates.append(start_date.strftime("%Y%m%d"))
+            start_date += timedelta(days=1)
 
-            self.logger.info(f"Fetching schedule for date {date_str}...")
-            self.payload["date"] = date_str
+        for file_path, rows in self.map_concurrent(
+            lambda date_str: self.fetch_date(season, date_str), dates
+        ):
+            if file_path:
+                yield file_path, rows
 
-            try:
-                response = fetch_json(self.url, self.payload)
-                if not response or int(response.get("code", 0)) != 100:
-                    self.logger.warning(f"No valid response for date {date_str}.")
-                    continue
+    def fetch(self, season, date):
+        if date:
+            target_date = datetime.strptime(date, "%Y%m%d")
+            yield from self._fetch_range(season, target_date, target_date)
+            return
+
+        season_start, season_end = datetime(season, 1, 1), datetime(season, 12, 31)
+        one_day, margin = timedelta(days=1), timedelta(days=self.calendar_margin)
+
+        window = self.calendar.window(season, self.series) if self.calendar else None
+        if window is None:
+            start_date, end_date = season_start, season_end
+        else:
+            start_date = max(season_start, window[0] - margin)
+            end_date = min(season_end, window[1] + margin)
+            self.logger.info(
+                f"Probing season {season} from {start_date:%Y%m%d} to {end_date:%Y%m%d}."
+            )
+
+        # Series of each game day, the rows themselves are not kept
+        result = {}
 
-                headers, rows = self.parse(response)
-                if not rows:
-                    self.logger.info(f"No rows returned for date {date_str}.")
-                    continue
+        def probe(probe_start, probe_end):
+            for file_path, rows in self._fetch_range(season, probe_start, probe_end):
+                result[file_path] = {row.get("SR_ID") for row in rows or []}
+                yield file_path, rows
+
+        yield from probe(start_date, end_date)
+        if window is not None and not result:
+            self.logger.info(f"No games in known window, scanning season {season}.")
+            yield from probe(season_start, start_date - one_day)
+            yield from probe(end_date + one_day, season_end)
+            start_date, end_date = season_start, season_end
+
+        # Probe outward while games keep appearing near the edges of the window
+        while result and start_date > season_start:
+            if min(self._game_day(path) for path in result) >= start_date + margin:
+                break
+            probe_date = max(season_start, start_date - margin)
+            yield from probe(probe_date, start_date - one_day)
+            start_date = probe_date
 
-                file_path = f"game/schedule/{season}/{date_str}"
-                self.backup(response, file_path, "json")
+        while result and end_date < season_end:
+            if max(self._game_day(path) for path in result) <= end_date - margin:
+                break
+            probe_date = min(season_end, end_date + margin)
+            yield from probe(end_date + one_day, probe_date)
+            end_date = probe_date
 
-                for row in rows:
-                    result.setdefault(file_path, [])
-                    result[file_path].append(convert_row_data(headers, row))
-            except Exception as e:
-                self.logger.error(f"Error fetching schedule for date {date_str}: {e}")
-            finally:
-                start_date += timedelta(days=1)
+        if self.calendar:
+            for file_path, series_ids in result.items():
+                for series_id in series_ids:
+                    self.calendar.add(season, series_id, file_path[-8:])
+            self.calendar.save()
 
-        return result
+    @staticmethod
+    def _game_day(file_path):
+        return datetime.strptime(file_path[-8:], "%Y%m%d")
 
 
 class GameResultScraper(KBOBaseScraper):
-    def __init__(self, format, series):
-        super().__init__(format, series)
+    def __init__(self, format, series, concurrency=1, mode=None):
+        super().__init__(format, series, concurrency, mode)
 
         self.url = "https://www.koreabaseball.com/ws/Schedule.asmx/GetScoreBoardScroll"
         self.payload = {"leId": "1"}
 
-        self.games = GameScheduleScraper(format, series)
+        self.games = GameScheduleScraper(format, series, concurrency, mode)
+        self.games.keep_rows = True
+        self.games.unchanged_units = self.unchanged_units
+
+        # Schedule and scoreboard rows of the watched day, to detect changes
+        self.watch_date = None
+        self.watched_schedules = None
+        self.watched_results: dict[str, tuple[str, list]] = {}
+        self.final_games: set[str] = set()
 
     def _parse(self, response):
         maxInnings = response.get("maxInning", None)
@@ -100,40 +232,250 @@ class GameResultScraper(KBOBaseScraper):
 
         return headers, rows
 
+    def _fetch_game(self, season, schedule):
+        game_id = schedule.get("G_ID", None)
+        unit = f"game/result/{season}/{game_id}"
+        file_path = f"game/result/{season}/{game_id[:8]}"
+
+        self.logger.info(f"Fetching result for game id {game_id}...")
+        payload = {
+            **self.payload,
+            "srId": schedule.get("SR_ID", None),
+            "seasonId": schedule.get("SEASON_ID", None),
+            "gameId": game_id,
+        }
+
+        try:
+            content, skipped = self.fetch_unit(
+                unit,
+                "json",
+                lambda: fetch_json(
+                    self.url, payload, season, as_bytes=True, validate=_valid_response
+                ),
+            )
+            if content and unit in self.unchanged_units:
+                if not skipped:
+                    self.record_unchanged(unit, _game_status([schedule]))
+                # Parsed only if another game of the day changed
+                return file_path, lambda: self._convert(content)
+
+            response = json.loads(content) if content else None
+            if not _valid_response(response):
+                self.logger.warning(f"No valid response for game id {game_id}.")
+                return None, None
+
+            headers, rows = self.parse(response)
+            if not rows:
+                self.logger.info(f"No rows returned for game id {game_id}.")
+                return None, None
+
+            if not skipped:
+                self.backup(
+                    content,
+                    unit,
+                    "json",
+                    _game_status([schedule]),
+                    self.url,
+                    payload,
+                )
+
+            return file_path, convert_table(headers, rows)
+        except Exception as e:
+            self.logger.error(f"Error fetching result for game id {game_id}: {e}")
+            self.record_failure(unit)
+        return None, None
+
+    def load_backup(self, file_path, format):
+        """
+        Load a backed up scoreboard, falling back to the backup of its game day.
+
+        Backups written before scoreboards were backed up per game are named after the
+        game day, each holding the last scoreboard fetched that day. It is used if it
+        is the scoreboard of the requested game.
+        """
+        body = super().load_backup(file_path, format)
+        directory, game_id = file_path.rsplit("/", 1)
+        if body is not None or not directory.startswith("game/result/"):
+            return body
+
+        legacy = super().load_backup(f"{directory}/{game_id[:8]}", format)
+        try:
+            if legacy is not None and json.loads(legacy).get("G_ID") == game_id:
+                return legacy
+        except (ValueError, AttributeError):
+            self.logger.warning(f"Invalid legacy backup for game id {game_id}.")
+        return None
+
+    def _convert(self, content):
+        headers, rows = self.parse(json.loads(content))
+        return convert_table(headers, rows) if rows else []
+
+    def _merge(self, results):
+        merged = {}
+        for file_path, rows in results:
+            if file_path:
+                merged.setdefault(file_path, []).append(rows)
+
+        for file_path, parts in merged.items():
+            if all(callable(part) for part in parts) and self.output_exists(file_path):
+                yield file_path, None
+            else:
+                yield file_path, [
+                    row
+                    for part in parts
+                    for row in (part() if callable(part) else part)
+                ]
+
     def fetch(self, season, date):
-        result = {}
+        if self.concurrency <= 1:
+            for path, schedules in self.games.fetch(season, date):
+                yield path, self._unless_unchanged(path, schedules)
+                yield from self._merge(
+                    self._fetch_game(season, schedule) for schedule in schedules
+                )
+            return
+
+        # Pipelined: scoreboards are fetched while later dates are still scheduled, and
+        # the results of a game day are yielded once all of its games are done
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = deque()
+            for path, schedules in self.games.fetch(season, date):
+                yield path, self._unless_unchanged(path, schedules)
+                pending.append(
+                    [
+                        executor.submit(self._fetch_game, season, schedule)
+                        for schedule in schedules
+                    ]
+                )
+                while pending and all(future.done() for future in pending[0]):
+                    yield from self._merge(f.result() for f in pending.popleft())
+
+            while pending:
+                yield from self._merge(f.result() for f in pending.popleft())
+
+    def _unless_unchanged(self, file_path, rows):
+        if file_path in self.unchanged_units and self.output_exists(file_path):
+            return None
+        return rows
+
+    def poll(self, date_str):
+        """
+        Poll the games of a day once, saving the results only if they changed.
+
+        Scoreboards are requested only for games that were not final yet when they were
+        last polled, concurrently if `concurrency` > 1. In 'incremental' mode, final
+        games seen first are loaded from their backups.
+
+        Args:
+            date_str (str): Target date in 'YYYYMMDD' format.
+
+        Returns:
+            tuple[list, list]: Schedule rows of the day and IDs of the changed games.
+        """
+        if date_str != self.watch_date:
+            self.watch_date = date_str
+            self.watched_schedules = None
+            self.watched_results.clear()
+            self.final_games.clear()
+
+        season = int(date_str[:4])
+        schedule_path, schedules = self.games.fetch_date(season, date_str)
+        if schedule_path is None:
+            return [], []
+
+        if schedules != self.watched_schedules:
+            self.save(schedules, schedule_path)
+            self.watched_schedules = schedules
+
+        # A game fetched once it was final cannot change anymore
+        pending = [s for s in schedules if s.get("G_ID") not in self.final_games]
+        fetched = self.map_concurrent(
+            lambda schedule: self._fetch_game(season, schedule), pending
+        )
 
-        fetch_data = self.games.fetch(season, date)
-        for path, schedules in fetch_data.items():
-            self.save(schedules, path)
+        changed = []
+        for schedule, (file_path, rows) in zip(pending, fetched):
+            game_id = schedule.get("G_ID")
+            if callable(rows):
+                rows = rows()
+            if file_path and _game_status([schedule]) == FetchManifest.FINAL:
+                self.final_games.add(game_id)
+            if file_path and rows != self.watched_results.get(game_id, (None, None))[1]:
+                self.watched_results[game_id] = (file_path, rows)
+                changed.append(game_id)
+
+        if changed:
+            self.logger.info(f"Results changed for games: {', '.join(changed)}")
+            results = {}
             for schedule in schedules:
-                game_id = schedule.get("G_ID", None)
-
-                self.logger.info(f"Fetching result for game id {game_id}...")
-                self.payload["srId"] = schedule.get("SR_ID", None)
-                self.payload["seasonId"] = schedule.get("SEASON_ID", None)
-                self.payload["gameId"] = game_id
-
-                try:
-                    response = fetch_json(self.url, self.payload)
-                    if not response or int(response.get("code", 0)) != 100:
-                        self.logger.warning(f"No valid response for game id {game_id}.")
-                        continue
-
-                    headers, rows = self.parse(response)
-                    if not rows:
-                        self.logger.info(f"No rows returned for game id {game_id}.")
-                        continue
-
-                    file_path = f"game/result/{season}/{game_id[:8]}"
-                    self.backup(response, file_path, "json")
-
-                    for row in rows:
-                        result.setdefault(file_path, [])
-                        result[file_path].append(convert_row_data(headers, row))
-                except Exception as e:
-                    self.logger.error(
-                        f"Error fetching result for game id {game_id}: {e}"
-                    )
+                file_path, rows = self.watched_results.get(
+                    schedule.get("G_ID"), (None, [])
+                )
+                if file_path:
+                    results.setdefault(file_path, []).extend(rows)
+            for file_path, rows in results.items():
+                self.save(rows, file_path)
+
+        return schedules, changed
+
+    @staticmethod
+    def poll_interval(
+        schedules, changed, interval, min_interval, max_interval, now=None
+    ):
+        """
+        Return the seconds to wait before the next poll of a day.
+
+        Live games are polled every `min_interval` seconds while their score changes,
+        backing off up to four times as long while it does not. Before the first game
+        starts, the next poll is at its start time. Days without unfinished games are
+        polled every `max_interval` seconds.
+        """
+        now = now or datetime.now()
+        games = [
+            (schedule, str(schedule.get("GAME_STATE_SC")))
+            for schedule in schedules
+            if str(schedule.get("CANCEL_SC_ID") or 0) == "0"
+        ]
+
+        if any(state == "2" for _, state in games):
+            if changed:
+                return min_interval
+            return min(interval * 2, 4 * min_interval, max_interval)
 
-        return result
+        starts = []
+        for schedule, state in games:
+            if state == "3":
+                continue
+            try:
+                start = datetime.strptime(
+                    f"{now:%Y%m%d}{schedule.get('G_TM')}", "%Y%m%d%H:%M"
+                )
+            except (TypeError, ValueError):
+                return min_interval
+            starts.append((start - now).total_seconds())
+
+        if starts:
+            return max(min_interval, min(max_interval, min(starts)))
+        return max_interval
+
+    def watch(self, min_interval=30, max_interval=600, polls=None):
+        """
+        Poll today's games until interrupted (or for `polls` polls).
+
+        Args:
+            min_interval (float, Optional): Seconds between polls of live games.
+            max_interval (float, Optional): Seconds between polls without live games.
+            polls (int, Optional): Number of polls, unlimited if None.
+        """
+        interval, count = min_interval, 0
+        while polls is None or count < polls:
+            schedules, changed = self.poll(datetime.now().strftime("%Y%m%d"))
+            interval = self.poll_interval(
+                schedules, changed, interval, min_interval, max_interval
+            )
+            count += 1
+            self.archive.flush()
+
+            if polls is None or count < polls:
+                self.logger.info(f"Next poll in {interval:.0f} seconds.")
+                time.sleep(interval)
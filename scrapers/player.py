@@ -1,13 +1,18 @@
-import re
+import os
 
 from scrapers.base import KBOBaseScraper
-from utils.convert import convert_row_data
-from utils.request import initiate_session, fetch_html
+from utils.convert import convert_table
+from utils.extract import extract_links, extract_table
+from utils.manifest import FetchManifest
+from utils.request import fetch_postback
+from utils.roster import RosterCache
 
 
 class PlayerSeasonStatsScraper(KBOBaseScraper):
-    def __init__(self, format, series, player_type, detail=False):
-        super().__init__(format, series)
+    def __init__(
+        self, format, series, player_type, detail=False, concurrency=1, mode=None
+    ):
+        super().__init__(format, series, concurrency, mode)
 
         if player_type == "hitter":
             self.urls = [
@@ -34,7 +39,14 @@ class PlayerSeasonStatsScraper(KBOBaseScraper):
         if detail:
             self.urls = [self.urls[0]]
 
+        self.rosters = RosterCache(os.path.join(self.backup_path, "player"))
+
         self.player_type = player_type
+        self.season_field = (
+            "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlSeason$ddlSeason"
+        )
+        self.page_field = "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$hfPage"
+        # Pages are requested as partial postbacks of the udpContent panel
         self.payload = {
             "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$smData": "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$udpContent|ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$lbtnOrderBy",
             "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlSeries$ddlSeries": "0",
@@ -44,78 +56,153 @@ class PlayerSeasonStatsScraper(KBOBaseScraper):
         }
 
     def _parse(self, response):
-        thead_tr = response.select_one("thead tr")
-        if not thead_tr:
+        headers, rows = extract_table(response, player_id=True)
+        if headers is None:
             self.logger.warning("No header datas found in response.")
             return None, None
 
-        headers = ["P_ID"] + [th.get_text(strip=True) for th in thead_tr.find_all("th")]
-        rows = [
-            [re.search(r"playerId=(\d+)", tr.find("a")["href"]).group(1)]
-            + [td.get_text(strip=True) for td in tr.find_all("td")]
-            for tr in response.select("tbody tr")
-        ]
+        return ["P_ID"] + headers, rows
+
+    def _last_page(self, response, page_num):
+        links = extract_links(response, "paging")
+        if links is None:
+            # No pager found, probe the next page until an empty one appears
+            return page_num + 1
+
+        # The pager only lists the current block of pages, followed by next buttons
+        numbers = [int(link) for link in links if link.isdigit()]
+        if not numbers:
+            return page_num
+
+        last_page = max(numbers)
+        more = any(not link.isdigit() for link in links[links.index(str(last_page)) :])
+        if more and last_page <= page_num:
+            return page_num + 1
+        return last_page
+
+    def _fetch_page(self, season, i, page_num):
+        status = (
+            FetchManifest.FINAL if season < self.current_year else FetchManifest.PENDING
+        )
+        url = self.urls[i]
+        unit = f"player/{season}/{self.player_type}/season_summary_{i}_{page_num}"
+        payload = {
+            **self.payload,
+            self.season_field: str(season),
+            self.page_field: str(page_num),
+        }
 
-        return headers, rows
+        try:
+            content, skipped = self.fetch_unit(
+                unit,
+                "html",
+                lambda: fetch_postback(
+                    url, payload, season, [self.season_field], True, as_bytes=True
+                ),
+            )
+            if skipped and content is None:
+                self.logger.info(f"Last page reached at page {page_num}.")
+                return [], None
+
+            # Backups keep the original body, the page is decoded only to be parsed
+            response = content.decode("utf-8", errors="replace") if content else None
+            if response is None:
+                self.logger.warning(f"No valid response for page {page_num}.")
+                self.record_failure(unit)
+                return None, None
+
+            if unit in self.unchanged_units:
+                if not skipped:
+                    self.record_unchanged(unit, status)
+                # Parsed only if another page of the season changed
+                return lambda: self._page_rows(*self.parse(response)), self._last_page(
+                    response, page_num
+                )
+
+            headers, rows = self.parse(response)
+            if headers is None and rows is None:
+                self.logger.info(f"No rows returned for page {page_num}.")
+                return [], None
+
+            if headers and not rows:
+                self.logger.info(f"Last page reached at page {page_num}.")
+                if not skipped:
+                    self.record_empty(unit, status)
+                return [], None
+
+            if not skipped:
+                self.backup(content, unit, "html", status, url, payload)
+
+            return self._page_rows(headers, rows), self._last_page(response, page_num)
+        except Exception as e:
+            self.logger.error(
+                f"Error fetching {self.player_type} stats for {page_num}: {e}"
+            )
+            self.record_failure(unit)
+        return None, None
+
+    def _page_rows(self, headers, rows):
+        if not rows:
+            return []
+        return list(zip([row[0] for row in rows], convert_table(headers, rows)))
 
     def fetch(self, season, date):
+        self.logger.info(f"Fetching {self.player_type} stats for season {season}...")
+        failures = len(self.failed_units)
+
+        pages, last_pages, stopped = {}, {}, set()
+        tasks = [(i, 1) for i in range(len(self.urls))]
+        while tasks:
+            for (i, page_num), (rows, last_page) in zip(
+                tasks,
+                self.map_concurrent(
+                    lambda task: self._fetch_page(season, *task), tasks
+                ),
+            ):
+                pages[(i, page_num)] = rows or []
+                if not rows:
+                    stopped.add(i)
+                else:
+                    last_pages[i] = max(last_pages.get(i, 0), last_page)
+
+            tasks = [
+                (i, page_num)
+                for i, last_page in sorted(last_pages.items())
+                if i not in stopped
+                for page_num in range(1, last_page + 1)
+                if (i, page_num) not in pages
+            ]
+
+        file_path = f"player/{season}/{self.player_type}/season_summary"
+        units = [f"{file_path}_{i}_{page_num}" for i, page_num in pages]
+        if (
+            not self.keep_rows
+            and len(self.failed_units) == failures
+            and all(unit in self.unchanged_units for unit in units)
+            and self.output_exists(file_path)
+        ):
+            yield file_path, None
+            return
+
         result = {}
-        for i, url in enumerate(self.urls):
-            session, viewstate, eventvalidation = initiate_session(url)
-            if session is None:
-                self.logger.error(f"Could not initiate session for URL: {url}")
-                return
-
-            self.logger.info(
-                f"Fetching {self.player_type} stats for season {season}..."
-            )
-            self.payload["__VIEWSTATE"] = viewstate
-            self.payload["__EVENTVALIDATION"] = eventvalidation
-            self.payload[
-                "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlSeason$ddlSeason"
-            ] = str(season)
-
-            file_path = f"player/{season}/{self.player_type}/season_summary"
-            for page_num in range(1, 9999):
-                self.payload[
-                    "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$hfPage"
-                ] = str(page_num)
-
-                try:
-                    response = fetch_html(url, self.payload, session)
-                    if response is None:
-                        self.logger.warning(f"No valid response for page {page_num}.")
-                        continue
-
-                    headers, rows = self.parse(response)
-                    if headers is None and rows is None:
-                        self.logger.info(f"No rows returned for page {page_num}.")
-                        break
-
-                    if headers and not rows:
-                        self.logger.info(f"Last page reached at page {page_num}.")
-                        break
-
-                    self.backup(str(response), f"{file_path}_{i}_{page_num}", "html")
-
-                    for row in rows:
-                        result.setdefault(
-                            row[0], {"LE_ID": 1, "SR_ID": 0, "SEASON_ID": season}
-                        )
-                        result[row[0]].update(convert_row_data(headers, row))
-                except Exception as e:
-                    self.logger.error(
-                        f"Error fetching {self.player_type} stats for {page_num}: {e}"
-                    )
-
-            session.close()
-
-        return {file_path: list(result.values())}
+        for i, page_num in sorted(pages):
+            rows = pages[(i, page_num)]
+            for player_id, data in rows() if callable(rows) else rows:
+                result.setdefault(
+                    player_id, {"LE_ID": 1, "SR_ID": 0, "SEASON_ID": season}
+                )
+                result[player_id].update(data)
+
+        if len(self.failed_units) == failures:
+            self.rosters.put(season, self.series, self.player_type, result.values())
+        yield file_path, list(result.values())
 
 
 class PlayerDetailStatsScraper(KBOBaseScraper):
-    def __init__(self, format, series, player_type, record_type):
-        super().__init__(format, series)
+    def __init__(
+        self, format, series, player_type, record_type, concurrency=1, mode=None
+    ):
+        super().__init__(format, series, concurrency, mode)
 
         if player_type == "hitter":
             self.url = "https://www.koreabaseball.com/Record/Player/HitterDetail/{type}.aspx?playerId={id}"
@@ -128,86 +215,149 @@ class PlayerDetailStatsScraper(KBOBaseScraper):
             "__EVENTTARGET": "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlSeries"
         }
 
-        self.players = PlayerSeasonStatsScraper(format, series, player_type, True)
+        self.players = PlayerSeasonStatsScraper(
+            format, series, player_type, True, concurrency, mode
+        )
+        self.players.keep_rows = True
+        self.players.unchanged_units = self.unchanged_units
+        self.rosters = self.players.rosters
 
     def _parse(self, response):
-        thead_tr = response.select_one("thead tr")
-        if not thead_tr:
+        headers, rows = extract_table(response)
+        if headers is None:
             self.logger.warning("No header datas found in response.")
             return None, None
 
-        headers = [th.get_text(strip=True) for th in thead_tr.find_all("th")]
-        rows = [
-            [td.get_text(strip=True) for td in tr.find_all("td")]
-            for tr in response.select("tbody tr")
-        ]
         headers[0] = "MO" if self.record_type == "daily" else "SIT"
 
         return headers, rows
 
-    def fetch(self, season, date):
-        result = {}
+    def _fetch_player(self, season, player):
+        status = (
+            FetchManifest.FINAL if season < self.current_year else FetchManifest.PENDING
+        )
+        year_field = "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlYear"
+        series_field = "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlSeries"
+
+        player_id = player.get("P_ID", None)
+
+        url = self.url.format(id=player_id, type=self.record_type)
+        file_path = f"player/{season}/{self.player_type}/{player_id}/{self.record_type}"
+
+        self.logger.info(
+            f"Fetching {self.record_type} stats for player id {player_id}..."
+        )
+
+        parts, units = [], []
+        for series_id in self.series:
+            unit = f"{file_path}_{series_id}"
+            units.append(unit)
+            payload = {
+                **self.payload,
+                year_field: str(season),
+                series_field: str(series_id),
+            }
+            try:
+                content, skipped = self.fetch_unit(
+                    unit,
+                    "html",
+                    lambda: fetch_postback(
+                        url, payload, season, [year_field, series_field], as_bytes=True
+                    ),
+                )
+                if skipped and content is None:
+                    continue
 
-        fetch_data = self.players.fetch(season, date)
-        for player in fetch_data[f"player/{season}/{self.player_type}/season_summary"]:
-            player_id = player.get("P_ID", None)
+                response = (
+                    content.decode("utf-8", errors="replace") if content else None
+                )
+                if response is None:
+                    self.logger.warning(f"No valid response for series {series_id}.")
+                    self.record_failure(unit)
+                    continue
 
-            url = self.url.format(id=player_id, type=self.record_type)
-            session, viewstate, eventvalidation = initiate_session(url)
-            if session is None:
-                self.logger.error(f"Could not initiate session for URL: {url}")
-                return
+                if unit in self.unchanged_units:
+                    if not skipped:
+                        self.record_unchanged(unit, status)
+                    # Parsed only if another series of the player changed
+                    parts.append((series_id, response))
+                    continue
 
-            self.logger.info(
-                f"Fetching {self.record_type} stats for player id {player_id}..."
-            )
-            self.payload["__VIEWSTATE"] = viewstate
-            self.payload["__EVENTVALIDATION"] = eventvalidation
-            self.payload[
-                "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlYear"
-            ] = str(season)
-
-            player_data = []
-            file_path = (
-                f"player/{season}/{self.player_type}/{player_id}/{self.record_type}"
-            )
-            for series_id in self.series:
-                self.payload[
-                    "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlSeries"
-                ] = str(series_id)
-                try:
-                    response = fetch_html(url, self.payload, session)
-                    if response is None:
-                        self.logger.warning(
-                            f"No valid response for series {series_id}."
-                        )
-                        continue
-
-                    headers, rows = self.parse(response)
-                    if not rows or rows[0][0] == "기록이 없습니다.":
-                        self.logger.info(f"No rows returned for series {series_id}.")
-                        continue
-
-                    self.backup(str(response), f"{file_path}_{series_id}", "html")
-
-                    for row in rows:
-                        data = {
-                            "LE_ID": 1,
-                            "SR_ID": series_id,
-                            "SEASON_ID": season,
-                            "G_DT": f"{season}{row[0].replace('.', '')}",
-                            "P_ID": player_id,
-                        }
-                        data.update(convert_row_data(headers, row))
-                        player_data.append(data)
-
-                except Exception as e:
-                    self.logger.error(
-                        f"Error fetching {self.record_type} stats for series {series_id}: {e}"
-                    )
+                headers, rows = self.parse(response)
+                if not rows or rows[0][0] == "기록이 없습니다.":
+                    self.logger.info(f"No rows returned for series {series_id}.")
+                    if not skipped and rows:
+                        self.record_empty(unit, status)
                     continue
 
-                result.setdefault(file_path, player_data)
-                session.close()
+                if not skipped:
+                    self.backup(content, unit, "html", status, url, payload)
+
+                parts.append(
+                    self._player_rows(season, player_id, series_id, headers, rows)
+                )
+
+            except Exception as e:
+                self.logger.error(
+                    f"Error fetching {self.record_type} stats for series {series_id}: {e}"
+                )
+                self.record_failure(unit)
+
+        if all(unit in self.unchanged_units for unit in units) and self.output_exists(
+            file_path
+        ):
+            return file_path, None
+
+        player_data = []
+        for part in parts:
+            if isinstance(part, tuple):
+                series_id, response = part
+                headers, rows = self.parse(response)
+                part = self._player_rows(season, player_id, series_id, headers, rows)
+            player_data.extend(part)
+
+        return file_path, player_data
+
+    def _player_rows(self, season, player_id, series_id, headers, rows):
+        if not rows or rows[0][0] == "기록이 없습니다.":
+            return []
+
+        player_data = []
+        for row, row_data in zip(rows, convert_table(headers, rows)):
+            data = {
+                "LE_ID": 1,
+                "SR_ID": series_id,
+                "SEASON_ID": season,
+                "G_DT": f"{season}{row[0].replace('.', '')}",
+                "P_ID": player_id,
+            }
+            data.update(row_data)
+            player_data.append(data)
+        return player_data
+
+    def _roster(self, season, date):
+        return self.rosters.get(
+            season,
+            self.series,
+            self.player_type,
+            lambda: dict(self.players.fetch(season, date))[
+                f"player/{season}/{self.player_type}/season_summary"
+            ],
+        )
+
+    def split(self, season):
+        return [str(player["P_ID"]) for player in self._roster(season, None)]
 
-        return result
+    def fetch(self, season, date):
+        if self.targets is not None:
+            players = [{"P_ID": int(player_id)} for player_id in sorted(self.targets)]
+        else:
+            players = self._roster(season, date)
+
+        # Each worker thread posts back with its own ASP.NET session
+        for file_path, player_data in self.map_concurrent(
+            lambda player: self._fetch_player(season, player), players
+        ):
+            # None keeps the existing file, players without records have no file
+            if player_data is None or player_data:
+                yield file_path, player_data
@@ -1,5 +1,26 @@
+import os
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
 import pytest
 
+# Set before any test module imports the logger, so runs do not log into the repo
+os.environ.setdefault("KBO_LOG_DIR", tempfile.mkdtemp(prefix="kbo-logs-"))
+
+
+@pytest.fixture(autouse=True)
+def request_scheduler():
+    # A fresh scheduler per test, so circuits opened by one test do not fail the next
+    from utils.request import RequestScheduler, configure_scheduler
+
+    scheduler = RequestScheduler()
+    configure_scheduler(scheduler)
+    return scheduler
+
 
 @pytest.fixture
 def test_season():
@@ -17,3 +38,146 @@ def test_date():
 def test_game_id():
     # Game ID for Korean Series Game 6, where Samsung Lions defeated Nexen Heroes 4-2
     return "20141111SSWO0"
+
+
+def _scoreboard(game_id, score=1):
+    table = {
+        "rows": [{"row": [{"Text": "0"}] * 13}, {"row": [{"Text": str(score)}] * 13}]
+    }
+    return {
+        "code": "100",
+        "G_ID": game_id,
+        "G_DT": game_id[:8],
+        "table1": "[]",
+        "maxInning": 9,
+        "table2": json.dumps(table),
+        "table3": json.dumps({"rows": [{"row": []}, {"row": []}]}),
+    }
+
+
+def _record_page(form, pages=1, action=""):
+    page_field = next((k for k in form if k.endswith("$hfPage")), None)
+    page = int(form.get(page_field, 1))
+
+    rows = ""
+    if page <= pages:
+        rows = (
+            f'<tr><td><a href="/Player.aspx?playerId={62403 + page}">구자욱</a></td>'
+            "<td>1</td></tr>"
+        )
+
+    # Like the KBO pager, only the block of five pages around the current one is listed
+    pager = ""
+    if page_field:
+        block_start = (page - 1) // 5 * 5 + 1
+        pager = '<div class="paging">' + "".join(
+            f"<a>{n}</a>" for n in range(block_start, min(block_start + 5, pages + 1))
+        )
+        pager += "<a>다음</a></div>"
+
+    selects = "".join(
+        f'<select name="{k}"><option selected="selected" value="{v}">{v}</option></select>'
+        for k, v in form.items()
+        if "$ddl" in k
+    )
+    panel = (
+        f"{selects}<table><thead><tr><th>선수명</th><th>G</th></tr></thead>"
+        f"<tbody>{rows}</tbody></table>{pager}"
+    )
+    if form.get("__ASYNCPOST") == "true":
+        return panel
+    return f'<html><body><form method="post" action="{action}">{panel}</form></body></html>'
+
+
+def _delta(entries):
+    # ASP.NET AJAX partial postback response: 'length|type|id|content|' records
+    return "".join(
+        f"{len(content)}|{kind}|{name}|{content}|" for kind, name, content in entries
+    )
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Serves canned KBO web service responses with a simulated latency."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.requests.append((self.path, {}))
+        token = f"token{len(self.server.tokens)}"
+        self.server.tokens.add(token)
+
+        self._respond(
+            "text/html",
+            f'<input id="__VIEWSTATE" value="{token}"/>'
+            f'<input id="__EVENTVALIDATION" value="{token}"/>',
+        )
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        self.server.requests.append((self.path, form))
+        time.sleep(self.server.latency)
+
+        if ".aspx" in self.path:
+            if form.get("__VIEWSTATE") not in self.server.tokens:
+                # Rejected postbacks fall back to the default page
+                form = {k: "0" for k in form}
+            action = "." + self.path[self.path.rfind("/") :]
+            body = _record_page(form, self.server.pages, action.replace("&", "&amp;"))
+            content_type = "text/html"
+            if form.get("__ASYNCPOST") == "true":
+                token = f"token{len(self.server.tokens)}"
+                self.server.tokens.add(token)
+                body = _delta(
+                    [
+                        ("updatePanel", "cphContents_udpContent", body),
+                        ("hiddenField", "__VIEWSTATE", token),
+                        ("hiddenField", "__EVENTVALIDATION", token),
+                    ]
+                )
+                content_type = "text/plain"
+            self._respond(content_type, body)
+            return
+
+        if self.path.endswith("GetScoreBoardScroll"):
+            game_id = form["gameId"]
+            body = json.dumps(_scoreboard(game_id, self.server.scores.get(game_id, 1)))
+        else:
+            games = self.server.games.get(form.get("date"), [])
+            body = json.dumps({"code": "100", "game": games})
+
+        self._respond("application/json", body)
+
+    def _respond(self, content_type, body):
+        body = body.encode("utf-8")
+        self.server.responses[self.path] = body
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    # Local stand-in for koreabaseball.com, so scrapers can be tested offline
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.latency = 0.05
+    server.games = {}
+    server.scores = {}
+    server.requests = []
+    # Last response body per path
+    server.responses = {}
+    server.tokens = set()
+    server.pages = 1
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
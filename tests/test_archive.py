@@ -0,0 +1,91 @@
+import gzip
+import json
+
+from scrapers.game import GameScheduleScraper
+from utils.archive import BackupArchive
+from utils.manifest import content_hash
+
+
+def test_backup_archive(tmp_path):
+    """
+    Test the append-only backup archive.
+
+    This test checks:
+    1. Bodies are returned byte for byte, before and after the writer thread stored them.
+    2. Records are found by unit and by request, ignoring volatile form tokens.
+    3. Every season is one gzip file holding WARC-like records, and rewrites are appended.
+    """
+    archive = BackupArchive(str(tmp_path))
+    body = '{"game": [{"G_ID": "20141111SSWO0"}],  "code": "100"}'.encode("utf-8")
+    url = "https://www.koreabaseball.com/ws/Main.asmx/GetKboGameList"
+
+    archive.append("game/schedule/2014/20141111", body, "json", url, {"date": 1111})
+    assert archive.get("game/schedule/2014/20141111") == body
+    archive.append("player/2014/hitter/62404/daily_0", "<table>".encode(), "html")
+    archive.append("game/schedule/2015/20150328", b"{}", "json")
+    archive.close()
+
+    archive = BackupArchive(str(tmp_path))
+    assert archive.get("game/schedule/2014/20141111") == body
+    assert archive.get("game/schedule/2014/20141110") is None
+    assert archive.find(url, {"date": 1111, "__VIEWSTATE": "x"}) == body
+    assert archive.units("game/schedule/") == [
+        "game/schedule/2014/20141111",
+        "game/schedule/2015/20150328",
+    ]
+
+    archive.append("game/schedule/2014/20141111", b"{}", "json")
+    archive.flush()
+    assert archive.get("game/schedule/2014/20141111") == b"{}"
+    archive.close()
+
+    assert sorted(p.name for p in tmp_path.glob("*.warc.gz")) == [
+        "2014.warc.gz",
+        "2015.warc.gz",
+    ]
+    records = gzip.decompress((tmp_path / "2014.warc.gz").read_bytes())
+    assert records.count(b"WARC/1.1\r\n") == 3
+    assert b"KBO-Unit: game/schedule/2014/20141111\r\n" in records
+    assert body in records
+
+
+def test_legacy_backup(tmp_path, monkeypatch):
+    """
+    Test that backup files written before the archive are still loaded.
+    """
+    monkeypatch.chdir(tmp_path)
+    legacy = tmp_path / "output" / "raw" / "game" / "schedule" / "2013"
+    legacy.mkdir(parents=True)
+    with open(legacy / "20130330.json", "w", encoding="utf-8") as f:
+        json.dump({"game": [{"SR_ID": 0}], "code": "100"}, f, indent=2)
+
+    scraper = GameScheduleScraper("json", [0])
+    scraper.backup(b'{"game": [{"SR_ID": 0}]}', "game/schedule/2014/20140329", "json")
+    scraper.archive.flush()
+
+    assert json.loads(scraper.load_backup("game/schedule/2013/20130330", "json"))
+    assert scraper.load_backup("game/schedule/2014/20140329", "json") == (
+        b'{"game": [{"SR_ID": 0}]}'
+    )
+    assert not (tmp_path / "output" / "raw" / "game" / "schedule" / "2014").exists()
+
+    scraper.calendar.windows = {}
+    scraper.calendar.build()
+    assert scraper.calendar.windows == {
+        "2013": {"0": ["20130330", "20130330"]},
+        "2014": {"0": ["20140329", "20140329"]},
+    }
+
+
+def test_content_hash():
+    """
+    Test that content hashes ignore the form tokens changing with every response.
+    """
+    page = '<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{}" />'
+    page += "<table><tr><td>{}</td></tr></table>"
+    assert content_hash(page.format("a", 1).encode()) == content_hash(
+        page.format("b", 1).encode()
+    )
+    assert content_hash(page.format("a", 1).encode()) != content_hash(
+        page.format("a", 2).encode()
+    )
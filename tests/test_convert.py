@@ -0,0 +1,38 @@
+from utils.convert import convert_row_data, convert_table
+
+
+def test_convert_table():
+    """
+    Test that converting a whole table matches converting it row by row.
+
+    This test checks:
+    1. Integers, thousands, fractions, floats and empty values keep their types.
+    2. Skipped columns are dropped and duplicate keys keep the last value.
+    3. Short rows and non-string values are handled like convert_row_data.
+    """
+    headers = ["순위", "선수명", "이닝", "관중수", "AVG", "G", "비고", "AVG"]
+    rows = [
+        ["1", "구자욱", "1 1/3", "12,345", "0.333", "12", "-", "0.350"],
+        ["2", "양현종", "2/3", "1,2,3", ".5", "007", "&nbsp;", "-1"],
+        ["3", "김광현", "0/3", "1,", "1e5", " 3 ", "", "inf"],
+        ["4", "최정", "5 2/3x"],
+        [5, None, 2.5, "0"],
+        [],
+    ]
+
+    converted = convert_table(headers, rows)
+    expected = [convert_row_data(headers, row) for row in rows]
+
+    assert converted == expected
+    assert [[type(v) for v in row.values()] for row in converted] == [
+        [type(v) for v in row.values()] for row in expected
+    ]
+    assert converted[1] == {
+        "P_NM": "양현종",
+        "IP": 0.67,
+        "S_CNT": 123,
+        "AVG": -1.0,
+        "G": 7,
+        "비고": None,
+    }
+    assert convert_table(["순위"], [["1"]]) == [{}]
@@ -0,0 +1,160 @@
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from run import compact
+from scrapers.game import GameScheduleScraper
+from utils.dataset import DatasetWriter, dataset_name
+from utils.schema import _SCHEMAS, get_schema
+
+
+def _schedule(day, series_id=0, **columns):
+    rows = [
+        {"SR_ID": series_id, "SEASON_ID": 2014, "G_ID": f"2014{day}HHSS{i}", **columns}
+        for i in range(2)
+    ]
+    return get_schema(f"game/schedule/2014/2014{day}").table(rows)
+
+
+def test_dataset_writer(tmp_path):
+    """
+    Test the partitioned Parquet dataset writer.
+
+    This test checks:
+    1. Rows are partitioned by season and series, one file per partition.
+    2. Tables with extra columns are merged into the partition schema.
+    3. Rerunning a season replaces its partition, and aborted runs change nothing.
+    4. Rerunning an appending writer of the same name replaces its earlier files.
+    """
+    assert dataset_name("player/2014/hitter/62404/daily") == "player/hitter/daily"
+
+    writer = DatasetWriter(str(tmp_path), row_group_size=3, dictionary_columns=["S_NM"])
+    writer.write("game/schedule/2014/20140329", _schedule("0329"))
+    writer.write("game/schedule/2014/20140330", _schedule("0330", S_NM="대구"))
+    writer.write("game/schedule/2014/20141111", _schedule("1111", series_id=7))
+
+    # Nothing is visible before the writer is closed
+    assert not list(tmp_path.rglob("part-*.parquet"))
+    writer.close()
+
+    partition = tmp_path / "game" / "schedule" / "season=2014" / "series=0"
+    files = list(partition.glob("*.parquet"))
+    assert len(files) == 1
+    assert pq.read_table(files[0]).column("S_NM").to_pylist() == [
+        None,
+        None,
+        "대구",
+        "대구",
+    ]
+
+    dataset = ds.dataset(tmp_path / "game" / "schedule", partitioning="hive")
+    assert dataset.count_rows() == 6
+    assert dataset.count_rows(filter=ds.field("series") == 7) == 2
+
+    writer = DatasetWriter(str(tmp_path))
+    writer.write("game/schedule/2014/20140329", _schedule("0329"))
+    writer.close()
+
+    assert ds.dataset(partition).count_rows() == 2
+
+    writer = DatasetWriter(str(tmp_path))
+    writer.write("game/schedule/2014/20140329", _schedule("0329"))
+    writer.flush()
+    writer.abort()
+
+    assert len(list(partition.iterdir())) == 1
+    assert ds.dataset(partition).count_rows() == 2
+
+    for _ in range(2):
+        writer = DatasetWriter(str(tmp_path), overwrite=False, name="20140330")
+        writer.write("game/schedule/2014/20140330", _schedule("0330"))
+        writer.close()
+
+    assert len(list(partition.iterdir())) == 2
+    assert ds.dataset(partition).count_rows() == 4
+
+
+def test_compact(tmp_path, monkeypatch):
+    """
+    Test that processed output files are compacted into sorted per-season datasets.
+
+    This test checks:
+    1. Files of every format are merged once per output, preferring Parquet.
+    2. Rows are typed by the schema and sorted by game and player, including the
+       integer columns of CSV files with missing values.
+    """
+    monkeypatch.chdir(tmp_path)
+    scraper = GameScheduleScraper("csv", [0])
+    for day, format in [("0330", "csv"), ("0329", "json"), ("0401", "parquet")]:
+        scraper.format = format
+        scraper.save(
+            [
+                {"SR_ID": 0, "SEASON_ID": 2014, "G_ID": f"2014{day}{teams}0"}
+                for teams in ["SSWO", "HHSK"]
+            ],
+            f"game/schedule/2014/2014{day}",
+        )
+    scraper.format = "csv"
+    scraper.save(
+        [
+            {
+                "SR_ID": 0,
+                "G_ID": "20140402SSWO0",
+                "T_PIT_P_ID": 76715,
+                "CROWD_CN": 12000,
+            },
+            {"SR_ID": 0, "G_ID": "20140402HHSK0", "T_PIT_P_ID": None, "CROWD_CN": None},
+        ],
+        "game/schedule/2014/20140402",
+    )
+    scraper.format = "json"
+    scraper.save([{"SR_ID": 0, "G_ID": "20140401HHSK0"}], "game/schedule/2014/20140401")
+    for player_id in [76232, 62404]:
+        scraper.save(
+            [{"SR_ID": 0, "SEASON_ID": 2014, "P_ID": player_id, "G_DT": "20140329"}],
+            f"player/2014/hitter/{player_id}/daily",
+        )
+
+    compact(workers=2)
+
+    dataset = tmp_path / "output" / "dataset"
+    schedule = pq.read_table(dataset / "game" / "schedule" / "season=2014" / "series=0")
+    assert schedule.column("G_ID").to_pylist() == sorted(
+        f"2014{day}{teams}0"
+        for day in ["0329", "0330", "0401", "0402"]
+        for teams in ["SSWO", "HHSK"]
+    )
+    assert schedule.schema.field("SEASON_ID").type == pa.int64()
+    # Integers with missing values read from CSV are not turned into floats
+    assert schedule.column("T_PIT_P_ID").to_pylist()[-2:] == [None, 76715]
+    assert schedule.column("CROWD_CN").to_pylist()[-2:] == [None, 12000]
+
+    daily = pq.read_table(dataset / "player" / "hitter" / "daily")
+    assert daily.column("P_ID").to_pylist() == [62404, 76232]
+
+
+def test_shared_column_types():
+    """
+    Test that a column has the same type in every dataset it belongs to.
+    """
+    types = {}
+    for schema in _SCHEMAS.values():
+        for field in schema.schema:
+            types.setdefault(field.name, {})[schema.name] = field.type
+    assert {
+        column: datasets
+        for column, datasets in types.items()
+        if len(set(datasets.values())) > 1
+    } == {}
+
+    # Scoreboard columns the schedule also has are typed like in the schedule
+    schedule, result = _SCHEMAS["schedule"], _SCHEMAS["result"]
+    for column in [
+        "T_SCORE_CN",
+        "CROWD_CN",
+        "H_W_CN",
+        "A_D_CN",
+        "STRIKE_CN",
+        "T_RANK_NO",
+    ]:
+        assert result.type(column) == schedule.type(column) == pa.int64()
@@ -0,0 +1,77 @@
+from bs4 import BeautifulSoup
+
+from utils.extract import extract_links, extract_selected, extract_table
+
+PAGE = """
+<html><body>
+<div class="select">
+  <select name="ddlSeason"><option value="2013">2013</option>
+  <option selected="selected" value="2014">2014</option></select>
+</div>
+<table class="tData">
+  <thead><tr><th>3월</th><th title="타율">AVG</th><th><span>G</span></th></tr></thead>
+  <tbody>
+    <tr><td>03.29</td><td> 0.333 </td><td><!-- note -->1&nbsp;</td></tr>
+    <tr><td>03.30</td><td>-</td><td>
+      <span>2</span></td></tr>
+  </tbody>
+</table>
+<table class="tData">
+  <thead><tr><th>4월</th><th>AVG</th><th>G</th></tr></thead>
+  <tbody><tr><td>04.01</td><td>0.250</td><td>3</td></tr></tbody>
+  <tfoot><tr><td>합계</td><td>0.300</td><td>6</td></tr></tfoot>
+</table>
+<div class="paging"><a>1</a><a class="on">2</a><a>다음</a></div>
+</body></html>
+"""
+
+LEADERBOARD = """
+<table><thead><tr><th>순위</th><th>선수명</th></tr></thead><tbody>
+<tr><td>1</td><td><a href="/Record/Player/HitterDetail/Basic.aspx?playerId=62404">구자욱</a></td></tr>
+<tr><td>2</td><td><a href="/Record/Player/PitcherDetail/Basic.aspx?playerId=76232">양현종</a></td></tr>
+</tbody></table>
+"""
+
+
+def _extract_table_bs4(html_text, player_id=False):
+    soup = BeautifulSoup(html_text, "lxml")
+    thead_tr = soup.select_one("thead tr")
+    headers = [th.get_text(strip=True) for th in thead_tr.find_all("th")]
+    rows = []
+    for tr in soup.select("tbody tr"):
+        row = [td.get_text(strip=True) for td in tr.find_all("td")]
+        if player_id:
+            row.insert(0, tr.find("a")["href"].split("playerId=")[1])
+        rows.append(row)
+    return headers, rows
+
+
+def test_extract_table():
+    """
+    Test that the lxml extractor returns the same headers and rows as BeautifulSoup.
+
+    This test checks:
+    1. Cell text is stripped and joined like get_text(strip=True).
+    2. Body rows of every record table are returned, footers are not.
+    3. Player IDs are read from the row links.
+    """
+    headers, rows = extract_table(PAGE)
+    assert (headers, rows) == _extract_table_bs4(PAGE)
+    assert rows[0] == ["03.29", "0.333", "1"]
+    assert len(rows) == 3
+
+    headers, rows = extract_table(LEADERBOARD, player_id=True)
+    assert (headers, rows) == _extract_table_bs4(LEADERBOARD, player_id=True)
+    assert [row[0] for row in rows] == ["62404", "76232"]
+
+    assert extract_table("<html><body>기록이 없습니다.</body></html>") == (None, None)
+
+
+def test_extract_form_fields():
+    """
+    Test the extraction of dropdown selections and pager links.
+    """
+    assert extract_selected(PAGE, "ddlSeason") == "2014"
+    assert extract_selected(PAGE, "ddlSeries") is None
+    assert extract_links(PAGE, "paging") == ["1", "2", "다음"]
+    assert extract_links(LEADERBOARD, "paging") is None
@@ -0,0 +1,84 @@
+import json
+
+from run import replay
+from scrapers.game import GameResultScraper
+from utils.metrics import RunMetrics, get_metrics
+
+
+def test_run_metrics(tmp_path):
+    """
+    Test the run report and Prometheus textfile of the run metrics.
+
+    This test checks:
+    1. Request latencies are counted in cumulative histogram buckets per endpoint.
+    2. Snapshots of worker processes are merged into the run metrics.
+    3. The JSON report and the textfile are written under the output directory.
+    """
+    metrics = RunMetrics()
+    metrics.observe_request("/ws/Main.asmx/GetKboGameList", 0.07, 100)
+    metrics.observe_request("/ws/Main.asmx/GetKboGameList", 3.0, 200)
+    metrics.observe_failure("/ws/Main.asmx/GetKboGameList", True)
+    with metrics.time("parse"):
+        pass
+    metrics.count("rows_written", 10)
+
+    worker = RunMetrics()
+    worker.observe_request("/ws/Main.asmx/GetKboGameList", 0.2, 300)
+    worker.count("rows_written", 5)
+    metrics.merge(worker.snapshot())
+
+    report = metrics.report("schedule")
+    requests = report["requests"]["/ws/Main.asmx/GetKboGameList"]
+    assert requests["count"] == 3 and requests["bytes"] == 600
+    assert requests["failures"] == 1 and requests["retries"] == 1
+    assert requests["latency_buckets"]["0.05"] == 0
+    assert requests["latency_buckets"]["0.1"] == 1
+    assert requests["latency_buckets"]["0.25"] == 2
+    assert requests["latency_buckets"]["+Inf"] == 3
+    assert report["stages"]["parse"]["calls"] == 1
+    assert report["counters"] == {"rows_written": 15}
+
+    report_path, prom_path = metrics.write(str(tmp_path), "schedule")
+    assert json.loads(open(report_path).read())["counters"] == {"rows_written": 15}
+    textfile = open(prom_path).read()
+    assert (
+        'kbo_request_duration_seconds_bucket{command="schedule",'
+        'endpoint="/ws/Main.asmx/GetKboGameList",le="+Inf"} 3' in textfile
+    )
+    assert 'kbo_rows_written_total{command="schedule"} 15' in textfile
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_scraper_metrics(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that scraper runs record every stage and the size of the response bodies,
+    including runs in worker processes.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    stub_server.games = {
+        "20141111": [{"G_ID": "20141111SSWO0", "SR_ID": "7", "GAME_STATE_SC": "3"}],
+    }
+
+    metrics = get_metrics()
+    metrics.reset()
+    scraper = GameResultScraper("json", [7])
+    scraper.url = f"{stub_server.url}/ws/Schedule.asmx/GetScoreBoardScroll"
+    scraper.games.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+    scraper.run(test_season)
+
+    report = metrics.report()
+    assert report["requests"]["/ws/Main.asmx/GetKboGameList"]["count"] == 365
+    assert report["requests"]["/ws/Schedule.asmx/GetScoreBoardScroll"]["count"] == 1
+    assert report["requests"]["/ws/Schedule.asmx/GetScoreBoardScroll"]["bytes"] == len(
+        stub_server.responses["/ws/Schedule.asmx/GetScoreBoardScroll"]
+    )
+    assert set(report["stages"]) == {"parse", "convert", "save"}
+    assert report["counters"]["files_written"] == 2
+    assert report["counters"]["rows_written"] == 3
+
+    metrics.reset()
+    replay(["game"], test_season, "json", [7], workers=2)
+    report = metrics.report()
+    assert report["requests"] == {}
+    assert report["counters"]["files_written"] == 2
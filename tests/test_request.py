@@ -0,0 +1,296 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scrapers.game import GameScheduleScraper
+import pytest
+
+import utils.request
+
+from utils.extract import extract_selected, extract_table
+from utils.request import (
+    CircuitOpenError,
+    RequestScheduler,
+    ResponseCache,
+    TokenManager,
+    configure_cache,
+    configure_pool,
+    fetch_json,
+    fetch_postback,
+    get_pool,
+    parse_delta,
+)
+
+
+def test_response_cache(tmp_path, test_season):
+    """
+    Test the response cache keys, TTLs and counters.
+
+    This test checks:
+    1. Requests differing only by volatile ASP.NET tokens share the same entry.
+    2. Past seasons never expire while current season entries follow the endpoint TTL.
+    3. Hits and misses are counted.
+    """
+    cache = ResponseCache(str(tmp_path), ttls={"GetKboGameList": 0})
+    url = "https://www.koreabaseball.com/ws/Main.asmx/GetKboGameList"
+
+    assert cache.get(url, {"date": "20141111", "__VIEWSTATE": "a"}) is None
+    cache.set(url, {"date": "20141111", "__VIEWSTATE": "a"}, b"{}", None)
+    assert cache.get(url, {"date": "20141111", "__VIEWSTATE": "b"}) == b"{}"
+    assert cache.get(url, {"date": "20141112"}) is None
+
+    assert cache.ttl(url, test_season) is None
+    cache.set(url, {"date": "today"}, b"[]", cache.ttl(url, 9999))
+    assert cache.get(url, {"date": "today"}) is None
+
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 0}
+
+
+def test_response_cache_eviction(tmp_path):
+    """
+    Test that the response cache evicts the least recently used entries over its size limit.
+    """
+    cache = ResponseCache(str(tmp_path), max_bytes=10)
+    url = "https://www.koreabaseball.com/ws/Schedule.asmx/GetScoreBoardScroll"
+
+    cache.set(url, {"gameId": "1"}, b"aaaa", None)
+    cache.set(url, {"gameId": "2"}, b"bbbb", None)
+    assert cache.get(url, {"gameId": "1"}) == b"aaaa"
+    cache.set(url, {"gameId": "3"}, b"cccc", None)
+
+    assert cache.get(url, {"gameId": "1"}) == b"aaaa"
+    assert cache.get(url, {"gameId": "2"}) is None
+    assert cache.get(url, {"gameId": "3"}) == b"cccc"
+    assert cache.evictions == 1
+
+
+def test_response_cache_validation(stub_server, tmp_path, test_season):
+    """
+    Test that only responses accepted by the caller are cached.
+    """
+    cache = ResponseCache(str(tmp_path))
+    configure_cache(cache)
+    url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+    try:
+        fetch_json(url, {"date": "20141111"}, test_season)
+        fetch_json(url, {"date": "20141112"}, test_season, validate=lambda r: False)
+        fetch_json(url, {"date": "20141113"}, test_season, validate=lambda r: True)
+    finally:
+        configure_cache(None)
+
+    assert not cache.contains(url, {"date": "20141111"})
+    assert not cache.contains(url, {"date": "20141112"})
+    assert cache.contains(url, {"date": "20141113"})
+    assert cache.total == len(cache.get(url, {"date": "20141113"}))
+
+
+def test_session_pool(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that concurrent JSON requests reuse pooled keep-alive connections.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    configure_pool(4)
+
+    scraper = GameScheduleScraper(None, [0], 4)
+    scraper.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+    list(scraper.fetch(test_season, None))
+
+    stats = get_pool().stats()
+    configure_pool(1)
+
+    assert stats["requests"] == 365
+    assert stats["connections"] <= 4
+    assert stats["reused"] == stats["requests"] - stats["connections"]
+
+
+def test_request_scheduler():
+    """
+    Test retries, adaptive concurrency and the circuit breaker of the request scheduler.
+
+    This test checks:
+    1. A transient failure is retried and halves the concurrency limit.
+    2. Consecutive failures open the endpoint's circuit, and the next request waits out
+       the cooldown and closes it again as a successful trial.
+    3. Requests waiting for a failing trial fail with the circuit open.
+    4. Other endpoints are not affected by an open circuit.
+    """
+    scheduler = RequestScheduler(
+        max_concurrency=8,
+        max_retries=2,
+        base_delay=0,
+        failure_threshold=3,
+        reset_timeout=0.2,
+    )
+    url = "https://www.koreabaseball.com/ws/Main.asmx/GetKboGameList"
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("HTTP request failed")
+        return "ok"
+
+    assert scheduler.call(url, flaky) == "ok"
+    assert scheduler.stats() == {"limit": 4, "retries": 1, "trips": 0}
+
+    def broken():
+        attempts.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("HTTP request failed")
+
+    attempts.clear()
+    with pytest.raises(RuntimeError):
+        scheduler.call(url, broken)
+    assert len(attempts) == 3
+
+    start_time = time.time()
+    assert scheduler.call(url, lambda: "ok") == "ok"
+    assert time.time() - start_time >= 0.2
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            scheduler.call(url, broken, retries=0)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        trial = executor.submit(scheduler.call, url, broken)
+        time.sleep(0.25)
+        waiting = executor.submit(scheduler.call, url, broken)
+        with pytest.raises(RuntimeError):
+            trial.result()
+        with pytest.raises(CircuitOpenError):
+            waiting.result()
+
+    assert len(attempts) == 7
+    assert scheduler.stats()["trips"] == 3
+    assert scheduler.call(url.replace("Main", "Schedule"), lambda: "ok") == "ok"
+
+
+def test_request_budget():
+    """
+    Test that schedulers sharing a request budget never exceed it together.
+    """
+    budget = threading.BoundedSemaphore(3)
+    schedulers = [RequestScheduler(max_concurrency=4, budget=budget) for _ in range(2)]
+    url = "https://www.koreabaseball.com/ws/Main.asmx/GetKboGameList"
+    lock, in_flight, peak = threading.Lock(), [0], [0]
+
+    def request():
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        return "ok"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda i: schedulers[i % 2].call(url, request), range(32))
+        )
+
+    assert results == ["ok"] * 32
+    assert peak[0] == 3
+
+
+def test_postback_token_reuse(stub_server, monkeypatch):
+    """
+    Test that ASP.NET form tokens are reused across pages of the same template.
+
+    This test checks:
+    1. Postbacks for other players and seasons reuse the tokens of the first page.
+    2. Tokens rejected by the server are refreshed once and the postback succeeds.
+    3. Closing the token manager closes its sessions.
+    """
+    monkeypatch.setattr(utils.request, "_tokens", TokenManager())
+    stub_server.latency = 0
+    url = f"{stub_server.url}/Record/Player/HitterDetail/Daily.aspx?playerId={{}}"
+    field = "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlYear"
+
+    for player_id, season in [(62404, 2014), (76232, 2014), (62404, 2015)]:
+        response = fetch_postback(url.format(player_id), {field: season}, 2014, [field])
+        assert extract_selected(response, field) == str(season)
+
+    assert utils.request.get_tokens().stats() == {"initiated": 1, "reused": 2}
+
+    stub_server.tokens.clear()
+    response = fetch_postback(url.format(62404), {field: 2016}, 2016, [field])
+
+    assert extract_selected(response, field) == "2016"
+    assert [path for path, _ in stub_server.requests].count(
+        "/Record/Player/HitterDetail/Daily.aspx?playerId=62404"
+    ) == 6
+
+    tokens = utils.request.get_tokens()
+    assert len(tokens.sessions) == 1
+    tokens.close()
+    assert not tokens.sessions and not tokens.entries
+
+
+def test_postback_cache(stub_server, monkeypatch, tmp_path):
+    """
+    Test that postback responses are cached only once accepted.
+
+    This test checks:
+    1. Default pages returned for rejected tokens are not cached.
+    2. Cached pages of the default selection or of another player are dropped and
+       fetched again.
+    """
+    monkeypatch.setattr(utils.request, "_tokens", TokenManager())
+    cache = ResponseCache(str(tmp_path))
+    configure_cache(cache)
+    stub_server.latency = 0
+    url = f"{stub_server.url}/Record/Player/HitterDetail/Daily.aspx?playerId={{}}"
+    field = "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlYear"
+
+    try:
+        fetch_postback(url.format(62404), {field: 2014}, 2014, [field])
+        stub_server.tokens.clear()
+        fetch_postback(url.format(62404), {field: 2015}, 2015, [field])
+
+        cached = cache.get(url.format(62404), {field: 2015}).decode("utf-8")
+        assert extract_selected(cached, field) == "2015"
+
+        cache.set(url.format(76232), {field: 2014}, cached.encode("utf-8"), None)
+        stub_server.requests.clear()
+        response = fetch_postback(url.format(76232), {field: 2014}, 2014, [field])
+    finally:
+        configure_cache(None)
+
+    assert 'action="./Daily.aspx?playerId=76232"' in response
+    assert extract_selected(response, field) == "2014"
+    assert len(stub_server.requests) == 1
+
+
+def test_postback_delta(monkeypatch, stub_server):
+    """
+    Test asynchronous UpdatePanel postbacks.
+
+    This test checks:
+    1. Delta responses are split into their records, full pages are not.
+    2. Only the panel HTML is returned.
+    3. The refreshed form tokens of the response replace the stored ones.
+    """
+    assert parse_delta("5|updatePanel|udp|a|b|c|2|hiddenField|__VIEWSTATE|vs|") == [
+        ("updatePanel", "udp", "a|b|c"),
+        ("hiddenField", "__VIEWSTATE", "vs"),
+    ]
+    assert parse_delta("<html><body></body></html>") is None
+
+    tokens = TokenManager()
+    monkeypatch.setattr(utils.request, "_tokens", tokens)
+    stub_server.latency = 0
+    url = f"{stub_server.url}/Record/Player/HitterBasic/Basic1.aspx"
+    field = "ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$ddlSeason$ddlSeason"
+
+    response = fetch_postback(url, {field: 2014}, 2014, [field], delta=True)
+
+    assert not response.startswith("<html>")
+    assert extract_table(response)[1] == [["구자욱", "1"]]
+    assert stub_server.requests[-1][1]["__ASYNCPOST"] == "true"
+    assert list(tokens.entries.values())[0][1] == "token1"
+
+    response = fetch_postback(url, {field: 2015}, 2015, [field], delta=True)
+
+    assert extract_selected(response, field) == "2015"
+    assert stub_server.requests[-1][1]["__VIEWSTATE"] == "token1"
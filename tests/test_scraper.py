@@ -1,5 +1,20 @@
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from run import replay, run_parallel
 from scrapers.game import GameScheduleScraper, GameResultScraper
-from scrapers.player import PlayerSeasonStatsScraper
+from scrapers.player import PlayerSeasonStatsScraper, PlayerDetailStatsScraper
+from utils.manifest import FetchManifest, content_hash
+from utils.roster import RosterCache
+from utils.season import SeasonCalendar
 
 
 def _test_scraper(scraper, test_season, test_date, column):
@@ -8,7 +23,7 @@ def _test_scraper(scraper, test_season, test_date, column):
 
     This function checks that the scraped data for each fetched entry has the expected column structure.
     """
-    fetch_data = scraper.fetch(test_season, test_date)
+    fetch_data = dict(scraper.fetch(test_season, test_date))
     assert fetch_data
     for value in fetch_data.values():
         assert list(value[0].keys()) == column
@@ -244,3 +259,640 @@ def test_player(test_season, test_date):
         _test_scraper(
             PlayerSeasonStatsScraper(None, [7], pt, True), test_season, test_date, col
         )
+
+
+def test_schedule_concurrency(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that concurrent schedule fetching returns the same data as the sequential version.
+
+    This test checks:
+    1. Both modes produce identical file paths and rows against a local stub server.
+    2. The concurrent mode overlaps requests instead of waiting for each round trip.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.games = {
+        "20140329": [{"G_ID": "20140329HHSK0", "SR_ID": "0", "SEASON_ID": "2014"}],
+        "20141111": [{"G_ID": "20141111SSWO0", "SR_ID": "7", "SEASON_ID": "2014"}],
+    }
+
+    def fetch(concurrency):
+        scraper = GameScheduleScraper(None, [0, 7], concurrency)
+        scraper.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+        return dict(scraper.fetch(test_season, None))
+
+    stub_server.latency = 0
+    sequential = fetch(1)
+
+    stub_server.latency = 0.02
+    start_time = time.time()
+    concurrent = fetch(16)
+    elapsed = time.time() - start_time
+
+    assert list(concurrent) == [
+        "game/schedule/2014/20140329",
+        "game/schedule/2014/20141111",
+    ]
+    assert concurrent == sequential
+    assert elapsed < 365 * stub_server.latency / 2
+
+
+def test_schedule_calendar(stub_server, tmp_path, monkeypatch):
+    """
+    Test that the season calendar limits schedule probing to the known game window.
+
+    This test checks:
+    1. A window borrowed from another season is widened outward until the real edges are found.
+    2. All game days are still returned while most off-season dates are never requested.
+    """
+    monkeypatch.chdir(tmp_path)
+    game_days = [f"201404{day:02d}" for day in range(1, 21)] + ["20140329"]
+    stub_server.latency = 0
+    stub_server.games = {
+        date_str: [{"G_ID": f"{date_str}HHSK0", "SR_ID": "0", "SEASON_ID": "2014"}]
+        for date_str in game_days
+    }
+
+    scraper = GameScheduleScraper(None, [0], 4)
+    scraper.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+    scraper.calendar.windows = {"2013": {"0": ["20130405", "20130410"]}}
+
+    fetch_data = dict(scraper.fetch(2014, None))
+
+    assert sorted(fetch_data) == [f"game/schedule/2014/{d}" for d in sorted(game_days)]
+    assert len(stub_server.requests) < 365 / 2
+    assert scraper.calendar.windows["2014"]["0"] == ["20140329", "20140420"]
+
+
+def test_schedule_calendar_merge(tmp_path):
+    """
+    Test that calendars of parallel runs merge their seasons when saved.
+    """
+    path = str(tmp_path / "calendar.json")
+    calendars = [SeasonCalendar(path, str(tmp_path)) for _ in range(2)]
+    calendars[0].add(2013, 0, "20130330")
+    calendars[1].add(2014, 0, "20140329")
+    calendars[1].add(2014, 0, "20141017")
+    for calendar in calendars:
+        calendar.save()
+
+    assert SeasonCalendar(path, str(tmp_path)).windows == {
+        "2013": {"0": ["20130330", "20130330"]},
+        "2014": {"0": ["20140329", "20141017"]},
+    }
+
+
+def test_game_pipeline(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that pipelined result fetching returns the same data as the sequential version.
+
+    This test checks:
+    1. Scoreboards fetched while the schedule is still running are merged in the same order.
+    2. The schedule of every game day is yielded alongside the results.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    stub_server.games = {
+        f"201404{day:02d}": [
+            {"G_ID": f"201404{day:02d}{teams}0", "SR_ID": "0", "SEASON_ID": "2014"}
+            for teams in ["HHSK", "LGOB", "SSWO"]
+        ]
+        for day in range(1, 11)
+    }
+
+    def fetch(concurrency):
+        scraper = GameResultScraper("json", [0], concurrency)
+        scraper.url = f"{stub_server.url}/ws/Schedule.asmx/GetScoreBoardScroll"
+        scraper.games.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+        return dict(scraper.fetch(test_season, None))
+
+    sequential = fetch(1)
+    pipelined = fetch(8)
+
+    assert len(pipelined) == 20
+    assert pipelined == sequential
+    assert [row["G_ID"] for row in pipelined["game/result/2014/20140401"]] == [
+        "20140401HHSK0",
+        "20140401HHSK0",
+        "20140401LGOB0",
+        "20140401LGOB0",
+        "20140401SSWO0",
+        "20140401SSWO0",
+    ]
+    assert len(pipelined["game/schedule/2014/20140410"]) == 3
+
+
+def test_game_dataset(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that a season run in dataset format writes one partitioned dataset per output.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    stub_server.games = {
+        f"201404{day:02d}": [
+            {"G_ID": f"201404{day:02d}HHSK0", "SR_ID": "0", "SEASON_ID": "2014"}
+        ]
+        for day in range(1, 11)
+    }
+
+    scraper = GameResultScraper("dataset", [0], 4)
+    scraper.url = f"{stub_server.url}/ws/Schedule.asmx/GetScoreBoardScroll"
+    scraper.games.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+    scraper.run(test_season)
+
+    for name, rows in [("schedule", 10), ("result", 20)]:
+        partition = tmp_path / "output" / "dataset" / "game" / name / "season=2014"
+        files = list((partition / "series=0").glob("*.parquet"))
+        assert len(files) == 1
+        assert pq.read_table(files[0]).num_rows == rows
+    assert not (tmp_path / "output" / "processed").exists()
+
+
+def test_game_resume(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that resumed and incremental runs reuse the fetch manifest.
+
+    This test checks:
+    1. A resumed run rebuilds the same data without sending any request.
+    2. An incremental run refetches only the unfinished game and its schedule date.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    stub_server.games = {
+        "20141110": [
+            {"G_ID": "20141110SSWO0", "SR_ID": "7", "GAME_STATE_SC": "3"},
+        ],
+        "20141111": [
+            {"G_ID": "20141111SSWO0", "SR_ID": "7", "GAME_STATE_SC": "2"},
+        ],
+    }
+
+    def fetch(mode):
+        scraper = GameResultScraper("json", [7], 4, mode)
+        scraper.url = f"{stub_server.url}/ws/Schedule.asmx/GetScoreBoardScroll"
+        scraper.games.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+        stub_server.requests.clear()
+        return dict(scraper.fetch(test_season, None))
+
+    fetch_data = fetch(None)
+    assert sorted(fetch_data) == [
+        "game/result/2014/20141110",
+        "game/result/2014/20141111",
+        "game/schedule/2014/20141110",
+        "game/schedule/2014/20141111",
+    ]
+    assert next(iter(fetch_data)) == "game/schedule/2014/20141110"
+
+    assert fetch("resume") == fetch_data
+    assert stub_server.requests == []
+
+    assert fetch("incremental") == fetch_data
+    assert sorted(
+        form.get("date", form.get("gameId")) for _, form in stub_server.requests
+    ) == [
+        "20141111",
+        "20141111SSWO0",
+    ]
+
+
+def test_game_unchanged(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that units whose content did not change are not parsed and saved again.
+
+    This test checks:
+    1. A rerun against unchanged responses keeps every output file without saving or
+       backing it up again.
+    2. Only the game day whose scoreboard changed is saved again, with all its games.
+    3. Files removed since the last run are written again.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    stub_server.games = {
+        "20141110": [{"G_ID": "20141110SSWO0", "SR_ID": "7", "GAME_STATE_SC": "3"}],
+        "20141111": [
+            {"G_ID": "20141111SSWO0", "SR_ID": "7", "GAME_STATE_SC": "2"},
+            {"G_ID": "20141111HTLG0", "SR_ID": "7", "GAME_STATE_SC": "2"},
+        ],
+    }
+
+    def run():
+        scraper = GameResultScraper("json", [7], 2)
+        scraper.url = f"{stub_server.url}/ws/Schedule.asmx/GetScoreBoardScroll"
+        scraper.games.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+        saved = []
+        monkeypatch.setattr(
+            scraper, "save", lambda data, file_path: saved.append((file_path, data))
+        )
+        scraper.run(test_season)
+        return dict(saved)
+
+    processed = tmp_path / "output" / "processed"
+    paths = sorted(run())
+    assert len(paths) == 4
+    for path in paths:
+        (processed / f"{path}.json").parent.mkdir(parents=True, exist_ok=True)
+        (processed / f"{path}.json").write_text("[]")
+
+    assert run() == {}
+    # Unchanged schedules are not backed up again for the scoreboards
+    archive = GameResultScraper("json", [7]).archive
+    archive.flush()
+    with open(os.path.join(archive.path, "2014.warc.gz"), "rb") as f:
+        records = gzip.decompress(f.read())
+    assert records.count(b"KBO-Unit: game/schedule/") == 2
+
+    stub_server.scores["20141111SSWO0"] = 4
+    (processed / "game/schedule/2014/20141110.json").unlink()
+    saved = run()
+    assert sorted(saved) == [
+        "game/result/2014/20141111",
+        "game/schedule/2014/20141110",
+    ]
+    assert len(saved["game/result/2014/20141111"]) == 4
+
+
+def test_replay(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that the replay command rebuilds processed output from raw backups only.
+
+    This test checks:
+    1. Replayed files are identical to the ones written by the original run.
+    2. No request reaches the server while replaying.
+    3. The fetch manifest is left as the original run recorded it.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    stub_server.games = {
+        "20141111": [{"G_ID": "20141111SSWO0", "SR_ID": "7", "GAME_STATE_SC": "3"}],
+    }
+
+    scraper = GameResultScraper("json", [7])
+    scraper.url = f"{stub_server.url}/ws/Schedule.asmx/GetScoreBoardScroll"
+    scraper.games.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+    scraper.run(test_season)
+
+    processed = tmp_path / "output" / "processed" / "game"
+    expected = {p: p.read_bytes() for p in processed.rglob("*.json")}
+    shutil.rmtree(processed)
+    stub_server.requests.clear()
+    manifest = sqlite3.connect(tmp_path / "output" / "manifest.db")
+    entries = manifest.execute("SELECT * FROM units ORDER BY unit").fetchall()
+
+    replay(["game"], test_season, "json", [7], workers=2)
+    GameResultScraper("json", [7], mode="replay").record_failure(entries[0][0])
+
+    assert {p: p.read_bytes() for p in processed.rglob("*.json")} == expected
+    assert len(expected) == 2
+    assert stub_server.requests == []
+    assert manifest.execute("SELECT * FROM units ORDER BY unit").fetchall() == entries
+    manifest.close()
+
+
+def test_replay_legacy_backups(tmp_path, monkeypatch, test_season):
+    """
+    Test that replay rebuilds results from backups named after their game day.
+    """
+    monkeypatch.chdir(tmp_path)
+    raw = tmp_path / "output" / "raw" / "game"
+    games = [
+        {"G_ID": f"20141111{teams}0", "SR_ID": 7, "SEASON_ID": 2014, "GAME_STATE_SC": 3}
+        for teams in ["HTLG", "SSWO"]
+    ]
+    scores = [{"row": [{"Text": str(score)}] * 13} for score in (0, 4)]
+    backups = {
+        "schedule/2014/20141111.json": {"code": "100", "game": games},
+        # Each game of the day overwrote the day's backup, the last one is left
+        "result/2014/20141111.json": {
+            "code": "100",
+            "G_ID": "20141111SSWO0",
+            "G_DT": "20141111",
+            "table1": "[]",
+            "maxInning": 9,
+            "table2": json.dumps({"rows": scores}),
+            "table3": json.dumps({"rows": [{"row": []}, {"row": []}]}),
+        },
+    }
+    for path, data in backups.items():
+        (raw / path).parent.mkdir(parents=True, exist_ok=True)
+        (raw / path).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    replay(["game"], test_season, "json", [7], workers=2)
+
+    processed = tmp_path / "output" / "processed" / "game"
+    with open(processed / "result/2014/20141111.json", encoding="utf-8") as f:
+        results = json.load(f)
+    assert [row["G_ID"] for row in results] == ["20141111SSWO0"] * 2
+    assert [row["R"] for row in results] == [0, 4]
+    assert (processed / "schedule/2014/20141111.json").exists()
+
+
+def test_player_detail_workers(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that per-player detail scraping with a worker pool merges results deterministically,
+    and that a run can be narrowed to single players whose pages are backed up as received.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0.01
+    players = [{"P_ID": player_id} for player_id in range(62400, 62420)]
+
+    def fetch(concurrency):
+        scraper = PlayerDetailStatsScraper(None, [0, 7], "hitter", "daily", concurrency)
+        scraper.url = f"{stub_server.url}/Record/Player/HitterDetail/{{type}}.aspx?playerId={{id}}"
+        monkeypatch.setattr(
+            scraper.players,
+            "fetch",
+            lambda season, date: iter(
+                [(f"player/{season}/hitter/season_summary", players)]
+            ),
+        )
+        return dict(scraper.fetch(test_season, None))
+
+    sequential = fetch(1)
+    concurrent = fetch(4)
+
+    assert list(concurrent) == [
+        f"player/2014/hitter/{player['P_ID']}/daily" for player in players
+    ]
+    assert concurrent == sequential
+    assert [row["SR_ID"] for row in concurrent["player/2014/hitter/62400/daily"]] == [
+        0,
+        7,
+    ]
+
+    # A work queue unit runs a single player of the season roster
+    scraper = PlayerDetailStatsScraper(None, [0, 7], "hitter", "daily")
+    scraper.url = (
+        f"{stub_server.url}/Record/Player/HitterDetail/{{type}}.aspx?playerId={{id}}"
+    )
+    assert scraper.split(test_season) == [str(p["P_ID"]) for p in players]
+    scraper.targets = {"62405"}
+    assert dict(scraper.fetch(test_season, None)) == {
+        "player/2014/hitter/62405/daily": concurrent["player/2014/hitter/62405/daily"]
+    }
+
+    # Pages are backed up as received
+    scraper.archive.flush()
+    assert scraper.load_backup("player/2014/hitter/62405/daily_7", "html") == (
+        stub_server.responses["/Record/Player/HitterDetail/daily.aspx?playerId=62405"]
+    )
+
+
+def _record_unit(command, index, format, series, season, concurrency=1, mode=None):
+    with open("units.log", "a", encoding="utf-8") as f:
+        f.write(f"start {index} {season}\n")
+    time.sleep(0.05 if index < 4 else 0)
+    with open("units.log", "a", encoding="utf-8") as f:
+        f.write(f"end {index} {season}\n")
+    return command, index, season
+
+
+def test_player_parallel_order(tmp_path, monkeypatch):
+    """
+    Test that player detail pairs of a season start after its season stats pairs end.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("run.run_unit", _record_unit)
+
+    run_parallel(["player"], [2013, 2014], "json", [0], workers=4)
+
+    with open("units.log", encoding="utf-8") as f:
+        events = [line.split() for line in f]
+    assert len(events) == 2 * 2 * 8
+    for season in ["2013", "2014"]:
+        last_roster = max(
+            i
+            for i, (event, index, s) in enumerate(events)
+            if event == "end" and int(index) < 4 and s == season
+        )
+        first_detail = min(
+            i
+            for i, (event, index, s) in enumerate(events)
+            if event == "start" and int(index) >= 4 and s == season
+        )
+        assert last_roster < first_detail
+
+
+def test_player_roster_cache(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that the season roster is fetched once and shared by detail scrapers and later runs.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+
+    season_scraper = PlayerSeasonStatsScraper(None, [0], "hitter")
+    season_scraper.urls = [f"{stub_server.url}/Record/Player/HitterBasic/Basic1.aspx"]
+    list(season_scraper.fetch(test_season, None))
+    roster_requests = len(stub_server.requests)
+
+    for record_type in ["daily", "situation"]:
+        scraper = PlayerDetailStatsScraper(None, [0], "hitter", record_type)
+        scraper.url = f"{stub_server.url}/Record/Player/HitterDetail/{{type}}.aspx?playerId={{id}}"
+        scraper.rosters._memory.clear()
+        assert list(dict(scraper.fetch(test_season, None))) == [
+            f"player/2014/hitter/62404/{record_type}"
+        ]
+
+    assert all(
+        "HitterBasic" not in path for path, _ in stub_server.requests[roster_requests:]
+    )
+    assert (tmp_path / "output/raw/player/2014/hitter/roster_0.json").exists()
+
+    # A roster missing from the cache is fetched by the detail scraper itself
+    scraper = PlayerDetailStatsScraper(None, [0, 7], "hitter", "daily")
+    scraper.url = (
+        f"{stub_server.url}/Record/Player/HitterDetail/{{type}}.aspx?playerId={{id}}"
+    )
+    scraper.players.urls = season_scraper.urls
+    assert list(dict(scraper.fetch(test_season, None))) == [
+        "player/2014/hitter/62404/daily"
+    ]
+
+
+def test_roster_freshness(tmp_path):
+    """
+    Test that a roster only stays fresh without limit if it was fetched after its season.
+    """
+    rosters = RosterCache(str(tmp_path), max_age=60)
+    players = [{"P_ID": "62404", "P_NM": "A", "TEAM_NM": "B"}]
+    during = datetime(2014, 10, 1).timestamp()
+    after = datetime(2015, 2, 1).timestamp()
+
+    for season, fetched_at in [(2014, during), (2013, after)]:
+        key = (season, "0", "hitter")
+        os.makedirs(os.path.dirname(rosters._file_path(key)))
+        with open(rosters._file_path(key), "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": fetched_at, "players": players}, f)
+
+    refetched = [{"P_ID": "62405", "P_NM": "C", "TEAM_NM": "D"}]
+    # Fetched while the season was played, so it is refetched once expired
+    assert rosters.get(2014, [0], "hitter", lambda: refetched) == refetched
+    # Fetched after the season, so it is kept
+    assert rosters.get(2013, [0], "hitter", lambda: refetched) == players
+
+
+def test_player_season_pagination(stub_server, tmp_path, monkeypatch, test_season):
+    """
+    Test that season stats pages are discovered from the pager and fetched concurrently.
+
+    This test checks:
+    1. Every page of every URL is merged by player ID in page order.
+    2. Page blocks beyond the first pager block are discovered without probing empty pages.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    stub_server.pages = 12
+
+    scraper = PlayerSeasonStatsScraper(None, [0], "hitter", False, 4)
+    scraper.urls = [
+        f"{stub_server.url}/Record/Player/HitterBasic/{page}.aspx"
+        for page in ["Basic1", "Basic2"]
+    ]
+    fetch_data = dict(scraper.fetch(test_season, None))
+
+    players = fetch_data["player/2014/hitter/season_summary"]
+    assert [player["P_ID"] for player in players] == list(range(62404, 62416))
+    # 12 pages per URL, plus one probe past the last block since the pager shows a next button
+    assert sum(1 for _, form in stub_server.requests if form) == 26
+
+
+def test_save_schema(tmp_path, monkeypatch):
+    """
+    Test that saved files of a dataset share the schema types.
+
+    This test checks:
+    1. Columns get the same type whatever the values of a single file.
+    2. Strings are parsed, and values not matching the column type are saved as null.
+    3. Integers with missing values stay integers in JSON.
+    """
+    monkeypatch.chdir(tmp_path)
+    scraper = GameScheduleScraper("parquet", [0])
+
+    scraper.save(
+        [{"G_ID": "20140329HHSS0", "G_DT": 20140329, "T_SCORE_CN": 3}],
+        "game/schedule/2014/20140329",
+    )
+    scraper.save(
+        [{"G_ID": "20140330HHSS0", "G_DT": 20140330, "T_SCORE_CN": None}],
+        "game/schedule/2014/20140330",
+    )
+    scraper.save(
+        [
+            {"G_ID": "20140331HHSS0", "G_DT": "20140331", "T_SCORE_CN": "-"},
+            {"G_ID": "20140331LGOB0", "G_DT": 20140331, "T_SCORE_CN": 5},
+        ],
+        "game/schedule/2014/20140331",
+    )
+
+    schemas = [
+        pq.read_schema(
+            tmp_path
+            / "output"
+            / "processed"
+            / "game"
+            / "schedule"
+            / "2014"
+            / f"{day}.parquet"
+        )
+        for day in ("20140329", "20140330", "20140331")
+    ]
+    assert schemas[0] == schemas[1] == schemas[2]
+    assert schemas[0].field("T_SCORE_CN").type == pa.int64()
+    table = pq.read_table(
+        tmp_path
+        / "output"
+        / "processed"
+        / "game"
+        / "schedule"
+        / "2014"
+        / "20140331.parquet"
+    )
+    assert table["G_DT"].to_pylist() == [20140331, 20140331]
+    assert table["T_SCORE_CN"].to_pylist() == [None, 5]
+
+    scraper.format = "json"
+    scraper.save(
+        [{"P_ID": 62404, "HR": None}, {"P_ID": 62405, "HR": 3}],
+        "player/2014/hitter/season_summary",
+    )
+    with open(
+        tmp_path
+        / "output"
+        / "processed"
+        / "player"
+        / "2014"
+        / "hitter"
+        / "season_summary.json",
+        encoding="utf-8",
+    ) as f:
+        assert json.load(f) == [{"P_ID": 62404, "HR": None}, {"P_ID": 62405, "HR": 3}]
+
+
+def test_game_watch(stub_server, tmp_path, monkeypatch):
+    """
+    Test that polling a game day requests and saves only what may have changed.
+
+    This test checks:
+    1. Scoreboards of final games are requested once, those of live games on every poll.
+    2. Results are saved only when a score changed, and changed scoreboards are backed
+       up even after polls where they did not change.
+    3. The poll interval follows the state of the games.
+    """
+    monkeypatch.chdir(tmp_path)
+    stub_server.latency = 0
+    games = [
+        {"G_ID": "20141111SSWO0", "SR_ID": "7", "GAME_STATE_SC": "2", "G_TM": "18:30"},
+        {"G_ID": "20141111LGNC0", "SR_ID": "7", "GAME_STATE_SC": "3", "G_TM": "14:00"},
+    ]
+    stub_server.games = {"20141111": games}
+
+    scraper = GameResultScraper("json", [7], 2, "incremental")
+    scraper.url = f"{stub_server.url}/ws/Schedule.asmx/GetScoreBoardScroll"
+    scraper.games.url = f"{stub_server.url}/ws/Main.asmx/GetKboGameList"
+    result = tmp_path / "output/processed/game/result/2014/20141111.json"
+
+    def poll():
+        stub_server.requests.clear()
+        schedules, changed = scraper.poll("20141111")
+        scoreboards = [
+            form["gameId"] for _, form in stub_server.requests if "gameId" in form
+        ]
+        return schedules, changed, scoreboards
+
+    # Scoreboards are requested concurrently, the changed games keep the schedule order
+    _, changed, scoreboards = poll()
+    assert changed == ["20141111SSWO0", "20141111LGNC0"]
+    assert sorted(scoreboards) == sorted(changed)
+    saved_at = result.stat().st_mtime_ns
+
+    schedules, changed, scoreboards = poll()
+    assert (changed, scoreboards) == ([], ["20141111SSWO0"])
+    assert result.stat().st_mtime_ns == saved_at
+    assert GameResultScraper.poll_interval(schedules, changed, 30, 30, 600) == 60
+
+    games[0]["GAME_STATE_SC"] = "3"
+    stub_server.scores["20141111SSWO0"] = 4
+    schedules, changed, scoreboards = poll()
+    assert changed == scoreboards == ["20141111SSWO0"]
+    with open(result, encoding="utf-8") as f:
+        assert [row["R"] for row in json.load(f)] == [0, 4, 0, 1]
+
+    # The changed scoreboard is backed up and recorded as final with its own hash
+    scraper.archive.flush()
+    backup = scraper.load_backup("game/result/2014/20141111SSWO0", "json")
+    assert json.loads(json.loads(backup)["table2"])["rows"][1]["row"][0]["Text"] == "4"
+    assert scraper.manifest.get("game/result/2014/20141111SSWO0") == (
+        FetchManifest.FINAL,
+        content_hash(backup),
+    )
+
+    _, changed, scoreboards = poll()
+    assert changed == scoreboards == []
+    assert GameResultScraper.poll_interval(schedules, changed, 60, 30, 600) == 600
+
+    pregame = [{**schedules[0], "GAME_STATE_SC": 1}]
+    for now, interval in [
+        (datetime(2014, 11, 11, 12), 600),
+        (datetime(2014, 11, 11, 18, 25), 300),
+    ]:
+        assert (
+            GameResultScraper.poll_interval(pregame, [], 600, 30, 600, now) == interval
+        )
@@ -0,0 +1,71 @@
+import time
+
+from run import enqueue
+from utils import database
+from utils.archive import BackupArchive
+from utils.manifest import FetchManifest
+from utils.request import ResponseCache
+from utils.workqueue import WorkQueue
+
+
+def test_work_queue(tmp_path, monkeypatch):
+    """
+    Test leases, heartbeats and retries of the shared work queue.
+
+    This test checks:
+    1. Units are leased once each, in the order they were queued.
+    2. Expired leases are taken over by another worker, and the old lease is lost.
+    3. Failed units are retried until they used all their attempts.
+    """
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "queue.db")
+    queue = WorkQueue(path, lease_time=0.2, max_attempts=2)
+    assert enqueue(queue, "job", "player", 2014, "json", [0]) == 8
+    assert enqueue(queue, "job", "player", 2014, "json", [0]) == 0
+    assert queue.put("job", [(4, 2014, "62404"), (4, 2014, "62405")]) == 2
+
+    other = WorkQueue(path, lease_time=0.2, max_attempts=2)
+    first = queue.lease("a")
+    second = other.lease("b")
+    assert (first["scraper"], second["scraper"]) == (0, 1)
+    assert first["command"] == "player" and first["series"] == [0]
+
+    assert queue.heartbeat(first["id"], "a")
+    queue.complete(first["id"], "a")
+
+    # The lease of the second unit expires and is taken over
+    time.sleep(0.3)
+    taken = queue.lease("a")
+    assert taken["id"] == second["id"] and taken["attempts"] == 2
+    assert not other.heartbeat(second["id"], "b")
+
+    queue.fail(taken["id"], "a", "HTTP request failed")
+    units = [queue.lease("a") for _ in range(8)]
+    assert [unit["target"] for unit in units[-2:]] == ["62404", "62405"]
+    assert queue.lease("a") is None
+    for unit in units:
+        queue.complete(unit["id"], "a")
+
+    assert queue.stats("job") == {"queued": 0, "leased": 0, "done": 9, "failed": 1}
+
+
+def test_worker_journal_mode(tmp_path, monkeypatch):
+    """
+    Test that workers open their databases without WAL, which network disks do not support.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(database._options, "journal_mode", "WAL")
+    assert _journal_mode(FetchManifest(str(tmp_path / "wal.db")).conn) == "wal"
+
+    # Set by the queue and worker commands
+    database.configure_journal("DELETE")
+    databases = [
+        FetchManifest(str(tmp_path / "manifest.db")),
+        BackupArchive(str(tmp_path / "raw")),
+        ResponseCache(str(tmp_path / "cache")),
+    ]
+    assert [_journal_mode(db.conn) for db in databases] == ["delete"] * 3
+
+
+def _journal_mode(conn):
+    return conn.execute("PRAGMA journal_mode").fetchone()[0]
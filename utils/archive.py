@@ -0,0 +1,296 @@
+import os
+import zlib
+import gzip
+import uuid
+import queue
+import atexit
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from logger import get_logger
+from utils.database import get_journal_mode
+from utils.request import ResponseCache
+
+logger = get_logger()
+
+CONTENT_TYPES = {"html": "text/html; charset=utf-8", "json": "application/json"}
+
+
+class BackupArchive:
+    """
+    Append-only, compressed archive of raw responses, one file per season.
+
+    Every response is stored as a WARC-like record: a header block with the unit, the
+    target URL, the request key of the URL and payload and the digest of the body,
+    followed by the original body. Each record is compressed as its own gzip member and
+    appended to '<path>/<season>.warc.gz', and an SQLite index maps units and request
+    keys to the offset of their latest record.
+
+    Records are compressed and written by a background thread, so archiving does not
+    block the scrape. Appends to an archive file are serialized across processes with
+    an exclusive file lock.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256):
+        """
+        Args:
+            path (str): Archive directory.
+            batch_size (int, Optional): Maximum number of records written per batch.
+        """
+        self.path = path
+        self.batch_size = batch_size
+
+        os.makedirs(path, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(path, "index.db"), timeout=30, check_same_thread=False
+        )
+        with self.lock, self.conn:
+            self.conn.execute(f"PRAGMA journal_mode={get_journal_mode()}")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS records (
+                    unit TEXT PRIMARY KEY,
+                    request_key TEXT,
+                    archive TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    archived_at TEXT NOT NULL
+                )
+                """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS records_request_key ON records (request_key)"
+            )
+
+        # Queued bodies stay readable until they are written
+        self.pending: dict[str, bytes] = {}
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(
+            target=self._run, name="backup-archive", daemon=True
+        )
+        self.writer.start()
+
+    def append(
+        self,
+        unit: str,
+        body: bytes,
+        format: str,
+        url: str | None = None,
+        payload: dict | None = None,
+    ) -> str:
+        """
+        Queue a response body to be archived.
+
+        Args:
+            unit (str): Unit identifier (backup path without extension).
+            body (bytes): Original response body.
+            format (str): Format of the body ('html', 'json').
+            url (str, Optional): Requested URL.
+            payload (dict, Optional): Form data of the request.
+
+        Returns:
+            str: SHA-256 digest of the body.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            self.pending[unit] = body
+        self.queue.put((unit, body, format, url, payload, digest))
+        return digest
+
+    def get(self, unit: str) -> bytes | None:
+        """Return the latest archived body of a unit, or None if it was never archived."""
+        with self.lock:
+            body = self.pending.get(unit)
+            if body is not None:
+                return body
+            entry = self.conn.execute(
+                "SELECT archive, offset, length FROM records WHERE unit = ?", (unit,)
+            ).fetchone()
+        return self._read(entry) if entry else None
+
+    def find(self, url: str, payload: dict | None) -> bytes | None:
+        """Return the latest archived body of a request, ignoring volatile form tokens."""
+        self.flush()
+        with self.lock:
+            entry = self.conn.execute(
+                "SELECT archive, offset, length FROM records WHERE request_key = ? "
+                "ORDER BY archived_at DESC LIMIT 1",
+                (ResponseCache.key(url, payload),),
+            ).fetchone()
+        return self._read(entry) if entry else None
+
+    def units(self, prefix: str = "") -> list[str]:
+        """Return the archived units whose path starts with a prefix, sorted."""
+        with self.lock:
+            units = set(unit for unit in self.pending if unit.startswith(prefix))
+            units.update(
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT unit FROM records WHERE substr(unit, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            )
+        return sorted(units)
+
+    def flush(self):
+        """Wait until every queued record is written."""
+        self.queue.join()
+
+    def close(self):
+        """Write the queued records and stop the writer thread."""
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+        with self.lock:
+            self.conn.close()
+
+    def _read(self, entry: tuple[str, int, int]) -> bytes | None:
+        archive, offset, length = entry
+        try:
+            with open(os.path.join(self.path, archive), "rb") as f:
+                f.seek(offset)
+                record = gzip.decompress(f.read(length))
+        except (OSError, EOFError, zlib.error) as e:
+            logger.error(f"Failed to read archived record from {archive}: {e}")
+            return None
+
+        header, _, body = record.partition(b"\r\n\r\n")
+        for line in header.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name == b"Content-Length":
+                return body[: int(value)]
+        return None
+
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [item for item in items if item is not None]
+            try:
+                if records:
+                    self._write(records)
+            except Exception as e:
+                logger.error(f"Failed to archive {len(records)} records: {e}")
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+            if len(records) < len(items):
+                return
+
+    def _write(self, records: list[tuple]):
+        archived_at = datetime.now(timezone.utc)
+
+        members = {}
+        for unit, body, format, url, payload, digest in records:
+            key = ResponseCache.key(url, payload) if url else None
+            headers = {
+                "WARC-Type": "resource",
+                "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+                "WARC-Date": archived_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "WARC-Target-URI": url,
+                "WARC-Block-Digest": f"sha256:{digest}",
+                "KBO-Unit": unit,
+                "KBO-Request-Key": key,
+                "Content-Type": CONTENT_TYPES.get(format, "application/octet-stream"),
+                "Content-Length": len(body),
+            }
+            header = "".join(
+                f"{name}: {value}\r\n"
+                for name, value in headers.items()
+                if value is not None
+            )
+            record = b"WARC/1.1\r\n" + header.encode("utf-8") + b"\r\n" + body
+            members.setdefault(_archive_name(unit), []).append(
+                (unit, key, digest, body, gzip.compress(record + b"\r\n\r\n"))
+            )
+
+        rows = []
+        for archive, entries in members.items():
+            with open(os.path.join(self.path, archive), "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    offset = f.seek(0, os.SEEK_END)
+                    for unit, key, digest, body, member in entries:
+                        f.write(member)
+                        rows.append(
+                            (
+                                unit,
+                                key,
+                                archive,
+                                offset,
+                                len(member),
+                                digest,
+                                archived_at.isoformat(),
+                            )
+                        )
+                        offset += len(member)
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+            for entries in members.values():
+                for unit, _, _, body, _ in entries:
+                    # The unit may have been queued again in the meantime
+                    if self.pending.get(unit) is body:
+                        del self.pending[unit]
+
+
+def _archive_name(unit: str) -> str:
+    season = next(
+        (p for p in unit.split("/") if len(p) == 4 and p.isdigit()), "unknown"
+    )
+    return f"{season}.warc.gz"
+
+
+_archives: dict[str, BackupArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def get_archive(path: str) -> BackupArchive:
+    """Return the backup archive of a directory, shared by every scraper of the process."""
+    with _archives_lock:
+        archive = _archives.get(path)
+        if archive is None:
+            archive = _archives[path] = BackupArchive(path)
+        return archive
+
+
+def close_archives():
+    """Write the queued records of every archive of the process."""
+    with _archives_lock:
+        archives = list(_archives.values())
+        _archives.clear()
+    for archive in archives:
+        archive.close()
+
+
+def _reset_archives():
+    # Writer threads and connections do not survive a fork
+    global _archives_lock
+    _archives_lock = threading.Lock()
+    _archives.clear()
+
+
+atexit.register(close_archives)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_archives)
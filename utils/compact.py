@@ -0,0 +1,138 @@
+import os
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from logger import get_logger
+from utils.dataset import DatasetWriter, dataset_name
+from utils.schema import DatasetSchema, get_schema
+
+logger = get_logger()
+
+# Preferred source when the same output was saved in several formats
+FORMATS = ["parquet", "json", "csv"]
+
+# Sort keys of the compacted files, in order, when the dataset has them
+SORT_KEYS = ["G_ID", "P_ID", "G_DT"]
+
+
+def find_units(path: str) -> dict[tuple[str, str], list[str]]:
+    """
+    Group the processed output files by dataset and season.
+
+    Args:
+        path (str): Root of the processed output (e.g. output/processed).
+
+    Returns:
+        dict[tuple[str, str], list[str]]: Output paths (without extension) per
+                                          (dataset, season), sorted.
+    """
+    files = {}
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            stem, ext = os.path.splitext(filename)
+            if ext[1:] not in FORMATS:
+                continue
+
+            file_path = os.path.relpath(os.path.join(root, stem), path)
+            file_path = file_path.replace(os.sep, "/")
+            files.setdefault(file_path, []).append(ext[1:])
+
+    units = {}
+    for file_path, formats in files.items():
+        season = next(
+            (p for p in file_path.split("/") if len(p) == 4 and p.isdigit()), None
+        )
+        if season is None:
+            continue
+        format = min(formats, key=FORMATS.index)
+        units.setdefault((dataset_name(file_path), season), []).append(
+            f"{file_path}.{format}"
+        )
+
+    return {unit: sorted(files) for unit, files in sorted(units.items())}
+
+
+def read_table(full_path: str, schema: DatasetSchema | None) -> pa.Table:
+    """
+    Read a processed output file as a table typed by the dataset schema.
+
+    CSV cells are read as text and converted by the schema, since pandas would turn
+    integer columns with missing values into floats (e.g. "76715.0").
+
+    Args:
+        full_path (str): Path of the output file.
+        schema (DatasetSchema | None): Schema of the dataset, if known.
+
+    Returns:
+        pa.Table: Rows of the file.
+    """
+    if full_path.endswith(".parquet"):
+        table = pq.read_table(full_path)
+        return schema.cast(table) if schema else table
+
+    if full_path.endswith(".json"):
+        with open(full_path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    else:
+        rows = pd.read_csv(full_path, encoding="utf-8", dtype=str).to_dict(
+            orient="records"
+        )
+    return schema.table(rows) if schema else pa.Table.from_pylist(rows)
+
+
+def compact_unit(
+    source: str, target: str, files: list[str], options: dict
+) -> tuple[int, int]:
+    """
+    Merge the output files of one dataset and season into the partitioned dataset.
+
+    Rows are typed by the dataset schema and sorted by the available sort keys, so
+    the row group statistics of the compacted files allow pruning by game, player or
+    date. Each file is converted to Arrow on its own, so only one file's rows are held
+    as Python objects at a time. The rows written are counted back from the written
+    files.
+
+    Args:
+        source (str): Root of the processed output.
+        target (str): Root of the partitioned dataset.
+        files (list[str]): Output files of the unit, relative to the source.
+        options (dict): Options of the dataset writer.
+
+    Returns:
+        tuple[int, int]: Number of rows read and written.
+
+    Raises:
+        RuntimeError: If the number of rows written differs from the rows read.
+    """
+    file_path = os.path.splitext(files[0])[0]
+    schema = get_schema(file_path)
+
+    tables = [read_table(os.path.join(source, file), schema) for file in files]
+    tables = [table for table in tables if table.num_rows]
+    if not tables:
+        return 0, 0
+    # Files may lack some columns, which are then null
+    table = pa.concat_tables(tables, promote_options="permissive")
+    del tables
+
+    keys = [(key, "ascending") for key in SORT_KEYS if key in table.column_names]
+    if keys:
+        table = table.sort_by(keys)
+
+    writer = DatasetWriter(target, overwrite=True, **options)
+    try:
+        writer.write(file_path, table)
+        written = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+    count = sum(pq.ParquetFile(file).metadata.num_rows for file in written)
+    if count != table.num_rows:
+        raise RuntimeError(
+            f"Compacted {count} rows instead of {table.num_rows} for {file_path}"
+        )
+    return table.num_rows, count
@@ -0,0 +1,17 @@
+_options = {"journal_mode": "WAL"}
+
+
+def configure_journal(journal_mode: str):
+    """
+    Set the SQLite journal mode of the manifest, archive and cache opened afterwards.
+
+    WAL lets readers and a writer work at the same time, but needs shared memory that
+    network filesystems do not provide. Databases under a directory shared by hosts
+    use the default rollback journal ('DELETE') instead.
+    """
+    _options["journal_mode"] = journal_mode
+
+
+def get_journal_mode() -> str:
+    """Return the SQLite journal mode of new databases."""
+    return _options["journal_mode"]
@@ -0,0 +1,284 @@
+import os
+import re
+import glob
+import time
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from logger import get_logger
+
+logger = get_logger()
+
+# Team and stadium names repeat in every row
+DICTIONARY_COLUMNS = ["TEAM_NM", "HOME_NM", "AWAY_NM", "FULL_HOME_NM", "FULL_AWAY_NM"]
+DICTIONARY_COLUMNS += ["S_NM", "OPP"]
+
+_options = {
+    "row_group_size": 128 * 1024,
+    "compression": "zstd",
+    "dictionary_columns": DICTIONARY_COLUMNS,
+}
+
+
+def configure_dataset(
+    row_group_size: int | None = None,
+    compression: str | None = None,
+    dictionary_columns: list[str] | None = None,
+):
+    """Set the Parquet options of the dataset writers created afterwards."""
+    if row_group_size:
+        _options["row_group_size"] = row_group_size
+    if compression:
+        _options["compression"] = compression
+    if dictionary_columns is not None:
+        _options["dictionary_columns"] = dictionary_columns
+
+
+def get_dataset_options() -> dict:
+    """Return the Parquet options of new dataset writers."""
+    return dict(_options)
+
+
+def dataset_name(file_path: str) -> str:
+    """
+    Return the dataset of an output file, i.e. its path without seasons, dates and IDs.
+
+    e.g. 'game/schedule/2014/20141111' -> 'game/schedule',
+         'player/2014/hitter/62404/daily' -> 'player/hitter/daily'
+    """
+    parts = file_path.replace("\\", "/").split("/")
+    return "/".join(part for part in parts if not part.isdigit())
+
+
+class _Partition:
+    def __init__(self, path: str):
+        self.path = path
+        self.existing = set(glob.glob(os.path.join(path, "*.parquet")))
+        self.schema: pa.Schema | None = None
+        self.buffer: list[pa.Table] = []
+        self.rows = 0
+        self.writer: pq.ParquetWriter | None = None
+        self.files: list[str] = []
+
+
+class DatasetWriter:
+    """
+    Streams output rows into Hive-partitioned Parquet datasets.
+
+    Rows are written to '<path>/<dataset>/season=<SEASON_ID>/series=<SR_ID>/', with one
+    long-lived Parquet writer per partition that buffers rows into row groups of
+    `row_group_size` rows. Files are written under a hidden name and only renamed into
+    place on close. With `overwrite`, the files a partition had before are then removed,
+    so rerunning a season replaces its data instead of duplicating it. Files of a `name`d
+    writer (e.g. a player or date) are named after it instead of the run, and replace
+    the files written under the same name before, so appending runs can be rerun too.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        row_group_size: int = 128 * 1024,
+        compression: str = "zstd",
+        dictionary_columns: list[str] = DICTIONARY_COLUMNS,
+        overwrite: bool = True,
+        name: str | None = None,
+    ):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.compression = None if compression == "none" else compression
+        self.dictionary_columns = dictionary_columns
+        self.overwrite = overwrite
+
+        self.run_id = name or f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        # Earlier files of the same name, replaced on close
+        self.replaced = (
+            re.compile(rf"part-{re.escape(name)}-\d+\.parquet") if name else None
+        )
+        self.partitions: dict[str, _Partition] = {}
+        self.lock = threading.Lock()
+
+    def write(self, file_path: str, table: pa.Table, series_id: int | None = None):
+        """
+        Append the rows of an output file to the partitions of its dataset.
+
+        Args:
+            file_path (str): Path of the output file (without extension).
+            table (pa.Table): Rows to write.
+            series_id (int, Optional): Series of rows without a SR_ID column.
+        """
+        if table.num_rows == 0:
+            return
+
+        name = dataset_name(file_path)
+        parts = file_path.replace("\\", "/").split("/")
+        season = next(
+            (p for p in parts if len(p) == 4 and p.isdigit()),
+            "__HIVE_DEFAULT_PARTITION__",
+        )
+
+        with self.lock:
+            for (season, series), rows in self._split(table, season, series_id):
+                path = os.path.join(
+                    self.path, name, f"season={season}", f"series={series}"
+                )
+                partition = self.partitions.get(path)
+                if partition is None:
+                    partition = self.partitions[path] = _Partition(path)
+                self._append(partition, rows)
+
+    def flush(self):
+        """Write the buffered rows of every partition and close their open files."""
+        with self.lock:
+            for partition in self.partitions.values():
+                self._flush(partition, force=True)
+                self._close_file(partition)
+
+    def close(self) -> list[str]:
+        """
+        Flush every partition and move its files into place.
+
+        Returns:
+            list[str]: Paths of the written files.
+        """
+        self.flush()
+        written = []
+        with self.lock:
+            for partition in self.partitions.values():
+                for file in partition.existing:
+                    if self.overwrite or (
+                        self.replaced is not None
+                        and self.replaced.fullmatch(os.path.basename(file))
+                    ):
+                        os.remove(file)
+                for file in partition.files:
+                    directory, filename = os.path.split(file)
+                    written.append(os.path.join(directory, filename.lstrip(".")))
+                    os.replace(file, written[-1])
+
+                logger.info(
+                    f"Wrote {len(partition.files)} files to dataset partition {partition.path}"
+                )
+            self.partitions.clear()
+        return written
+
+    def abort(self):
+        """Discard the files written so far, leaving every partition as it was."""
+        with self.lock:
+            for partition in self.partitions.values():
+                self._close_file(partition)
+                for file in partition.files:
+                    os.remove(file)
+            self.partitions.clear()
+
+    @staticmethod
+    def _split(table: pa.Table, season: str, series_id: int | None):
+        def values(column, default):
+            if column not in table.column_names:
+                return [default] * table.num_rows
+            return [
+                default if value is None else value
+                for value in table.column(column).to_pylist()
+            ]
+
+        # Missing values get Hive's default partition name
+        keys = list(
+            zip(
+                values("SEASON_ID", season),
+                values(
+                    "SR_ID",
+                    "__HIVE_DEFAULT_PARTITION__" if series_id is None else series_id,
+                ),
+            )
+        )
+        unique = list(dict.fromkeys(keys))
+        if len(unique) == 1:
+            yield unique[0], table
+            return
+
+        for key in unique:
+            mask = pa.array([k == key for k in keys])
+            yield key, table.filter(mask)
+
+    def _append(self, partition: _Partition, table: pa.Table):
+        if partition.schema is None:
+            partition.schema = table.schema
+
+        aligned = _align(table, partition.schema)
+        if aligned is None:
+            try:
+                schema = pa.unify_schemas([partition.schema, table.schema])
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                schema = table.schema
+            if _align(table, schema) is None:
+                schema = table.schema
+
+            buffer = [_align(t, schema) for t in partition.buffer]
+            if partition.writer is not None or any(t is None for t in buffer):
+                # An open file cannot change its schema, continue in a new file
+                self._flush(partition, force=True)
+                self._close_file(partition)
+                buffer = []
+
+            partition.buffer = buffer
+            partition.schema = schema
+            aligned = _align(table, schema)
+
+        partition.buffer.append(aligned)
+        partition.rows += aligned.num_rows
+        self._flush(partition)
+
+    def _flush(self, partition: _Partition, force: bool = False):
+        if not partition.buffer or (not force and partition.rows < self.row_group_size):
+            return
+
+        if partition.writer is None:
+            os.makedirs(partition.path, exist_ok=True)
+            file = os.path.join(
+                partition.path,
+                f".part-{self.run_id}-{len(partition.files)}.parquet",
+            )
+            dictionary = [
+                c for c in self.dictionary_columns if c in partition.schema.names
+            ]
+            partition.writer = pq.ParquetWriter(
+                file,
+                partition.schema,
+                compression=self.compression,
+                use_dictionary=dictionary or False,
+            )
+            partition.files.append(file)
+
+        partition.writer.write_table(
+            pa.concat_tables(partition.buffer), row_group_size=self.row_group_size
+        )
+        partition.buffer = []
+        partition.rows = 0
+
+    @staticmethod
+    def _close_file(partition: _Partition):
+        if partition.writer is not None:
+            partition.writer.close()
+            partition.writer = None
+
+
+def _align(table: pa.Table, schema: pa.Schema) -> pa.Table | None:
+    """Cast a table to a schema, adding missing columns as nulls, or None if impossible."""
+    if table.schema.equals(schema):
+        return table
+    if not set(table.column_names) <= set(schema.names):
+        return None
+
+    try:
+        arrays = [
+            (
+                table.column(field.name).cast(field.type)
+                if field.name in table.column_names
+                else pa.nulls(table.num_rows, field.type)
+            )
+            for field in schema
+        ]
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        return None
+    return pa.Table.from_arrays(arrays, schema=schema)
@@ -0,0 +1,103 @@
+import re
+
+from lxml import html as lxml_html
+from lxml.etree import ParserError
+
+_PLAYER_ID = re.compile(r"playerId=(\d+)")
+
+
+def _text(element) -> str:
+    # Same result as BeautifulSoup's get_text(strip=True)
+    return "".join(text.strip() for text in element.xpath(".//text()"))
+
+
+def _fragment(html_text: str, start: int, end: int):
+    return lxml_html.fragment_fromstring(html_text[start:end], create_parent="div")
+
+
+def extract_table(
+    html_text: str, player_id: bool = False
+) -> tuple[list[str], list[list[str]]] | tuple[None, None]:
+    """
+    Extracts the record table of a page without building a full document tree.
+
+    Only the fragment from the first table with a <thead> or <tbody> to the last
+    </table> is parsed. Headers are the cells of the first header row, and rows are
+    every body row of the page, like `select_one("thead tr")` and `select("tbody tr")`.
+
+    Args:
+        html_text (str): The HTML document.
+        player_id (bool, Optional): Prepend the player ID found in each row's first link.
+
+    Returns:
+        tuple[list[str], list[list[str]]] | tuple[None, None]: (headers, rows), or
+        (None, None) if the page has no header row.
+    """
+    starts = [i for i in (html_text.find("<thead"), html_text.find("<tbody")) if i >= 0]
+    if not starts:
+        return None, None
+
+    start = max(html_text.rfind("<table", 0, min(starts)), 0)
+    end = html_text.rfind("</table>")
+    try:
+        if end > start:
+            root = _fragment(html_text, start, end + len("</table>"))
+        else:
+            root = lxml_html.fromstring(html_text)
+    except ParserError:
+        return None, None
+
+    header = root.xpath(".//thead//tr")
+    if not header:
+        return None, None
+
+    headers = [_text(th) for th in header[0].xpath(".//th")]
+    rows = []
+    for tr in root.xpath(".//tbody//tr"):
+        row = [_text(td) for td in tr.xpath(".//td")]
+        if player_id:
+            row.insert(0, _PLAYER_ID.search(tr.find(".//a").attrib["href"]).group(1))
+        rows.append(row)
+
+    return headers, rows
+
+
+def extract_input(html_text: str, input_id: str) -> str | None:
+    """Returns the stripped value of the <input> with the given id, or None if missing."""
+    match = re.search(rf'<input[^>]*\sid="{re.escape(input_id)}"[^>]*>', html_text)
+    if not match:
+        return None
+    return lxml_html.fragment_fromstring(match.group(0)).get("value", "").strip()
+
+
+def extract_selected(html_text: str, name: str) -> str | None:
+    """Returns the value of the selected option of a <select>, or None if not found."""
+    start = html_text.find(f'name="{name}"')
+    if start < 0:
+        return None
+
+    start = html_text.rfind("<select", 0, start)
+    end = html_text.find("</select>", start)
+    if start < 0 or end < 0:
+        return None
+
+    select = lxml_html.fragment_fromstring(html_text[start : end + len("</select>")])
+    options = select.xpath(".//option[@selected]")
+    return options[0].get("value") if options else None
+
+
+def extract_links(html_text: str, class_name: str) -> list[str] | None:
+    """Returns the link texts inside the <div> with the given class, or None if missing."""
+    match = re.search(
+        rf'<div[^>]*\sclass="(?:[^"]*\s)?{re.escape(class_name)}(?:\s[^"]*)?"',
+        html_text,
+    )
+    end = html_text.find("</div>", match.end()) if match else -1
+    if end < 0:
+        return None
+
+    try:
+        div = _fragment(html_text, match.start(), end + len("</div>"))
+    except ParserError:
+        return None
+    return [_text(a) for a in div.xpath(".//a")]
@@ -0,0 +1,107 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+from logger import get_logger
+from utils.database import get_journal_mode
+
+logger = get_logger()
+
+# Hidden ASP.NET form tokens change with every response, even if the page does not
+_FORM_TOKENS = re.compile(rb"<input[^>]*__(?:VIEWSTATE|EVENTVALIDATION)[^>]*>")
+
+
+def content_hash(body: bytes) -> str:
+    """Return the SHA-256 hash of a response body, ignoring volatile form tokens."""
+    return hashlib.sha256(_FORM_TOKENS.sub(b"", body)).hexdigest()
+
+
+class FetchManifest:
+    """
+    Durable record of fetched units (schedule dates, games, player pages).
+
+    Each unit is identified by its backup path and stored with a status and the
+    content hash of its backup. Units with no data are recorded with an empty hash.
+
+    Statuses:
+        final: The data can no longer change (finished games, past seasons).
+        pending: The data was fetched but may still change (games in progress, current season).
+        failed: Every attempt to fetch the unit failed.
+    """
+
+    FINAL = "final"
+    PENDING = "pending"
+    FAILED = "failed"
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(f"PRAGMA journal_mode={get_journal_mode()}")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS units (
+                    unit TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    hash TEXT,
+                    updated_at TEXT NOT NULL
+                )
+                """)
+
+    def get(self, unit: str) -> tuple[str, str | None] | None:
+        """Return the (status, hash) of a unit, or None if it was never fetched."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT status, hash FROM units WHERE unit = ?", (unit,)
+            ).fetchone()
+
+    def record(self, unit: str, status: str, content_hash: str | None = None):
+        """
+        Record a fetched unit.
+
+        Args:
+            unit (str): Unit identifier (backup path without extension).
+            status (str): FINAL, PENDING or FAILED.
+            content_hash (str, Optional): Hash of the backed up content, None if empty.
+        """
+        try:
+            with self.lock, self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?)",
+                    (unit, status, content_hash, datetime.now().isoformat()),
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record unit {unit}: {e}")
+
+    def should_skip(self, unit: str, mode: str | None) -> bool:
+        """
+        Check whether a unit can be skipped in the given run mode.
+
+        Args:
+            unit (str): Unit identifier.
+            mode (str | None): 'replay' skips every unit,
+                               'resume' skips every fetched unit except failed ones,
+                               'incremental' skips only final units.
+
+        Returns:
+            bool: True if the unit does not need to be fetched again.
+        """
+        if mode == "replay":
+            return True
+        if mode not in ("resume", "incremental"):
+            return False
+
+        entry = self.get(unit)
+        if entry is None or entry[0] == self.FAILED:
+            return False
+        if mode == "resume":
+            return True
+        return entry[0] == self.FINAL
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RunMetrics:
+    """
+    Per-stage metrics of a run, shared by every scraper and request of the process.
+
+    - Requests: latency histogram, response bytes, failures and retries per endpoint.
+    - Stages: calls and seconds spent parsing, converting and saving.
+    - Counters: rows and files written, cache hits and misses, unchanged units.
+
+    Metrics of worker processes are returned as snapshots and merged into the metrics
+    of the main process, which writes them as a JSON run report and a Prometheus
+    textfile.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear every metric and restart the run clock."""
+        with self.lock:
+            self.started_at = time.time()
+            self.requests: dict[str, dict] = {}
+            self.stages: dict[str, dict[str, float]] = {}
+            self.counters: dict[str, int] = {}
+
+    def observe_request(self, endpoint: str, latency: float, size: int = 0):
+        """Record a successful request with its latency in seconds and body size."""
+        with self.lock:
+            entry = self._endpoint(endpoint)
+            entry["count"] += 1
+            entry["bytes"] += size
+            entry["seconds"] += latency
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    entry["buckets"][i] += 1
+                    break
+
+    def observe_failure(self, endpoint: str, retried: bool):
+        """Record a failed request attempt, and whether it is retried."""
+        with self.lock:
+            entry = self._endpoint(endpoint)
+            entry["failures"] += 1
+            entry["retries"] += int(retried)
+
+    @contextmanager
+    def time(self, stage: str):
+        """Measure the time spent in a stage ('parse', 'convert', 'save')."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self.lock:
+                entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0})
+                entry["calls"] += 1
+                entry["seconds"] += elapsed
+
+    def count(self, name: str, value: int = 1):
+        """Add to a counter (e.g. 'rows_written', 'cache_hits')."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        """Return a copy of the metrics, which can be sent to another process."""
+        with self.lock:
+            return {
+                "requests": {
+                    endpoint: {**entry, "buckets": list(entry["buckets"])}
+                    for endpoint, entry in self.requests.items()
+                },
+                "stages": {stage: dict(entry) for stage, entry in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def merge(self, snapshot: dict):
+        """Add the metrics of a snapshot, e.g. one returned by a worker process."""
+        with self.lock:
+            for endpoint, other in snapshot["requests"].items():
+                entry = self._endpoint(endpoint)
+                for key in ("count", "bytes", "seconds", "failures", "retries"):
+                    entry[key] += other[key]
+                entry["buckets"] = [
+                    a + b for a, b in zip(entry["buckets"], other["buckets"])
+                ]
+            for stage, other in snapshot["stages"].items():
+                entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0})
+                entry["calls"] += other["calls"]
+                entry["seconds"] += other["seconds"]
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self, command: str | None = None) -> dict:
+        """
+        Return the JSON run report.
+
+        Latency buckets are cumulative, keyed by their upper bound in seconds.
+        """
+        snapshot = self.snapshot()
+        requests = {}
+        for endpoint, entry in sorted(snapshot["requests"].items()):
+            cumulative, buckets = 0, {}
+            for bound, count in zip(LATENCY_BUCKETS, entry["buckets"]):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets["+Inf"] = entry["count"]
+            requests[endpoint] = {
+                "count": entry["count"],
+                "failures": entry["failures"],
+                "retries": entry["retries"],
+                "bytes": entry["bytes"],
+                "seconds": round(entry["seconds"], 6),
+                "latency_buckets": buckets,
+            }
+
+        return {
+            "command": command,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "duration": round(time.time() - self.started_at, 6),
+            "requests": requests,
+            "stages": {
+                stage: {"calls": entry["calls"], "seconds": round(entry["seconds"], 6)}
+                for stage, entry in sorted(snapshot["stages"].items())
+            },
+            "counters": dict(sorted(snapshot["counters"].items())),
+        }
+
+    def write(self, path: str, command: str | None = None) -> tuple[str, str]:
+        """
+        Write the JSON run report and the Prometheus textfile of the run.
+
+        The report is kept per run as '<command>_<timestamp>.json'. The textfile
+        '<command>.prom' holds the metrics of the latest run, for the textfile
+        collector of the node exporter.
+
+        Args:
+            path (str): Output directory.
+            command (str, Optional): Command of the run, used in file names and labels.
+
+        Returns:
+            tuple[str, str]: Paths of the JSON report and the Prometheus textfile.
+        """
+        os.makedirs(path, exist_ok=True)
+        report = self.report(command)
+        name = command or "run"
+
+        report_path = os.path.join(
+            path, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        # Written under a temporary name, so the collector never reads a partial file
+        prom_path = os.path.join(path, f"{name}.prom")
+        tmp_path = f"{prom_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(_prometheus(report, name))
+        os.replace(tmp_path, prom_path)
+
+        return report_path, prom_path
+
+    def summary(self) -> str:
+        """Return a one-line summary of where the time of the run was spent."""
+        snapshot = self.snapshot()
+        totals = {
+            key: sum(entry[key] for entry in snapshot["requests"].values())
+            for key in ("count", "seconds", "bytes", "failures")
+        }
+        parts = [
+            f"{totals['count']} requests ({totals['bytes'] / 1024 / 1024:.1f} MB, "
+            f"{totals['seconds']:.2f}s, {totals['failures']} failed attempts)"
+        ]
+        parts += [
+            f"{stage} {entry['seconds']:.2f}s"
+            for stage, entry in sorted(snapshot["stages"].items())
+        ]
+        parts += [
+            f"{value} {name.replace('_', ' ')}"
+            for name, value in sorted(snapshot["counters"].items())
+        ]
+        return ", ".join(parts)
+
+    def _endpoint(self, endpoint: str) -> dict:
+        entry = self.requests.get(endpoint)
+        if entry is None:
+            entry = self.requests[endpoint] = {
+                "count": 0,
+                "bytes": 0,
+                "seconds": 0.0,
+                "failures": 0,
+                "retries": 0,
+                "buckets": [0] * len(LATENCY_BUCKETS),
+            }
+        return entry
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _prometheus(report: dict, command: str) -> str:
+    def labels(**values):
+        values = {"command": command, **values}
+        return ",".join(f'{key}="{_escape(value)}"' for key, value in values.items())
+
+    lines = [
+        "# HELP kbo_request_duration_seconds Latency of successful requests.",
+        "# TYPE kbo_request_duration_seconds histogram",
+    ]
+    for endpoint, entry in report["requests"].items():
+        for bound, count in entry["latency_buckets"].items():
+            lines.append(
+                f"kbo_request_duration_seconds_bucket{{{labels(endpoint=endpoint, le=bound)}}} {count}"
+            )
+        lines.append(
+            f"kbo_request_duration_seconds_sum{{{labels(endpoint=endpoint)}}} {entry['seconds']}"
+        )
+        lines.append(
+            f"kbo_request_duration_seconds_count{{{labels(endpoint=endpoint)}}} {entry['count']}"
+        )
+
+    for name, key, help_text in [
+        ("kbo_response_bytes_total", "bytes", "Bytes of successful responses."),
+        ("kbo_request_failures_total", "failures", "Failed request attempts."),
+        ("kbo_request_retries_total", "retries", "Retried request attempts."),
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for endpoint, entry in report["requests"].items():
+            lines.append(f"{name}{{{labels(endpoint=endpoint)}}} {entry[key]}")
+
+    lines += [
+        "# HELP kbo_stage_seconds_total Time spent in each stage.",
+        "# TYPE kbo_stage_seconds_total counter",
+    ]
+    for stage, entry in report["stages"].items():
+        lines.append(
+            f"kbo_stage_seconds_total{{{labels(stage=stage)}}} {entry['seconds']}"
+        )
+    lines += [
+        "# HELP kbo_stage_calls_total Calls of each stage.",
+        "# TYPE kbo_stage_calls_total counter",
+    ]
+    for stage, entry in report["stages"].items():
+        lines.append(f"kbo_stage_calls_total{{{labels(stage=stage)}}} {entry['calls']}")
+
+    for name, value in report["counters"].items():
+        lines += [
+            f"# TYPE kbo_{name}_total counter",
+            f"kbo_{name}_total{{{labels()}}} {value}",
+        ]
+
+    lines += [
+        "# HELP kbo_run_duration_seconds Duration of the latest run.",
+        "# TYPE kbo_run_duration_seconds gauge",
+        f"kbo_run_duration_seconds{{{labels()}}} {report['duration']}",
+        "# HELP kbo_run_timestamp_seconds Time the latest run finished.",
+        "# TYPE kbo_run_timestamp_seconds gauge",
+        f"kbo_run_timestamp_seconds{{{labels()}}} {time.time():.0f}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+_metrics = RunMetrics()
+
+
+def get_metrics() -> RunMetrics:
+    return _metrics
@@ -1,43 +1,701 @@
+import os
+import re
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+import json as jsonlib
+from datetime import datetime
+from html import unescape
+from typing import Callable
+from urllib.parse import parse_qs, urlparse
+
 from requests import Session
-from crawlquest import json, html
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from crawlquest import raw
 from logger import get_logger
+from utils.database import get_journal_mode
+from utils.extract import extract_input, extract_selected
+from utils.metrics import get_metrics
 
 logger = get_logger()
 
 
-def fetch_html(url: str, payload: dict, session: Session) -> BeautifulSoup | None:
+class ResponseCache:
+    """
+    Size-bounded, content-addressed on-disk cache of HTTP responses.
+
+    Entries are keyed by URL plus the request payload without the volatile ASP.NET
+    form tokens. Response bodies are stored once per content hash, and the least
+    recently used entries are evicted when the cache grows beyond its size limit,
+    down to 90% of it so eviction does not run again on every new entry.
+    """
+
+    VOLATILE_FIELDS = {"__VIEWSTATE", "__EVENTVALIDATION"}
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 1 << 30,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = 600,
+    ):
+        """
+        Args:
+            path (str): Cache directory.
+            max_bytes (int, Optional): Maximum total size of cached bodies.
+            ttls (dict[str, float], Optional): TTL in seconds per endpoint name
+                                               (e.g. 'GetKboGameList') for current season data.
+            default_ttl (float, Optional): TTL for current season data of other endpoints.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.join(path, "objects"), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(path, "index.db"), timeout=30, check_same_thread=False
+        )
+        with self.lock, self.conn:
+            self.conn.execute(f"PRAGMA journal_mode={get_journal_mode()}")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )
+                """)
+            # Running total of the entry sizes, kept up to date by set and _evict
+            self.total = self._total_size()
+
+    @classmethod
+    def key(cls, url: str, payload: dict | None) -> str:
+        """Return the cache key of a request, ignoring volatile form tokens."""
+        normalized = {
+            k: str(v)
+            for k, v in (payload or {}).items()
+            if k not in cls.VOLATILE_FIELDS
+        }
+        return hashlib.sha256(
+            jsonlib.dumps([url, normalized], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def ttl(self, url: str, season: int | None) -> float | None:
+        """Return the TTL of a request: infinite for past seasons, short otherwise."""
+        if season is not None and int(season) < datetime.now().year:
+            return None
+        endpoint = urlparse(url).path.rsplit("/", 1)[-1]
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, url: str, payload: dict | None) -> bytes | None:
+        """Return the cached body of a request, or None on a miss or expired entry."""
+        key = self.key(url, payload)
+        with self.lock:
+            entry = self.conn.execute(
+                "SELECT digest, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            now = time.time()
+            if entry is None or (entry[1] is not None and entry[1] < now):
+                self.misses += 1
+                get_metrics().count("cache_misses")
+                return None
+
+            try:
+                with open(self._object_path(entry[0]), "rb") as f:
+                    content = f.read()
+            except OSError:
+                self.misses += 1
+                get_metrics().count("cache_misses")
+                return None
+
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            self.hits += 1
+            get_metrics().count("cache_hits")
+            return content
+
+    def contains(self, url: str, payload: dict | None) -> bool:
+        """Check whether a fresh entry exists, without touching the counters."""
+        with self.lock:
+            entry = self.conn.execute(
+                "SELECT expires_at FROM entries WHERE key = ?",
+                (self.key(url, payload),),
+            ).fetchone()
+        return entry is not None and (entry[0] is None or entry[0] >= time.time())
+
+    def set(self, url: str, payload: dict | None, content: bytes, ttl: float | None):
+        """
+        Store the body of a request.
+
+        Args:
+            url (str): Request URL.
+            payload (dict | None): Request form data.
+            content (bytes): Response body.
+            ttl (float | None): Time to live in seconds, None for no expiry.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(digest)
+        now = time.time()
+
+        with self.lock:
+            try:
+                if not os.path.exists(object_path):
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    with open(object_path, "wb") as f:
+                        f.write(content)
+
+                key = self.key(url, payload)
+                replaced = self.conn.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                        (
+                            key,
+                            digest,
+                            len(content),
+                            None if ttl is None else now + ttl,
+                            now,
+                        ),
+                    )
+                self.total += len(content) - (replaced[0] if replaced else 0)
+                if self.total > self.max_bytes:
+                    self._evict()
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Failed to cache response for {url}: {e}")
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def delete(self, url: str, payload: dict | None):
+        """Remove the entry of a request, e.g. a response found to be invalid."""
+        key = self.key(url, payload)
+        with self.lock:
+            try:
+                entry = self.conn.execute(
+                    "SELECT digest, size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if entry is not None:
+                    self._remove(key, entry[0])
+                    self.total -= entry[1]
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Failed to remove cached response for {url}: {e}")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.path, "objects", digest[:2], digest)
+
+    def _total_size(self) -> int:
+        # Total size counts every entry, even those sharing the same body
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def _evict(self):
+        # Other processes sharing the cache may have changed it since the last sync
+        total = self.total = self._total_size()
+        target = self.max_bytes * 0.9
+        if total <= self.max_bytes:
+            return
+
+        for key, digest, size in self.conn.execute(
+            "SELECT key, digest, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            if total <= target:
+                break
+            self._remove(key, digest)
+            total -= size
+            self.evictions += 1
+        self.total = total
+
+    def _remove(self, key: str, digest: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            shared = self.conn.execute(
+                "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+        if not shared:
+            try:
+                os.remove(self._object_path(digest))
+            except OSError:
+                pass
+
+
+class SessionPool:
+    """
+    Per-host keep-alive sessions shared by every JSON request.
+
+    Each host gets one session whose connection pool holds up to `size` connections,
+    so concurrent requests reuse open TCP/TLS connections instead of reconnecting.
+    """
+
+    def __init__(self, size: int = 1):
+        self.size = max(1, size)
+        self.sessions: dict[str, Session] = {}
+        self.lock = threading.Lock()
+
+    def get(self, url: str) -> Session:
+        """Return the shared session of the URL's host."""
+        host = urlparse(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.sessions[host] = session
+            return session
+
+    def resize(self, size: int):
+        """Close every session and size new connection pools to `size`."""
+        self.close()
+        with self.lock:
+            self.size = max(1, size)
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of requests sent and connections opened by all sessions."""
+        requests, connections = 0, 0
+        with self.lock:
+            for session in self.sessions.values():
+                for adapter in set(session.adapters.values()):
+                    for key in adapter.poolmanager.pools.keys():
+                        pool = adapter.poolmanager.pools.get(key)
+                        requests += pool.num_requests
+                        connections += pool.num_connections
+        return {
+            "requests": requests,
+            "connections": connections,
+            "reused": max(0, requests - connections),
+        }
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when requests to an endpoint are suspended by its circuit breaker."""
+
+
+class RequestScheduler:
+    """
+    Central admission control for outgoing requests.
+
+    - Concurrency follows AIMD: the limit grows by one slot per window of fast successes
+      and is halved on errors or when latency exceeds the target.
+    - Failed requests are retried with jittered exponential backoff.
+    - Each endpoint (host and path) has a circuit breaker that suspends it after
+      consecutive failures, then lets a single trial request through once the cooldown
+      has elapsed. Requests meanwhile wait for the trial instead of failing, and only
+      fail if the trial does.
+    - An optional budget (e.g. a multiprocessing semaphore) caps the requests in flight
+      across every process sharing it.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        latency_target: float = 3.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        budget=None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.latency_target = latency_target
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.budget = budget
+
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+        self.breakers: dict[str, dict] = {}
+        self.retries = 0
+        self.trips = 0
+
+    def call(self, url: str, request, retries: int | None = None):
+        """
+        Send a request through the scheduler.
+
+        Args:
+            url (str): Target URL, whose host and path identify the endpoint.
+            request (Callable): Function sending the request, raising on failure.
+            retries (int, Optional): Override of the number of retries.
+
+        Returns:
+            The return value of `request`.
+
+        Raises:
+            CircuitOpenError: If the trial request of the endpoint's open circuit failed.
+            Exception: The last error once every retry has failed.
+        """
+        parsed = urlparse(url)
+        endpoint, breaker = parsed.path, f"{parsed.netloc}{parsed.path}"
+        max_retries = self.max_retries if retries is None else retries
+
+        for attempt in range(max_retries + 1):
+            self._admit(breaker)
+            self._acquire()
+            start_time = time.time()
+            try:
+                result = request()
+            except Exception as e:
+                self._release()
+                opened = self._on_failure(breaker)
+                # Retrying into an open circuit would only wait for its cooldown
+                retried = (
+                    attempt < max_retries
+                    and not opened
+                    and not isinstance(e, CircuitOpenError)
+                )
+                get_metrics().observe_failure(endpoint, retried)
+                if not retried:
+                    raise
+
+                delay = random.uniform(
+                    0, min(self.max_delay, self.base_delay * 2**attempt)
+                )
+                logger.warning(
+                    f"Request to {endpoint} failed ({e}), retrying in {delay:.1f}s..."
+                )
+                with self.condition:
+                    self.retries += 1
+                time.sleep(delay)
+                continue
+
+            latency = time.time() - start_time
+            self._release()
+            self._on_success(breaker, latency)
+            # Requests return the body as received (response.content), so its size is
+            # not changed by decoding
+            size = len(result) if isinstance(result, bytes) else 0
+            get_metrics().observe_request(endpoint, latency, size)
+            return result
+
+    def stats(self) -> dict[str, float]:
+        with self.condition:
+            return {
+                "limit": int(self.limit),
+                "retries": self.retries,
+                "trips": self.trips,
+            }
+
+    def _acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+        if self.budget is not None:
+            self.budget.acquire()
+
+    def _release(self):
+        if self.budget is not None:
+            self.budget.release()
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def _admit(self, endpoint: str):
+        with self.condition:
+            breaker = self.breakers.setdefault(
+                endpoint, {"failures": 0, "opened_at": None, "trial": False}
+            )
+            opened_at = breaker["opened_at"]
+            while breaker["opened_at"] is not None:
+                # Reopened since this request started waiting: the trial failed
+                if breaker["opened_at"] != opened_at:
+                    raise CircuitOpenError(f"Circuit open for endpoint {endpoint}")
+
+                if breaker["trial"]:
+                    self.condition.wait()
+                    continue
+
+                remaining = breaker["opened_at"] + self.reset_timeout - time.time()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+
+                # Half-open: let a single trial request through
+                breaker["trial"] = True
+                return
+
+    def _on_success(self, endpoint: str, latency: float):
+        with self.condition:
+            self.breakers[endpoint].update(failures=0, opened_at=None, trial=False)
+
+            if latency > self.latency_target:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def _on_failure(self, endpoint: str) -> bool:
+        with self.condition:
+            self.limit = max(1.0, self.limit / 2)
+
+            breaker = self.breakers[endpoint]
+            breaker["failures"] += 1
+            if breaker["trial"] or breaker["failures"] >= self.failure_threshold:
+                if breaker["opened_at"] is None or breaker["trial"]:
+                    self.trips += 1
+                    logger.error(f"Circuit breaker opened for endpoint {endpoint}.")
+                breaker["opened_at"] = time.time()
+                breaker["trial"] = False
+            self.condition.notify_all()
+            return breaker["opened_at"] is not None
+
+
+class TokenManager:
+    """
+    ASP.NET sessions and form tokens (__VIEWSTATE, __EVENTVALIDATION) per page template.
+
+    A page template is the page URL without its query string, so the tokens of one
+    player or season page are reused for every other player or season. Each thread
+    keeps its own session, and tokens are only refreshed when a postback is rejected.
+    Sessions stay open until `close`, which scrapers call when their run finishes.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        # Every open session, so those of finished worker threads can be closed too
+        self.sessions: set[Session] = set()
+        self.lock = threading.Lock()
+        self.initiated = 0
+        self.reused = 0
+
+    @property
+    def entries(self) -> dict[str, tuple[Session, str, str]]:
+        """Sessions and tokens of the current thread per page template."""
+        if not hasattr(self.local, "entries"):
+            self.local.entries = {}
+        return self.local.entries
+
+    @staticmethod
+    def template(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
+    def get(
+        self, url: str
+    ) -> tuple[Session, str, str, bool] | tuple[None, None, None, bool]:
+        """
+        Return the session and tokens of the URL's page template, initiating them if needed.
+
+        Returns:
+            tuple: (session, viewstate, eventvalidation, reused) if successful,
+                   otherwise (None, None, None, False).
+        """
+        key = self.template(url)
+        entry = self.entries.get(key)
+        if entry is not None:
+            with self.lock:
+                self.reused += 1
+            return (*entry, True)
+
+        session, viewstate, eventvalidation = initiate_session(url)
+        if session is None:
+            return None, None, None, False
+
+        with self.lock:
+            self.initiated += 1
+            self.sessions.add(session)
+        self.entries[key] = (session, viewstate, eventvalidation)
+        return session, viewstate, eventvalidation, False
+
+    def update(self, url: str, viewstate: str, eventvalidation: str):
+        """Replace the tokens of the URL's page template with ones refreshed by a postback."""
+        key = self.template(url)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries[key] = (entry[0], viewstate, eventvalidation)
+
+    def invalidate(self, url: str):
+        """Drop the session and tokens of the URL's page template for the current thread."""
+        entry = self.entries.pop(self.template(url), None)
+        if entry is not None:
+            with self.lock:
+                self.sessions.discard(entry[0])
+            entry[0].close()
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {"initiated": self.initiated, "reused": self.reused}
+
+    def close(self):
+        """Close every session, those of other threads included."""
+        with self.lock:
+            sessions, self.sessions = self.sessions, set()
+            # Threads still alive initiate new sessions on their next postback
+            self.local = threading.local()
+        for session in sessions:
+            session.close()
+
+
+# Headers of an ASP.NET AJAX asynchronous postback
+ASYNC_HEADERS = {"X-MicrosoftAjax": "Delta=true", "X-Requested-With": "XMLHttpRequest"}
+
+_pool = SessionPool()
+_scheduler = RequestScheduler()
+_tokens = TokenManager()
+_cache: ResponseCache | None = None
+
+
+def configure_pool(size: int):
+    """Size the shared JSON session pool to the number of concurrent requests."""
+    _pool.resize(size)
+
+
+def get_pool() -> SessionPool:
+    return _pool
+
+
+def get_tokens() -> TokenManager:
+    return _tokens
+
+
+def configure_scheduler(scheduler: RequestScheduler):
+    """Set the scheduler every outgoing request goes through."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_scheduler() -> RequestScheduler:
+    return _scheduler
+
+
+def configure_cache(cache: ResponseCache | None):
+    """Set the response cache used by fetch_json and fetch_html (None to disable)."""
+    global _cache
+    _cache = cache
+
+
+def get_cache() -> ResponseCache | None:
+    return _cache
+
+
+def is_cached(url: str, payload: dict | None) -> bool:
+    """Check whether a request can be answered from the response cache."""
+    return _cache is not None and _cache.contains(url, payload)
+
+
+def fetch_html(
+    url: str,
+    payload: dict,
+    session: Session | None,
+    season: int | None = None,
+    retries: int | None = None,
+    headers: dict | None = None,
+    validate: Callable[[str], bool] | None = None,
+    as_bytes: bool = False,
+) -> str | bytes | None:
     """
-    Sends a POST request and returns the parsed HTML content as a BeautifulSoup object.
+    Sends a POST request and returns the HTML content.
+
+    The body is decoded as UTF-8, the encoding of the KBO pages, instead of detecting
+    the charset of every page. Responses are cached only once `validate` accepts them,
+    so error pages are not served from the cache later.
 
     Args:
         url (str): The target URL.
         payload (dict): The form data for the POST request.
-        session (requests.Session): The session to use for the request.
+        session (requests.Session | None): The session to use for the request.
+                                           May be None if the response is cached.
+        season (int, Optional): Season of the requested data, used for the cache TTL.
+        retries (int, Optional): Override of the scheduler's number of retries.
+        headers (dict, Optional): Additional request headers.
+        validate (Callable, Optional): Check of the decoded response before it is
+                                       cached. Responses are not cached without it.
+        as_bytes (bool, Optional): Return the original body instead of the decoded text.
 
     Returns:
-        BeautifulSoup | None: Parsed HTML document, or None on failure.
+        str | bytes | None: HTML document (or its original body with as_bytes), or
+                            None on failure.
     """
-    html_text = html(url, payload=payload, session=session)
-    if html_text:
-        return BeautifulSoup(html_text, "lxml")
-    return None
+    content = _cache.get(url, payload) if _cache else None
+    cached = content is not None
+    if not cached:
+        content = _scheduler.call(
+            url,
+            lambda: raw(url, payload=payload, headers=headers, session=session),
+            retries,
+        )
+    if not content:
+        return None
+
+    html_text = _decode(content)
+    if _cache and not cached and validate is not None and validate(html_text):
+        _cache.set(url, payload, content, _cache.ttl(url, season))
+    return content if as_bytes else html_text
 
 
-def fetch_json(url: str, payload: dict) -> dict | list | None:
+def _decode(content: bytes) -> str:
+    return content.decode("utf-8", errors="replace")
+
+
+def fetch_json(
+    url: str,
+    payload: dict,
+    season: int | None = None,
+    as_bytes: bool = False,
+    validate: Callable[[dict | list], bool] | None = None,
+) -> dict | list | bytes | None:
     """
     Sends a POST request and parses the JSON response.
 
+    Responses are cached only once `validate` accepts them, so error payloads are not
+    served from the cache later.
+
     Args:
         url (str): The target URL.
         payload (dict): The form data for the POST request.
+        season (int, Optional): Season of the requested data, used for the cache TTL.
+        as_bytes (bool, Optional): Return the original body of a valid JSON response
+                                   instead of the parsed object.
+        validate (Callable, Optional): Check of the parsed response before it is cached.
+                                       Responses are not cached without it.
 
     Returns:
-        dict | list | None: Parsed JSON object or list, or None on failure.
+        dict | list | bytes | None: Parsed JSON object or list (or the response body
+                                    with as_bytes), or None on failure.
     """
-    json_data = json(url, payload=payload)
+    content = _cache.get(url, payload) if _cache else None
+    cached = content is not None
+    if not cached:
+        content = _scheduler.call(
+            url, lambda: raw(url, payload=payload, session=_pool.get(url))
+        )
+
+    try:
+        json_data = jsonlib.loads(content)
+    except (jsonlib.JSONDecodeError, ValueError):
+        return None
+
     if json_data:
-        return json_data
+        if _cache and not cached and validate is not None and validate(json_data):
+            _cache.set(url, payload, content, _cache.ttl(url, season))
+        return content if as_bytes else json_data
     return None
 
 
@@ -55,19 +713,16 @@ def initiate_session(url: str) -> tuple[Session, str, str] | tuple[None, None, N
     session = Session()
 
     try:
-        html_text = html(url, session=session)
-        soup = BeautifulSoup(html_text, "lxml")
-
-        viewstate_tag = soup.find("input", {"id": "__VIEWSTATE"})
-        eventvalidation_tag = soup.find("input", {"id": "__EVENTVALIDATION"})
+        html_text = _decode(
+            _scheduler.call(url, lambda: raw(url, session=session)) or b""
+        )
+        viewstate = extract_input(html_text, "__VIEWSTATE")
+        eventvalidation = extract_input(html_text, "__EVENTVALIDATION")
 
-        if not viewstate_tag or not eventvalidation_tag:
+        if viewstate is None or eventvalidation is None:
             logger.warning("Missing VIEWSTATE or EVENTVALIDATION tokens.")
             return None, None, None
 
-        viewstate = viewstate_tag.get("value", "").strip()
-        eventvalidation = eventvalidation_tag.get("value", "").strip()
-
         if not viewstate or not eventvalidation:
             logger.warning("VIEWSTATE or EVENTVALIDATION value is empty.")
             return None, None, None
@@ -78,3 +733,177 @@ def initiate_session(url: str) -> tuple[Session, str, str] | tuple[None, None, N
         logger.error(f"Unexpected error during session initialization: {e}")
 
     return None, None, None
+
+
+def _postback_accepted(
+    url: str, response: str, payload: dict, fields: list[str]
+) -> bool:
+    # A rejected postback falls back to the default page, whose selections differ
+    if "<thead" not in response:
+        return False
+    # Tokens are shared by the pages of every player, so the page must post back to
+    # the requested one (e.g. the same playerId)
+    action = re.search(r'<form[^>]*\saction="([^"]*)"', response)
+    if action is not None:
+        posted = parse_qs(urlparse(unescape(action.group(1))).query)
+        for name, values in parse_qs(urlparse(url).query).items():
+            if posted.get(name) != values:
+                return False
+    for field in fields:
+        selected = extract_selected(response, field)
+        if selected is not None and selected != str(payload.get(field)):
+            return False
+    return True
+
+
+def parse_delta(text: str) -> list[tuple[str, str, str]] | None:
+    """
+    Splits an ASP.NET AJAX partial postback response into its entries.
+
+    The response is a sequence of 'length|type|id|content|' records, where length is
+    the number of characters of the content.
+
+    Args:
+        text (str): The response body.
+
+    Returns:
+        list[tuple[str, str, str]] | None: (type, id, content) entries, or None if the
+                                           response is not a delta (e.g. a full page).
+    """
+    entries, i = [], 0
+    while i < len(text):
+        try:
+            length_end = text.index("|", i)
+            type_end = text.index("|", length_end + 1)
+            id_end = text.index("|", type_end + 1)
+            length = int(text[i:length_end])
+        except ValueError:
+            return None
+
+        end = id_end + 1 + length
+        if text[end : end + 1] != "|":
+            return None
+
+        entries.append(
+            (
+                text[length_end + 1 : type_end],
+                text[type_end + 1 : id_end],
+                text[id_end + 1 : end],
+            )
+        )
+        i = end + 1
+
+    return entries or None
+
+
+def _unpack_delta(url: str, response: str, refresh: bool) -> str | None:
+    entries = parse_delta(response)
+    if entries is None:
+        # The server answered with a full page
+        return response
+
+    hidden = {name: content for kind, name, content in entries if kind == "hiddenField"}
+    if refresh and "__VIEWSTATE" in hidden and "__EVENTVALIDATION" in hidden:
+        _tokens.update(url, hidden["__VIEWSTATE"], hidden["__EVENTVALIDATION"])
+
+    # Errors and redirects carry no panel
+    panels = [content for kind, _, content in entries if kind == "updatePanel"]
+    return "".join(panels) or None
+
+
+def fetch_postback(
+    url: str,
+    payload: dict,
+    season: int | None = None,
+    fields: list[str] = (),
+    delta: bool = False,
+    as_bytes: bool = False,
+) -> str | bytes | None:
+    """
+    Sends an ASP.NET postback, reusing the form tokens of the page template when possible.
+
+    If the server rejects reused tokens, they are refreshed once and the postback is retried.
+
+    In delta mode the postback is sent as an asynchronous UpdatePanel postback. Only the
+    HTML of the updated panels is returned, and the refreshed form tokens of the response
+    replace the stored ones. The payload must name the panel in its ScriptManager field.
+
+    Args:
+        url (str): The target URL.
+        payload (dict): The form data without __VIEWSTATE and __EVENTVALIDATION.
+        season (int, Optional): Season of the requested data, used for the cache TTL.
+        fields (list[str], Optional): Dropdown fields whose selection must match the payload
+                                      for the postback to count as accepted.
+        delta (bool, Optional): Send an asynchronous postback and return the panel HTML.
+        as_bytes (bool, Optional): Return the original body of the page (or the panel
+                                   HTML encoded as UTF-8) instead of the decoded text.
+
+    Returns:
+        str | bytes | None: HTML document, or None on failure.
+    """
+    headers = None
+    if delta:
+        payload = {**payload, "__ASYNCPOST": "true"}
+        headers = ASYNC_HEADERS
+
+    def accepted(response: str | None, form: dict) -> bool:
+        if delta and response is not None:
+            response = _unpack_delta(url, response, False)
+        return response is not None and _postback_accepted(url, response, form, fields)
+
+    def result(content: bytes | None, response: str | None) -> str | bytes | None:
+        if not as_bytes or response is None:
+            return response
+        # The panel is a slice of the decoded body, so it is encoded back
+        return response.encode("utf-8") if delta else content
+
+    if is_cached(url, payload):
+        content = fetch_html(url, payload, None, season, as_bytes=True)
+        response = _decode(content) if content else None
+        if accepted(response, payload):
+            if delta:
+                response = _unpack_delta(url, response, False)
+            return result(content, response)
+        # Pages cached before they were checked may be rejected default pages
+        logger.info(f"Dropping cached postback response for {url}")
+        _cache.delete(url, payload)
+
+    for _ in range(2):
+        session, viewstate, eventvalidation, reused = _tokens.get(url)
+        if session is None:
+            return None
+
+        form = {
+            **payload,
+            "__VIEWSTATE": viewstate,
+            "__EVENTVALIDATION": eventvalidation,
+        }
+        try:
+            # Only accepted pages are cached, so a retry never gets a rejected one
+            content = fetch_html(
+                url,
+                form,
+                session,
+                season,
+                0 if reused else None,
+                headers,
+                lambda text: accepted(text, form),
+                as_bytes=True,
+            )
+            response = _decode(content) if content else None
+            if delta and response is not None:
+                response = _unpack_delta(url, response, True)
+        except RuntimeError:
+            if not reused:
+                raise
+            content = response = None
+
+        if response is not None and _postback_accepted(url, response, form, fields):
+            return result(content, response)
+        if not reused:
+            return result(content, response)
+
+        logger.info(f"Form tokens rejected, refreshing tokens for {url}")
+        _tokens.invalidate(url)
+
+    return None
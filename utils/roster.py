@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Callable
+
+from logger import get_logger
+
+logger = get_logger()
+
+
+class RosterCache:
+    """
+    Player rosters keyed by (season, series, player_type), shared in-process and on disk.
+
+    Rosters fetched after their season ended (from the start of the following year,
+    after the postseason) never expire. Other rosters are refetched once they are
+    older than `max_age` seconds, so a roster fetched during a season is completed
+    even if the season has ended since.
+    """
+
+    _memory: dict[tuple[str, int, str, str], tuple[float, list[dict]]] = {}
+    _lock = threading.Lock()
+    # One lock per roster, held while it is loaded so it is fetched only once
+    _loading: dict[tuple[str, int, str, str], threading.Lock] = {}
+
+    def __init__(self, path: str, max_age: float = 6 * 60 * 60):
+        self.path = path
+        self.max_age = max_age
+
+    def get(
+        self,
+        season: int,
+        series: list[int],
+        player_type: str,
+        loader: Callable[[], list[dict] | None],
+    ) -> list[dict]:
+        """
+        Return the roster of a season, loading it only if no fresh copy is cached.
+
+        Args:
+            season (int): Target season year.
+            series (list[int]): Series IDs of the roster.
+            player_type (str): 'hitter' or 'pitcher'.
+            loader (Callable): Function fetching the roster on a cache miss.
+
+        Returns:
+            list[dict]: Players with at least a 'P_ID' key.
+        """
+        key = (season, ",".join(map(str, series)), player_type)
+        with self._lock:
+            loading = self._loading.setdefault((self.path, *key), threading.Lock())
+
+        # The loader runs outside the shared lock, so other rosters load meanwhile
+        # and the season stats scrape it runs can store its roster
+        with loading:
+            with self._lock:
+                entry = self._memory.get((self.path, *key)) or self._load(key)
+            if entry is not None and self._fresh(season, entry[0]):
+                return entry[1]
+
+            players = loader() or []
+            if players:
+                with self._lock:
+                    self._store(key, players)
+            return players
+
+    def put(self, season: int, series: list[int], player_type: str, players: list):
+        """Store a roster fetched by a season stats scrape."""
+        if not players:
+            return
+        key = (season, ",".join(map(str, series)), player_type)
+        with self._lock:
+            self._store(key, players)
+
+    def _fresh(self, season: int, fetched_at: float) -> bool:
+        season_end = datetime(season + 1, 1, 1).timestamp()
+        return fetched_at >= season_end or time.time() - fetched_at <= self.max_age
+
+    def _file_path(self, key: tuple[int, str, str]) -> str:
+        season, series, player_type = key
+        return os.path.join(
+            self.path,
+            str(season),
+            player_type,
+            f"roster_{series.replace(',', '_')}.json",
+        )
+
+    def _load(self, key):
+        try:
+            with open(self._file_path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load roster cache: {e}")
+            return None
+
+        entry = (data["fetched_at"], data["players"])
+        self._memory[(self.path, *key)] = entry
+        return entry
+
+    def _store(self, key, players: list[dict]):
+        players = [
+            {k: player.get(k) for k in ("P_ID", "P_NM", "TEAM_NM")}
+            for player in players
+        ]
+        fetched_at = time.time()
+        self._memory[(self.path, *key)] = (fetched_at, players)
+
+        try:
+            file_path = self._file_path(key)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"fetched_at": fetched_at, "players": players},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            logger.error(f"Failed to save roster cache: {e}")
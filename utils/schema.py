@@ -0,0 +1,306 @@
+import re
+import math
+
+import pyarrow as pa
+
+from logger import get_logger
+
+logger = get_logger()
+
+
+class DatasetSchema:
+    """
+    Arrow types of the columns of an output dataset.
+
+    Columns are typed by their declared field, then by the first matching name pattern,
+    then by the default type of the dataset, so the same column always gets the same
+    type whatever the values of a single file.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        schema: pa.Schema,
+        default: pa.DataType = pa.string(),
+        patterns: dict[str, pa.DataType] | None = None,
+    ):
+        self.name = name
+        self.schema = schema
+        self.default = default
+        self.patterns = [
+            (re.compile(pattern), type) for pattern, type in (patterns or {}).items()
+        ]
+
+    def type(self, column: str) -> pa.DataType:
+        """Return the Arrow type of a column."""
+        index = self.schema.get_field_index(column)
+        if index >= 0:
+            return self.schema.field(index).type
+        for pattern, type in self.patterns:
+            if pattern.fullmatch(column):
+                return type
+        return self.default
+
+    def table(self, data: list[dict]) -> pa.Table:
+        """
+        Build an Arrow table from rows, coercing values to the types of the schema.
+
+        Columns keep the order in which they first appear in the rows. Values that
+        cannot be represented in their column's type are written as null, with a
+        warning, so the column keeps its type in every file.
+
+        Args:
+            data (list[dict]): Rows to convert.
+
+        Returns:
+            pa.Table: Table typed by the schema.
+        """
+        columns = list(dict.fromkeys(key for row in data for key in row))
+
+        arrays = [
+            self._array(column, [row.get(column) for row in data]) for column in columns
+        ]
+        return pa.Table.from_arrays(arrays, names=columns)
+
+    def cast(self, table: pa.Table) -> pa.Table:
+        """
+        Coerce the columns of a table to the types of the schema, like `table`.
+
+        Columns already of their type are kept as they are.
+
+        Args:
+            table (pa.Table): Table to convert, e.g. read from a Parquet file.
+
+        Returns:
+            pa.Table: Table typed by the schema.
+        """
+        arrays = [
+            (
+                array
+                if array.type == self.type(column)
+                else self._array(column, array.to_pylist())
+            )
+            for column, array in zip(table.column_names, table.columns)
+        ]
+        return pa.Table.from_arrays(arrays, names=table.column_names)
+
+    def _array(self, column: str, values: list) -> pa.Array:
+        type = self.type(column)
+        values, invalid = coerce(values, type)
+        if invalid:
+            logger.warning(
+                f"{len(invalid)} values of column {column} of {self.name} do not "
+                f"match {type}, saved as null (e.g. {invalid[0]!r})."
+            )
+        return pa.array(values, type=type)
+
+
+def _is_null(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def coerce(values: list, type: pa.DataType) -> tuple[list, list]:
+    """
+    Convert Python values to the given Arrow type.
+
+    Missing values and NaN become null. Integral floats are accepted as integers, and
+    strings are parsed (e.g. "20140329" as an integer).
+
+    Returns:
+        tuple[list, list]: The converted values, where values that cannot be
+                           represented in the type are null, and those invalid values.
+    """
+    if pa.types.is_string(type):
+        return [None if _is_null(value) else str(value) for value in values], []
+
+    if pa.types.is_integer(type):
+        convert = _to_int
+    elif pa.types.is_floating(type):
+        convert = _to_float
+    elif pa.types.is_boolean(type):
+        convert = _to_bool
+    else:
+        return values, []
+
+    result, invalid = [], []
+    for value in values:
+        converted = None if _is_null(value) else convert(value)
+        if converted is None and not _is_null(value):
+            invalid.append(value)
+        result.append(converted)
+    return result, invalid
+
+
+def _to_int(value) -> int | None:
+    if isinstance(value, str):
+        value = _to_float(value)
+    if isinstance(value, float):
+        value = int(value) if value.is_integer() else None
+    # Integers beyond the int64 range cannot be stored either
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if -(2**63) <= value < 2**63 else None
+    return None
+
+
+def _to_float(value) -> float | None:
+    if isinstance(value, str):
+        try:
+            value = float(value.replace(",", ""))
+        except ValueError:
+            return None
+        return None if math.isnan(value) or math.isinf(value) else value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _to_bool(value) -> bool | None:
+    if isinstance(value, str):
+        return {"true": True, "false": False}.get(value.strip().lower())
+    return value if isinstance(value, bool) else None
+
+
+_KEYS = [
+    pa.field("LE_ID", pa.int64()),
+    pa.field("SR_ID", pa.int64()),
+    pa.field("SEASON_ID", pa.int64()),
+]
+
+_SCHEDULE = pa.schema(
+    _KEYS
+    + [
+        pa.field("G_DT", pa.int64()),
+        pa.field("G_DT_TXT", pa.string()),
+        pa.field("G_ID", pa.string()),
+        pa.field("HEADER_NO", pa.int64()),
+        pa.field("G_TM", pa.string()),
+        pa.field("S_NM", pa.string()),
+        pa.field("AWAY_ID", pa.string()),
+        pa.field("HOME_ID", pa.string()),
+        pa.field("AWAY_NM", pa.string()),
+        pa.field("HOME_NM", pa.string()),
+        pa.field("T_PIT_P_ID", pa.int64()),
+        pa.field("T_PIT_P_NM", pa.string()),
+        pa.field("B_PIT_P_ID", pa.int64()),
+        pa.field("B_PIT_P_NM", pa.string()),
+        pa.field("W_PIT_P_ID", pa.int64()),
+        pa.field("W_PIT_P_NM", pa.string()),
+        pa.field("SV_PIT_P_ID", pa.int64()),
+        pa.field("SV_PIT_P_NM", pa.string()),
+        pa.field("L_PIT_P_ID", pa.int64()),
+        pa.field("L_PIT_P_NM", pa.string()),
+        pa.field("GAME_STATE_SC", pa.int64()),
+        pa.field("CANCEL_SC_ID", pa.int64()),
+        pa.field("CANCEL_SC_NM", pa.string()),
+        pa.field("GAME_INN_NO", pa.int64()),
+        pa.field("GAME_RESULT_CK", pa.int64()),
+        pa.field("T_SCORE_CN", pa.int64()),
+        pa.field("B_SCORE_CN", pa.int64()),
+        pa.field("VS_GAME_CN", pa.int64()),
+        pa.field("STRIKE_CN", pa.int64()),
+        pa.field("BALL_CN", pa.int64()),
+        pa.field("OUT_CN", pa.int64()),
+        pa.field("T_P_ID", pa.int64()),
+        pa.field("B_P_ID", pa.int64()),
+        pa.field("T_D_PIT_P_ID", pa.int64()),
+        pa.field("B_D_PIT_P_ID", pa.int64()),
+        pa.field("T_RANK_NO", pa.int64()),
+        pa.field("B_RANK_NO", pa.int64()),
+        pa.field("GAME_SC_ID", pa.int64()),
+        pa.field("GAME_SC_NM", pa.string()),
+    ]
+)
+
+_RESULT = pa.schema(
+    [pa.field("IS_HOME", pa.bool_()), pa.field("code", pa.int64())]
+    + _KEYS
+    + [
+        pa.field("G_ID", pa.string()),
+        pa.field("G_DT", pa.int64()),
+        pa.field("S_NM", pa.string()),
+        pa.field("AWAY_ID", pa.string()),
+        pa.field("HOME_ID", pa.string()),
+        pa.field("AWAY_NM", pa.string()),
+        pa.field("HOME_NM", pa.string()),
+        pa.field("CROWD_CN", pa.int64()),
+        pa.field("H_W_CN", pa.int64()),
+        pa.field("H_L_CN", pa.int64()),
+        pa.field("H_D_CN", pa.int64()),
+        pa.field("A_W_CN", pa.int64()),
+        pa.field("A_L_CN", pa.int64()),
+        pa.field("A_D_CN", pa.int64()),
+        pa.field("T_SCORE_CN", pa.int64()),
+        pa.field("B_SCORE_CN", pa.int64()),
+        pa.field("R", pa.int64()),
+        pa.field("H", pa.int64()),
+        pa.field("E", pa.int64()),
+        pa.field("B", pa.int64()),
+    ]
+)
+
+# Player stats columns are numbers unless declared otherwise
+_PLAYER = [
+    pa.field("P_ID", pa.int64()),
+    pa.field("P_NM", pa.string()),
+    pa.field("TEAM_NM", pa.string()),
+    pa.field("POS", pa.string()),
+    pa.field("OPP", pa.string()),
+    pa.field("SIT", pa.string()),
+    pa.field("W_L", pa.string()),
+] + [
+    pa.field(name, pa.int64())
+    for name in (
+        "G GS PA AB R H 2B 3B HR TB RBI SAC SF BB IBB HBP SO GDP MH XBH GO AO GW_RBI "
+        "W L SV HLD BSV SVO CG SHO QS TBF NP ER WP BK WGS WGB GF TS "
+        "E PKO PO A DP PB SB CS SBA OOB"
+    ).split()
+]
+
+# Columns without a mapped name keep their Korean header and hold text
+_UNMAPPED = {r".*[^\x00-\x7f].*": pa.string()}
+
+_SCHEMAS = {
+    "schedule": DatasetSchema(
+        "schedule", _SCHEDULE, patterns={r".*_(CN|RANK_NO)": pa.int64()}
+    ),
+    "result": DatasetSchema(
+        "result", _RESULT, patterns={r"INN_\d+|.*_(CN|RANK_NO)": pa.int64()}
+    ),
+    "season_summary": DatasetSchema(
+        "season_summary", pa.schema(_KEYS + _PLAYER), pa.float64(), _UNMAPPED
+    ),
+    "daily": DatasetSchema(
+        "daily",
+        pa.schema(_KEYS + [pa.field("G_DT", pa.int64())] + _PLAYER),
+        pa.float64(),
+        _UNMAPPED,
+    ),
+    "situation": DatasetSchema(
+        "situation", pa.schema(_KEYS + _PLAYER), pa.float64(), _UNMAPPED
+    ),
+}
+
+_DATASETS = [
+    (re.compile(r"game/schedule/.*"), "schedule"),
+    (re.compile(r"game/result/.*"), "result"),
+    (re.compile(r"player/.*/season_summary"), "season_summary"),
+    (re.compile(r"player/.*/daily"), "daily"),
+    (re.compile(r"player/.*/situation"), "situation"),
+]
+
+
+def get_schema(file_path: str) -> DatasetSchema | None:
+    """
+    Return the schema of the dataset an output file belongs to.
+
+    Args:
+        file_path (str): Path of the output file (without extension).
+
+    Returns:
+        DatasetSchema | None: Schema of the dataset, or None if the dataset is unknown.
+    """
+    file_path = file_path.replace("\\", "/")
+    for pattern, name in _DATASETS:
+        if pattern.fullmatch(file_path):
+            return _SCHEMAS[name]
+    return None
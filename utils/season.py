@@ -0,0 +1,168 @@
+import os
+import json
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from logger import get_logger
+from utils.archive import BackupArchive
+
+logger = get_logger()
+
+
+class SeasonCalendar:
+    """
+    Persistent index of the first and last game day of each season, per series ID.
+
+    The index is stored as JSON ({season: {series_id: [first, last]}}) and is built
+    from existing schedule backups the first time it is loaded.
+    """
+
+    def __init__(
+        self, path: str, backup_path: str, archive: BackupArchive | None = None
+    ):
+        self.path = path
+        self.backup_path = backup_path
+        self.archive = archive
+        self.windows: dict[str, dict[str, list[str]]] = {}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.windows = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Failed to load season calendar, rebuilding: {e}")
+                self.build()
+        else:
+            self.build()
+
+    def build(self):
+        """Rebuild the index from the archived and legacy schedule backups."""
+        for unit, content in self._schedule_backups():
+            season, date_str = unit.split("/")[-2:]
+            try:
+                games = json.loads(content).get("game", [])
+            except (ValueError, AttributeError) as e:
+                logger.warning(f"Skipping unreadable backup {unit}: {e}")
+                continue
+
+            for game in games:
+                self.add(int(season), game.get("SR_ID"), date_str)
+
+        if self.windows:
+            logger.info(f"Built season calendar for {len(self.windows)} seasons.")
+            self.save()
+
+    def _schedule_backups(self):
+        archived = set()
+        if self.archive is not None:
+            for unit in self.archive.units("game/schedule/"):
+                content = self.archive.get(unit)
+                if content is not None:
+                    archived.add(unit)
+                    yield unit, content
+
+        # Backups written before the archive are files under 'game/schedule/<season>/'
+        schedule_path = os.path.join(self.backup_path, "game", "schedule")
+        if not os.path.isdir(schedule_path):
+            return
+
+        for season in sorted(os.listdir(schedule_path)):
+            season_path = os.path.join(schedule_path, season)
+            if not season.isdigit() or not os.path.isdir(season_path):
+                continue
+
+            for filename in sorted(os.listdir(season_path)):
+                date_str, ext = os.path.splitext(filename)
+                unit = f"game/schedule/{season}/{date_str}"
+                if ext != ".json" or unit in archived:
+                    continue
+
+                try:
+                    with open(os.path.join(season_path, filename), "rb") as f:
+                        yield unit, f.read()
+                except OSError as e:
+                    logger.warning(f"Skipping unreadable backup {filename}: {e}")
+
+    def add(self, season: int, series_id, date_str: str):
+        """Record a game day of the given season and series."""
+        if series_id is None:
+            return
+
+        windows = self.windows.setdefault(str(season), {})
+        window = windows.setdefault(str(series_id), [date_str, date_str])
+        window[0] = min(window[0], date_str)
+        window[1] = max(window[1], date_str)
+
+    def window(
+        self, season: int, series: list[int]
+    ) -> tuple[datetime, datetime] | None:
+        """
+        Return the known (or estimated) game day window of a season.
+
+        Seasons without any record borrow the window of the nearest known season.
+
+        Args:
+            season (int): Target season year.
+            series (list[int]): Series IDs included in the schedule request.
+
+        Returns:
+            tuple[datetime, datetime] | None: First and last game day, or None if unknown.
+        """
+        known = [
+            int(s) for s, windows in self.windows.items() if self._span(windows, series)
+        ]
+        if not known:
+            return None
+
+        nearest = min(known, key=lambda s: (abs(s - season), -s))
+        first, last = self._span(self.windows[str(nearest)], series)
+
+        try:
+            return (
+                datetime.strptime(f"{season}{first[4:]}", "%Y%m%d"),
+                datetime.strptime(f"{season}{last[4:]}", "%Y%m%d"),
+            )
+        except ValueError:
+            # Feb 29 borrowed from a leap year
+            return None
+
+    def save(self):
+        """
+        Write the index to disk.
+
+        Windows saved by other processes since this index was loaded are merged in,
+        so scrapers of different seasons running in parallel do not overwrite each other.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(f"{self.path}.lock", "w") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        saved = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    saved = {}
+                for season, windows in saved.items():
+                    for series_id, window in windows.items():
+                        for date_str in window:
+                            self.add(int(season), series_id, date_str)
+
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.windows, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save season calendar: {e}")
+
+    @staticmethod
+    def _span(windows: dict[str, list[str]], series: list[int]) -> tuple | None:
+        spans = [windows[str(s)] for s in series if str(s) in windows]
+        if not spans:
+            return None
+        return min(span[0] for span in spans), max(span[1] for span in spans)
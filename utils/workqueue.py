@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from logger import get_logger
+
+logger = get_logger()
+
+
+class WorkQueue:
+    """
+    Queue of scraping units shared by workers on one or several hosts.
+
+    A unit is one scraper of a job's command for one season, optionally narrowed to a
+    single target (e.g. a player ID). Workers lease a unit for `lease_time` seconds and
+    keep the lease alive with heartbeats while they run it. Units whose lease expired,
+    e.g. because their worker died, are leased again by the next worker, and failed
+    units are retried until they were attempted `max_attempts` times.
+
+    The queue is an SQLite database, which may be on a disk shared by the hosts.
+
+    Statuses:
+        queued: Waiting for a worker.
+        leased: Being run by a worker.
+        done: Run to completion.
+        failed: Every attempt failed.
+    """
+
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, path: str, lease_time: float = 300, max_attempts: int = 3):
+        """
+        Args:
+            path (str): Path of the queue database.
+            lease_time (float, Optional): Seconds a lease lasts without a heartbeat.
+            max_attempts (int, Optional): Attempts of a unit before it is marked failed.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+
+        # Transactions are explicit, so a lease is selected and taken atomically.
+        # The default rollback journal is kept, WAL does not work on network filesystems.
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job TEXT PRIMARY KEY,
+                    command TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    series TEXT NOT NULL,
+                    mode TEXT,
+                    created_at REAL NOT NULL
+                )
+                """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS units (
+                    id INTEGER PRIMARY KEY,
+                    job TEXT NOT NULL,
+                    scraper INTEGER NOT NULL,
+                    season INTEGER NOT NULL,
+                    target TEXT NOT NULL DEFAULT '',
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_expires REAL,
+                    error TEXT,
+                    updated_at REAL NOT NULL,
+                    UNIQUE (job, scraper, season, target)
+                )
+                """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS units_status ON units (status, id)"
+            )
+
+    def add_job(
+        self,
+        job: str,
+        command: str,
+        format: str,
+        series: list[int],
+        mode: str | None = None,
+    ):
+        """
+        Create a job, or update the settings of an existing one.
+
+        Args:
+            job (str): Job name.
+            command (str): Scraping command ('schedule', 'game', 'player').
+            format (str): Output format ('parquet', 'json', 'csv', 'dataset').
+            series (list[int]): Series IDs.
+            mode (str, Optional): Run mode of the scrapers ('resume', 'incremental').
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)",
+                (job, command, format, json.dumps(series), mode, time.time()),
+            )
+
+    def put(self, job: str, units: list[tuple[int, int, str]]) -> int:
+        """
+        Queue units of a job. Units already in the queue are left as they are.
+
+        Args:
+            job (str): Job name.
+            units (list[tuple[int, int, str]]): (scraper index, season, target) of each
+                                                unit, with an empty target for a season.
+
+        Returns:
+            int: Number of units added.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = 0
+                for scraper, season, target in units:
+                    added += self.conn.execute(
+                        "INSERT OR IGNORE INTO units "
+                        "(job, scraper, season, target, status, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (job, scraper, season, target or "", self.QUEUED, now),
+                    ).rowcount
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def lease(self, worker: str, job: str | None = None) -> dict | None:
+        """
+        Lease the next queued unit, or a unit whose lease expired.
+
+        Args:
+            worker (str): Worker identifier.
+            job (str, Optional): Only lease units of this job.
+
+        Returns:
+            dict | None: Unit with the settings of its job, or None if nothing is available.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self.conn.execute(
+                        "SELECT id, status, attempts FROM units "
+                        "WHERE (status = ? OR (status = ? AND lease_expires < ?)) "
+                        "AND (? IS NULL OR job = ?) ORDER BY id LIMIT 1",
+                        (self.QUEUED, self.LEASED, now, job, job),
+                    ).fetchone()
+                    if row is None:
+                        self.conn.execute("COMMIT")
+                        return None
+
+                    unit_id, status, attempts = row
+                    if status == self.LEASED:
+                        logger.warning(f"Lease of unit {unit_id} expired.")
+                        if attempts >= self.max_attempts:
+                            self._set(unit_id, self.FAILED, "Lease expired", now)
+                            continue
+
+                    self.conn.execute(
+                        "UPDATE units SET status = ?, worker = ?, lease_expires = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (self.LEASED, worker, now + self.lease_time, now, unit_id),
+                    )
+                    unit = self.conn.execute(
+                        "SELECT u.id, u.job, u.scraper, u.season, u.target, u.attempts, "
+                        "j.command, j.format, j.series, j.mode "
+                        "FROM units u JOIN jobs j ON u.job = j.job WHERE u.id = ?",
+                        (unit_id,),
+                    ).fetchone()
+                    self.conn.execute("COMMIT")
+                    break
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        keys = ["id", "job", "scraper", "season", "target", "attempts"]
+        keys += ["command", "format", "series", "mode"]
+        unit = dict(zip(keys, unit))
+        unit["series"] = json.loads(unit["series"])
+        return unit
+
+    def heartbeat(self, unit_id: int, worker: str) -> bool:
+        """
+        Extend the lease of a unit.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        with self.lock:
+            return (
+                self.conn.execute(
+                    "UPDATE units SET lease_expires = ?, updated_at = ? "
+                    "WHERE id = ? AND worker = ? AND status = ?",
+                    (
+                        time.time() + self.lease_time,
+                        time.time(),
+                        unit_id,
+                        worker,
+                        self.LEASED,
+                    ),
+                ).rowcount
+                == 1
+            )
+
+    def complete(self, unit_id: int, worker: str):
+        """Mark a leased unit as done."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE units SET status = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (self.DONE, time.time(), unit_id, worker),
+            )
+
+    def fail(self, unit_id: int, worker: str, error: str):
+        """Requeue a failed unit, or mark it as failed once it used all its attempts."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT attempts FROM units WHERE id = ? AND worker = ?",
+                (unit_id, worker),
+            ).fetchone()
+            if row is None:
+                return
+            status = self.FAILED if row[0] >= self.max_attempts else self.QUEUED
+            self._set(unit_id, status, error, time.time())
+
+    def stats(self, job: str | None = None) -> dict[str, int]:
+        """Return the number of units of each status."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM units WHERE ? IS NULL OR job = ? "
+                "GROUP BY status",
+                (job, job),
+            ).fetchall()
+        stats = dict.fromkeys([self.QUEUED, self.LEASED, self.DONE, self.FAILED], 0)
+        stats.update(rows)
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _set(self, unit_id: int, status: str, error: str, now: float):
+        self.conn.execute(
+            "UPDATE units SET status = ?, error = ?, lease_expires = NULL, "
+            "updated_at = ? WHERE id = ?",
+            (status, error, now, unit_id),
+        )